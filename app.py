@@ -15,382 +15,26 @@ IS_HEADLESS = os.name != 'nt' or os.getenv("RUNNING_IN_DOCKER") == "true" or not
 import google.generativeai as genai
 from dotenv import load_dotenv
 from dropbox_handler import DropboxHandler
+from dropbox_browser import DropboxBrowser
 import auth # IMPORTADO
+import job_queue
+from job_worker import ensure_worker_running
+from translations import translate
 
 # Importar as funções do pipeline
-from pdf_detector import is_digital_pdf, extract_structured_markitdown # RENOMEADO
-from gcv_ocr import ocr_local_tesseract, extract_ocr_to_markdown_gemini
+from engine import ConversionOptions, convert_file
+from gcv_ocr import OCR_CONFIDENCE_THRESHOLD
+from conversion_cache import get_conversion_cache
 from youtube_handler import is_youtube_url, extract_youtube_transcript # NOVO
-from index_generator import generate_index_for_folder # NOVO RLM
+from index_generator import INDEX_CACHE_NAME, generate_index_for_folder # NOVO RLM
 
 
 
 # --- Sistema de Tradução ---
-TRANSLATIONS = {
-    "pt": {
-        "page_title": "Processador de Documentos para Markdown",
-        "login_subtitle": "Sistema Seguro de Processamento de Documentos",
-        "username": "Usuário",
-        "username_placeholder": "Digite seu usuário...",
-        "password": "Senha",
-        "password_placeholder": "Digite sua senha...",
-        "enter": "Entrar",
-        "login_success": "Login efetuado com sucesso! Redirecionando...",
-        "login_error": "Usuário ou senha inválidos. Tente novamente.",
-        "forced_change_pwd_title": "🔒 Alteração de Senha Obrigatória",
-        "forced_change_pwd_subtitle": "Este é o seu primeiro acesso ou sua senha foi resetada. Por questões de segurança, você deve escolher uma senha forte.",
-        "new_pwd": "Nova Senha",
-        "new_pwd_placeholder": "Digite uma nova senha...",
-        "confirm_pwd": "Confirme a Nova Senha",
-        "confirm_pwd_placeholder": "Repita a nova senha...",
-        "change_pwd_btn": "Alterar Senha e Entrar",
-        "pwd_blank_error": "A nova senha não pode estar em branco.",
-        "pwd_min_len_error": "A senha deve ter pelo menos 6 caracteres por segurança.",
-        "pwd_default_error": "A nova senha não pode ser a senha padrão '123456'. Defina uma senha mais segura.",
-        "pwd_mismatch_error": "As senhas digitadas não coincidem. Tente novamente.",
-        "pwd_change_success": "Senha alterada com sucesso! Acessando o sistema...",
-        "system_error_login": "Erro interno do sistema. Por favor, tente fazer login novamente.",
-        "connected_user": "👤 Usuário Conectado",
-        "role_admin": "🟢 Administrador",
-        "role_user": "🔵 Usuário Padrão",
-        "label_name": "Nome",
-        "label_profile": "Perfil",
-        "security_alert": "⚠️ **ALERTA DE SEGURANÇA:**\nA senha do usuário 'admin' ainda é a senha padrão provisória ('admin123'). Por favor, altere-a imediatamente na aba de Gestão de Usuários!",
-        "navigation": "Navegação",
-        "nav_process_docs": "📄 Processar Documentos",
-        "nav_user_mgmt": "👥 Gestão de Usuários",
-        "logout_btn": "🚪 Sair do Sistema",
-        "logout_success": "Logout efetuado!",
-        "user_mgmt_title": "👥 Gestão de Usuários",
-        "tab_registered_users": "📋 Usuários Cadastrados",
-        "tab_create_user": "➕ Criar Novo Usuário",
-        "status_badge_admin": "🟢 Admin",
-        "status_badge_user": "🔵 Usuário",
-        "status_badge_pwd_pending": " &nbsp;&nbsp;&nbsp; ⚠️ *Alteração de senha pendente*",
-        "created_at": "Criado em",
-        "updated_at": "Atualizado em",
-        "edit_user_help": "Editar Usuário",
-        "reset_pwd_help": "Redefinir Senha",
-        "delete_user_help": "Excluir Usuário",
-        "edit_user_section_title": "##### Editar Usuário",
-        "new_username_label": "Novo nome de usuário",
-        "admin_checkbox_label": "Administrador?",
-        "confirm_edit_btn": "Confirmar Edição",
-        "reset_pwd_section_title": "##### Redefinir Senha",
-        "reset_pwd_confirm_btn": "Confirmar Nova Senha",
-        "delete_user_warning": "Tem certeza que deseja excluir o usuário `{}`? Esta ação não pode ser desfeita.",
-        "delete_user_yes": "Sim, Excluir",
-        "create_user_info": "ℹ️ Novos usuários são criados automaticamente com a senha provisória **123456** e serão obrigados a alterá-la no primeiro acesso por questões de segurança.",
-        "new_username_placeholder": "Ex: joao.silva",
-        "admin_privileges_checkbox": "Conceder privilégios de Administrador?",
-        "create_user_btn": "Cadastrar Usuário",
-        "process_docs_title": "📄 Processador de Documentos para Markdown",
-        "input_data_subheader": "1. Entrada de Dados",
-        "tab_local_file": "📂 Arquivo Local",
-        "tab_batch_folder": "📦 Pasta (Lote)",
-        "tab_dropbox": "☁️ Dropbox",
-        "tab_youtube": "📺 YouTube",
-        "local_tab_headless_info": "ℹ️ Faça o upload de um arquivo para converter e gerar a versão Markdown para download.",
-        "local_tab_headless_uploader": "Selecione um arquivo para converter:",
-        "local_tab_info": "ℹ️ Selecione um arquivo para salvar a versão Markdown na **mesma pasta original**.",
-        "local_tab_select_btn": "📂 Selecionar Arquivo",
-        "local_tab_no_selection": "Nenhum arquivo selecionado.",
-        "all_supported": "Todos os Suportados",
-        "pdf_docs": "Documentos PDF",
-        "all_files": "Todos os Arquivos",
-        "batch_tab_headless_warning": "⚠️ **Aviso:** O processamento de pastas locais (Lote) está desativado em modo servidor (VPS/Docker) pois requer acesso ao sistema de arquivos do servidor. Para processar múltiplos arquivos em lote na nuvem, utilize a aba **Dropbox**, que oferece navegação de pastas e processamento incremental seguro.",
-        "batch_tab_info": "ℹ️ Selecione uma **PASTA** para converter TODOS os arquivos contidos nela (Recursivo).",
-        "batch_tab_select_btn": "📂 Selecionar Pasta",
-        "batch_tab_no_selection": "Nenhuma pasta selecionada.",
-        "semantic_index_title": "📚 Índice Semântico (RLM)",
-        "generate_index_local_btn": "🧠 Gerar Índice PDF desta Pasta",
-        "gemini_key_required_error": "⚠️ É necessário configurar a Chave API Gemini para usar o RLM.",
-        "index_running_spinner": "🧠 Analisando arquivos e gerando índice com RLM... (Isso pode demorar)",
-        "index_success": "✅ Índice Gerado com Sucesso! {} arquivo(s) indexado(s). Verifique os arquivos '_INDEX_CONTENT*.pdf' na pasta.",
-        "index_no_md_warning": "⚠️ Nenhum arquivo Markdown (.md) foi encontrado para indexar nesta pasta. Apenas arquivos convertidos para Markdown (.md) podem ser indexados. Converta seus arquivos primeiro nas abas correspondente!",
-        "dropbox_info": "ℹ️ Navegue pelas pastas e clique em 'Selecionar Esta Pasta' para converter.",
-        "dropbox_token_expander": "🔑 Configurar Token do Dropbox (Clique para expandir)",
-        "dropbox_token_instructions": "**Como obter um novo token:**\n1. Acesse [dropbox.com/developers/apps](https://www.dropbox.com/developers/apps).\n2. Clique no seu App (`carroll_rag` ou similar).\n3. Vá na aba **Settings**.\n4. Role até a seção **OAuth 2**.\n5. Clique no botão **Generate** (abaixo de *Generated access token*).\n6. Copie o código e cole abaixo.",
-        "dropbox_token_placeholder": "Cole seu Dropbox Access Token aqui:",
-        "dropbox_token_updated": "Token atualizado na sessão! (Reinicie o app se quiser salvar no .env permanentemente)",
-        "dropbox_token_missing": "⚠️ Token do Dropbox não encontrado. Por favor, insira acima.",
-        "dropbox_token_invalid": "O token atual parece inválido ou expirado. Use a área 'Configurar Token' acima para corrigir.",
-        "dropbox_current_folder": "Pasta Atual",
-        "dropbox_up_level": "⬆️ Subir Nível",
-        "dropbox_raiz": "Raiz (/)",
-        "dropbox_select_folder_btn": "✅ Selecionar Esta Pasta para Conversão",
-        "dropbox_selected_msg": "Pasta selecionada",
-        "dropbox_subfolders_caption": "Subpastas (clique para entrar):",
-        "dropbox_no_subfolders": "*(Nenhuma subpasta encontrada)*",
-        "dropbox_ready_msg": "🎯 **Pronto para processar:** {}",
-        "generate_index_dbx_btn": "🧠 Gerar Índice PDF (Dropbox)",
-        "dbx_index_running_spinner": "🧠 Preparando arquivos do Dropbox para indexação...",
-        "dbx_no_md_found": "Nenhum arquivo Markdown encontrado para indexar.",
-        "dbx_downloaded_for_analysis": "Baixados {} arquivos para análise.",
-        "dbx_rlm_processing_spinner": "🧠 RLM processando e gerando PDF...",
-        "dbx_index_no_md_warning": "⚠️ Nenhum arquivo Markdown (.md) foi encontrado para indexar nesta pasta. Apenas arquivos convertidos para Markdown (.md) podem ser indexados. Converta seus arquivos do Dropbox primeiro na aba acima!",
-        "dbx_no_index_generated": "Nenhum índice gerado. (Verifique logs/arquivos MD)",
-        "dbx_sending_toast": "Enviando",
-        "dbx_index_success": "✅ {} Índices Semânticos gerados e enviados para o Dropbox com sucesso!",
-        "youtube_info": "ℹ️ Transcrição salva na pasta `markdown_output`.",
-        "youtube_url_placeholder": "Cole uma URL do YouTube:",
-        "ia_config_subheader": "2. Configuração de IA (Opcional)",
-        "use_gemini_checkbox": "Usar Google Gemini AI? (Recomendado para PDFs escaneados ruins ou imagens complexas)",
-        "gemini_key_placeholder": "Cole sua Chave API Gemini:",
-        "gemini_key_valid": "✅ Chave Gemini validada!",
-        "gemini_force_checkbox": "Forçar uso do Gemini mesmo se Tesseract funcionar?",
-        "gemini_force_help": "Ignora OCR local e usa nuvem para tudo (custo/tempo maior).",
-        "gemini_key_invalid": "❌ Chave inválida.",
-        "gemini_key_warning": "⚠️ Insira a chave para ativar o modo IA.",
-        "overwrite_checkbox": "Sobrescrever arquivos Markdown existentes?",
-        "overwrite_help": "Se desmarcado, o sistema pulará arquivos que já possuem a versão _MD.md na pasta.",
-        "ready_to_process_info": "📁 **Pronto para Processar:** {}",
-        "start_processing_btn": "🚀 Iniciar Processamento",
-        "processing_youtube": "Processando YouTube",
-        "extracting_youtube": "Extraindo transcrição do YouTube...",
-        "youtube_transcription_success": "✅ Transcrição concluída!",
-        "youtube_transcription_error": "❌ Falha ao obter transcrição. Verifique se o vídeo tem legendas.",
-        "youtube_url_invalid": "❌ URL do YouTube inválida.",
-        "mode_hybrid_upload": "Modo de Processamento: Híbrido (Upload Web + Nuvem Gemini)",
-        "mode_local_upload": "Modo de Processamento: 100% Local (Upload Web + MarkItDown/Tesseract)",
-        "processing_upload": "Processando Upload Web...",
-        "upload_success": "✅ Upload processado com sucesso!",
-        "mode_hybrid_local": "Modo de Processamento: Híbrido (Local + Nuvem Gemini)",
-        "mode_local_local": "Modo de Processamento: 100% Local (MarkItDown/Tesseract)",
-        "processing_local": "Processando Arquivo Local...",
-        "mode_hybrid_batch": "Modo Batch: Híbrido (Local + Nuvem Gemini)",
-        "mode_local_batch": "Modo Batch: 100% Local",
-        "mode_hybrid_dropbox": "Modo Dropbox: Híbrido (Download -> Process -> Upload)",
-        "mode_local_dropbox": "Modo Dropbox: 100% Local (Download -> Process -> Upload)",
-        "processing_done_subheader": "✅ Processamento Concluído",
-        "preview_title": "### Pré-visualização do Conteúdo (Markdown)",
-        "extracted_content_label": "Conteúdo Extraído",
-        "download_md_btn": "⬇️ Baixar Arquivo Markdown",
-        "clean_old_outputs_btn": "🗑️ Limpar Arquivos de Saída Antigos",
-        "clean_success": "Pasta de saída limpa com sucesso!",
-        "clean_empty_info": "Nenhum arquivo para limpar na pasta de saída.",
-        "saved_locally_caption": "Arquivo salvo localmente no servidor em: {}",
-        "scanning_files": "🔍 Varrendo arquivos...",
-        "no_supported_files_found": "Nenhum arquivo suportado encontrado nesta pasta.",
-        "found_incompatible_files": "📂 Encontrados {} arquivos incompatíveis para conversão.",
-        "stop_batch_btn": "🛑 Parar Processamento em Lote",
-        "stop_dbx_btn": "🛑 Parar Dropbox Batch",
-        "batch_stopped_by_user": "Processamento interrompido pelo usuário.",
-        "batch_skipping_existing": "⏩ Pulando (Já existe): {}",
-        "batch_processing_file": "Processando [{}/{}]: {}...",
-        "batch_completed_msg": "✅ Concluído! Processados: {}. Pulados: {}. Erros: {}.",
-        "dbx_token_missing_error": "Token do Dropbox não encontrado.",
-        "dbx_scanning_files": "☁️ Varrendo arquivos no Dropbox...",
-        "dbx_no_supported_files": "Nenhum arquivo suportado encontrado em '{}'.",
-        "dbx_found_files": "☁️ Encontrados {} arquivos no Dropbox.",
-        "dbx_stopping": "Interrompido.",
-        "dbx_skipping_existing": "⏩ Pulando (Já existe): {}",
-        "dbx_download_processing": "Baixando e Processando [{}/{}]: {}...",
-        "dbx_uploading": "⬆️ Fazendo Upload",
-        "dbx_upload_error": "Erro no upload de {}",
-        "dbx_batch_completed_msg": "✅ Dropbox Batch Concluído! Sucessos: {}. Pulados: {}. Erros: {}.",
-        "pdf_digital_detected": "✅ PDF digital detectado. Usando MarkItDown/Fallback para extração estruturada (Local).",
-        "pdf_scanned_detected": "⚠️ PDF escaneado detectado. Tentando OCR local (Tesseract) primeiro.",
-        "tesseract_success": "✅ OCR Local (Tesseract) concluído. Verifique a qualidade.",
-        "initiating_gemini_ocr": "Iniciando OCR e estruturação via Gemini (custo/nuvem).",
-        "gemini_processing_success": "✅ Processamento Gemini concluído.",
-        "gemini_processing_failure": "❌ Processamento Gemini falhou (Bloqueio de Conteúdo ou Erro de API).",
-        "tesseract_failure": "❌ OCR Tesseract falhou.",
-        "trying_gemini_fallback": "Tentando OCR e estruturação via Gemini (custo/nuvem) as fallback.",
-        "pdf_processing_failure": "❌ Não foi possível processar o PDF. Chave Gemini não fornecida para fallback.",
-        "markitdown_extraction": "✅ Arquivo {} detectado. Extração estruturada via MarkItDown.",
-        "unsupported_format": "❌ Formato de arquivo '{}' não suportado.",
-        "file_not_found": "❌ Arquivo não encontrado no caminho especificado.",
-        "saving_local_mode": "💾 Modo Local: Salvando saída na mesma pasta: {}",
-        "saving_upload_mode": "💾 Processando upload temporário e salvando resultado em: {}",
-        "saving_upload_mode_simple": "📂 Modo Upload: Salvando saída em {}"
-    },
-    "en": {
-        "page_title": "Document Processor to Markdown",
-        "login_subtitle": "Secure Document Processing System",
-        "username": "Username",
-        "username_placeholder": "Enter your username...",
-        "password": "Password",
-        "password_placeholder": "Enter your password...",
-        "enter": "Sign In",
-        "login_success": "Login successful! Redirecting...",
-        "login_error": "Invalid username or password. Please try again.",
-        "forced_change_pwd_title": "🔒 Mandatory Password Change",
-        "forced_change_pwd_subtitle": "This is your first access or your password has been reset. For security reasons, you must choose a strong password.",
-        "new_pwd": "New Password",
-        "new_pwd_placeholder": "Enter a new password...",
-        "confirm_pwd": "Confirm New Password",
-        "confirm_pwd_placeholder": "Repeat new password...",
-        "change_pwd_btn": "Change Password and Sign In",
-        "pwd_blank_error": "New password cannot be blank.",
-        "pwd_min_len_error": "Password must be at least 6 characters long for security.",
-        "pwd_default_error": "New password cannot be the default password '123456'. Set a more secure password.",
-        "pwd_mismatch_error": "The passwords entered do not match. Please try again.",
-        "pwd_change_success": "Password changed successfully! Accessing system...",
-        "system_error_login": "Internal system error. Please try logging in again.",
-        "connected_user": "👤 Connected User",
-        "role_admin": "🟢 Administrator",
-        "role_user": "🔵 Standard User",
-        "label_name": "Name",
-        "label_profile": "Profile",
-        "security_alert": "⚠️ **SECURITY ALERT:**\nThe password for the 'admin' user is still the temporary default password ('admin123'). Please change it immediately in the User Management tab!",
-        "navigation": "Navigation",
-        "nav_process_docs": "📄 Process Documents",
-        "nav_user_mgmt": "👥 User Management",
-        "logout_btn": "🚪 Sign Out",
-        "logout_success": "Logged out successfully!",
-        "user_mgmt_title": "👥 User Management",
-        "tab_registered_users": "📋 Registered Users",
-        "tab_create_user": "➕ Create New User",
-        "status_badge_admin": "🟢 Admin",
-        "status_badge_user": "🔵 User",
-        "status_badge_pwd_pending": " &nbsp;&nbsp;&nbsp; ⚠️ *Password change pending*",
-        "created_at": "Created at",
-        "updated_at": "Updated at",
-        "edit_user_help": "Edit User",
-        "reset_pwd_help": "Reset Password",
-        "delete_user_help": "Delete User",
-        "edit_user_section_title": "##### Edit User",
-        "new_username_label": "New username",
-        "admin_checkbox_label": "Administrator?",
-        "confirm_edit_btn": "Confirm Edit",
-        "reset_pwd_section_title": "##### Reset Password",
-        "reset_pwd_confirm_btn": "Confirm New Password",
-        "delete_user_warning": "Are you sure you want to delete user `{}`? This action cannot be undone.",
-        "delete_user_yes": "Yes, Delete",
-        "create_user_info": "ℹ️ New users are automatically created with the temporary password **123456** and will be forced to change it on their first access for security reasons.",
-        "new_username_placeholder": "E.g., john.doe",
-        "admin_privileges_checkbox": "Grant Administrator privileges?",
-        "create_user_btn": "Register User",
-        "process_docs_title": "📄 Document Processor to Markdown",
-        "input_data_subheader": "1. Data Input",
-        "tab_local_file": "📂 Local File",
-        "tab_batch_folder": "📦 Folder (Batch)",
-        "tab_dropbox": "☁️ Dropbox",
-        "tab_youtube": "📺 YouTube",
-        "local_tab_headless_info": "ℹ️ Upload a file to convert and generate the Markdown version for download.",
-        "local_tab_headless_uploader": "Select a file to convert:",
-        "local_tab_info": "ℹ️ Select a file to save the Markdown version in the **same original folder**.",
-        "local_tab_select_btn": "📂 Select File",
-        "local_tab_no_selection": "No file selected.",
-        "all_supported": "All Supported",
-        "pdf_docs": "PDF Documents",
-        "all_files": "All Files",
-        "batch_tab_headless_warning": "⚠️ **Warning:** Local folder processing (Batch) is disabled in server mode (VPS/Docker) as it requires access to the server's file system. To process multiple files in batch on the cloud, use the **Dropbox** tab, which offers safe folder navigation and incremental processing.",
-        "batch_tab_info": "ℹ️ Select a **FOLDER** to convert ALL files contained within it (Recursive).",
-        "batch_tab_select_btn": "📂 Select Folder",
-        "batch_tab_no_selection": "No folder selected.",
-        "semantic_index_title": "📚 Semantic Index (RLM)",
-        "generate_index_local_btn": "🧠 Generate PDF Index of this Folder",
-        "gemini_key_required_error": "⚠️ Configuring the Gemini API Key is required to use RLM.",
-        "index_running_spinner": "🧠 Analyzing files and generating index with RLM... (This may take a while)",
-        "index_success": "✅ Index Generated Successfully! {} file(s) indexed. Check the '_INDEX_CONTENT*.pdf' files in the folder.",
-        "index_no_md_warning": "⚠️ No Markdown (.md) files were found to index in this folder. Only files converted to Markdown (.md) can be indexed. Convert your files first in the corresponding tabs!",
-        "dropbox_info": "ℹ️ Navigate through folders and click 'Select This Folder' to convert.",
-        "dropbox_token_expander": "🔑 Configure Dropbox Token (Click to expand)",
-        "dropbox_token_instructions": "**How to obtain a new token:**\n1. Access [dropbox.com/developers/apps](https://www.dropbox.com/developers/apps).\n2. Click on your App (`carroll_rag` or similar).\n3. Go to the **Settings** tab.\n4. Scroll down to the **OAuth 2** section.\n5. Click on the **Generate** button (under *Generated access token*).\n6. Copy the code and paste it below.",
-        "dropbox_token_placeholder": "Paste your Dropbox Access Token here:",
-        "dropbox_token_updated": "Token updated in session! (Restart app to save in .env permanently)",
-        "dropbox_token_missing": "⚠️ Dropbox Token not found. Please insert it above.",
-        "dropbox_token_invalid": "The current token seems invalid or expired. Use the 'Configure Token' area above to fix it.",
-        "dropbox_current_folder": "Current Folder",
-        "dropbox_up_level": "⬆️ Go Up One Level",
-        "dropbox_raiz": "Root (/)",
-        "dropbox_select_folder_btn": "✅ Select This Folder for Conversion",
-        "dropbox_selected_msg": "Folder selected",
-        "dropbox_subfolders_caption": "Subfolders (click to enter):",
-        "dropbox_no_subfolders": "*(No subfolders found)*",
-        "dropbox_ready_msg": "🎯 **Ready to process:** {}",
-        "generate_index_dbx_btn": "🧠 Generate PDF Index (Dropbox)",
-        "dbx_index_running_spinner": "🧠 Preparing Dropbox files for indexing...",
-        "dbx_no_md_found": "No Markdown files found to index.",
-        "dbx_downloaded_for_analysis": "Downloaded {} files for analysis.",
-        "dbx_rlm_processing_spinner": "🧠 RLM processing and generating PDF...",
-        "dbx_index_no_md_warning": "⚠️ No Markdown (.md) files were found to index in this folder. Only files converted to Markdown (.md) can be indexed. Convert your Dropbox files first in the tab above!",
-        "dbx_no_index_generated": "No index generated. (Check logs/MD files)",
-        "dbx_sending_toast": "Uploading",
-        "dbx_index_success": "✅ {} Semantic Indexes successfully generated and uploaded to Dropbox!",
-        "youtube_info": "ℹ️ Transcript saved in folder `markdown_output`.",
-        "youtube_url_placeholder": "Paste a YouTube URL:",
-        "ia_config_subheader": "2. AI Configuration (Optional)",
-        "use_gemini_checkbox": "Use Google Gemini AI? (Recommended for poor quality scanned PDFs or complex images)",
-        "gemini_key_placeholder": "Paste your Gemini API Key:",
-        "gemini_key_valid": "✅ Gemini Key validated!",
-        "gemini_force_checkbox": "Force Gemini usage even if Tesseract works?",
-        "gemini_force_help": "Bypasses local OCR and uses the cloud for everything (higher cost/time).",
-        "gemini_key_invalid": "❌ Invalid Key.",
-        "gemini_key_warning": "⚠️ Insert the key to enable AI mode.",
-        "overwrite_checkbox": "Overwrite existing Markdown files?",
-        "overwrite_help": "If unchecked, the system will skip files that already have an _MD.md version in the folder.",
-        "ready_to_process_info": "📁 **Ready to Process:** {}",
-        "start_processing_btn": "🚀 Start Processing",
-        "processing_youtube": "Processing YouTube",
-        "extracting_youtube": "Extracting YouTube transcript...",
-        "youtube_transcription_success": "✅ Transcription completed!",
-        "youtube_transcription_error": "❌ Failed to obtain transcription. Verify if the video has subtitles.",
-        "youtube_url_invalid": "❌ Invalid YouTube URL.",
-        "mode_hybrid_upload": "Processing Mode: Hybrid (Web Upload + Gemini Cloud)",
-        "mode_local_upload": "Processing Mode: 100% Local (Web Upload + MarkItDown/Tesseract)",
-        "processing_upload": "Processing Web Upload...",
-        "upload_success": "✅ Upload processed successfully!",
-        "mode_hybrid_local": "Processing Mode: Hybrid (Local + Gemini Cloud)",
-        "mode_local_local": "Processing Mode: 100% Local (MarkItDown/Tesseract)",
-        "processing_local": "Processing Local File...",
-        "mode_hybrid_batch": "Batch Mode: Hybrid (Local + Gemini Cloud)",
-        "mode_local_batch": "Batch Mode: 100% Local",
-        "mode_hybrid_dropbox": "Dropbox Mode: Hybrid (Download -> Process -> Upload)",
-        "mode_local_dropbox": "Dropbox Mode: 100% Local (Download -> Process -> Upload)",
-        "processing_done_subheader": "✅ Processing Completed",
-        "preview_title": "### Content Preview (Markdown)",
-        "extracted_content_label": "Extracted Content",
-        "download_md_btn": "⬇️ Download Markdown File",
-        "clean_old_outputs_btn": "🗑️ Clean Old Output Files",
-        "clean_success": "Output folder successfully cleaned!",
-        "clean_empty_info": "No files to clean in the output folder.",
-        "saved_locally_caption": "File saved locally on the server at: {}",
-        "scanning_files": "🔍 Scanning files...",
-        "no_supported_files_found": "No supported files found in this folder.",
-        "found_incompatible_files": "📂 Found {} incompatible files for conversion.",
-        "stop_batch_btn": "🛑 Stop Batch Processing",
-        "stop_dbx_btn": "🛑 Stop Dropbox Batch",
-        "batch_stopped_by_user": "Processing stopped by user.",
-        "batch_skipping_existing": "⏩ Skipping (Already exists): {}",
-        "batch_processing_file": "Processing [{}/{}]: {}...",
-        "batch_completed_msg": "✅ Completed! Processed: {}. Skipped: {}. Errors: {}.",
-        "dbx_token_missing_error": "Dropbox Token not found.",
-        "dbx_scanning_files": "☁️ Scanning files on Dropbox...",
-        "dbx_no_supported_files": "No supported files found in '{}'.",
-        "dbx_found_files": "☁️ Found {} files on Dropbox.",
-        "dbx_stopping": "Stopped.",
-        "dbx_skipping_existing": "⏩ Skipping (Already exists): {}",
-        "dbx_download_processing": "Downloading and Processing [{}/{}]: {}...",
-        "dbx_uploading": "⬆️ Uploading",
-        "dbx_upload_error": "Upload error for {}",
-        "dbx_batch_completed_msg": "✅ Dropbox Batch Completed! Successes: {}. Skipped: {}. Errors: {}.",
-        "pdf_digital_detected": "✅ Digital PDF detected. Using MarkItDown/Fallback for structured extraction (Local).",
-        "pdf_scanned_detected": "⚠️ Scanned PDF detected. Attempting local OCR (Tesseract) first.",
-        "tesseract_success": "✅ Local OCR (Tesseract) completed. Verify the quality.",
-        "initiating_gemini_ocr": "Initiating OCR and structuring via Gemini (cost/cloud).",
-        "gemini_processing_success": "✅ Gemini processing completed.",
-        "gemini_processing_failure": "❌ Gemini processing failed (Content Blocked or API Error).",
-        "tesseract_failure": "❌ Tesseract OCR failed.",
-        "trying_gemini_fallback": "Attempting OCR and structuring via Gemini (cost/cloud) as fallback.",
-        "pdf_processing_failure": "❌ Could not process PDF. Gemini key not provided for fallback.",
-        "markitdown_extraction": "✅ File {} detected. Structured extraction via MarkItDown.",
-        "unsupported_format": "❌ Unsupported file format '{}'.",
-        "file_not_found": "❌ File not found at the specified path.",
-        "saving_local_mode": "💾 Local Mode: Saving output in the same folder: {}",
-        "saving_upload_mode": "💾 Processing temporary upload and saving result in: {}",
-        "saving_upload_mode_simple": "📂 Upload Mode: Saving output in {}"
-    }
-}
+# Os textos ficam em translations.py (também usados pelo worker de jobs, sem Streamlit)
 
 def t(key, *args):
-    lang = st.session_state.get('lang', 'pt')
-    text = TRANSLATIONS.get(lang, TRANSLATIONS['pt']).get(key, key)
-    if args:
-        return text.format(*args)
-    return text
+    return translate(key, st.session_state.get('lang', 'pt'), *args)
 
 # --- Configuração da Interface ---
 st.set_page_config(
@@ -401,6 +45,8 @@ st.set_page_config(
 
 # Inicializa o banco de dados SQLite de usuários
 auth.init_db()
+# Inicializa a fila de jobs (lotes em segundo plano)
+job_queue.init_jobs_db()
 
 # --- Inicialização de Estado de Autenticação ---
 if 'lang' not in st.session_state:
@@ -651,61 +297,25 @@ def validate_gemini_api_key(api_key: str) -> bool:
     except Exception:
         return False
 
+def streamlit_event(level: str, key: str, *args):
+    """Mostra um evento do pipeline (engine.convert_file) na interface, no idioma da sessão."""
+    getattr(st, level)(t(key, *args))
+
+def session_conversion_options(gemini_key: str) -> ConversionOptions:
+    """Opções do pipeline a partir dos controles da sessão (Forçar Gemini, limiar de confiança)."""
+    return ConversionOptions(
+        gemini_key,
+        force_gemini=st.session_state.get('force_gemini', False),
+        confidence_threshold=st.session_state.get('ocr_confidence_threshold', OCR_CONFIDENCE_THRESHOLD),
+    )
+
 def run_file_pipeline(input_path_str: str, output_path_str: str, gemini_key: str):
     """
-    Executa o pipeline de conversão (Core Logic).
+    Executa o pipeline de conversão (engine.convert_file) com as opções da sessão,
+    mostrando o progresso na interface.
     Retorna True se sucesso, False caso contrário.
     """
-    input_path = Path(input_path_str)
-    file_extension = input_path.suffix.lower()
-
-    # --- LÓGICA CORE DE PROCESSAMENTO ---
-    if file_extension == '.pdf':
-        is_digital = is_digital_pdf(input_path_str)
-        
-        if is_digital:
-            st.success(t("pdf_digital_detected"))
-            extract_structured_markitdown(input_path_str, output_path_str)
-            
-        else:
-            st.warning(t("pdf_scanned_detected"))
-            
-            # TENTATIVA 1: OCR LOCAL (Tesseract)
-            tesseract_success = ocr_local_tesseract(input_path_str, output_path_str)
-            
-            if tesseract_success:
-                st.success(t("tesseract_success"))
-                
-                if gemini_key and st.session_state.get('force_gemini', False):
-                    st.info(t("initiating_gemini_ocr"))
-                    success = extract_ocr_to_markdown_gemini(input_path_str, output_path_str, gemini_key)
-                    if success:
-                        st.success(t("gemini_processing_success"))
-                    else:
-                        st.error(t("gemini_processing_failure"))
-            
-            elif gemini_key:
-                st.error(t("tesseract_failure"))
-                st.info(t("trying_gemini_fallback"))
-                success = extract_ocr_to_markdown_gemini(input_path_str, output_path_str, gemini_key)
-                if success:
-                    st.success(t("gemini_processing_success"))
-                else:
-                    st.error(t("gemini_processing_failure"))
-            else:
-                st.error(t("pdf_processing_failure"))
-                return False
-                    
-    elif file_extension in ['.docx', '.pptx', '.xlsx', '.doc', '.xls', '.csv', '.json', '.xml', '.html', '.zip', '.mp3', '.wav', '.jpg', '.png', '.epub']:
-        # NOVA LÓGICA: Extração direta via MarkItDown para outros formatos
-        st.success(t("markitdown_extraction").format(file_extension))
-        extract_structured_markitdown(input_path_str, output_path_str) 
-        
-    else:
-        st.error(t("unsupported_format").format(file_extension))
-        return False
-
-    return True
+    return convert_file(input_path_str, output_path_str, session_conversion_options(gemini_key), on_event=streamlit_event)
 
 def process_local_file(local_path_str, gemini_key):
     """
@@ -758,9 +368,31 @@ def process_uploaded_file(uploaded_file, gemini_key):
         
     return output_md_path if success else None
 
+def submit_batch_job(kind: str, source: str, gemini_key: str, overwrite: bool = False, **params):
+    """
+    Envia um lote (pasta local ou Dropbox) para a fila de jobs e garante que haja um worker ativo.
+    O lote roda fora do script do Streamlit: reruns e abas fechadas não o interrompem.
+    """
+    params.update(session_conversion_options(gemini_key).to_dict())
+    params.update({
+        "overwrite": overwrite,
+        "lang": st.session_state.get('lang', 'pt'),
+        "use_gemini": bool(params.get("gemini_key")),
+    })
+    # Segredos não vão para a fila: ficam com o usuário (ou nas variáveis de ambiente) e o worker os obtém
+    # pelo dono do job ao executá-lo (ver job_worker.resolve_job_secrets)
+    secrets = {name: params.pop(name, None) for name in job_queue.SECRET_PARAMS}
+    auth.save_user_credentials(st.session_state['username'], **{
+        name: None if value == os.getenv(env_var) else value
+        for name, env_var in job_queue.SECRET_PARAMS.items() if secrets[name]})
+    job_id = job_queue.submit_job(kind, st.session_state['username'], source, params)
+    ensure_worker_running()
+    st.success(t("job_submitted", job_id))
+    return job_id
+
 def process_batch_directory(directory_path_str: str, gemini_key: str, overwrite: bool = False):
     """
-    Varre um diretório recursivamente e converte arquivos suportados.
+    Envia a conversão de um diretório (recursiva) para a fila de jobs (ver job_worker.run_local_batch_job).
     Args:
         overwrite: Se True, refaz arquivos já existentes. Se False, pula.
     """
@@ -768,172 +400,68 @@ def process_batch_directory(directory_path_str: str, gemini_key: str, overwrite:
     if not root_dir.exists() or not root_dir.is_dir():
         st.error("❌ Diretório inválido.")
         return
-    
-    supported_extensions = {'.pdf', '.docx', '.pptx', '.xlsx', '.doc', '.xls', '.csv', '.json', '.xml', '.html', '.zip', '.mp3', '.wav', '.jpg', '.png', '.epub'}
-    files_to_process = []
-    
-    # 1. Varredura
-    status_text = st.empty()
-    status_text.info(t("scanning_files"))
-    
-    for path in root_dir.rglob('*'):
-        if path.is_file() and path.suffix.lower() in supported_extensions:
-            files_to_process.append(path)
-            
-    if not files_to_process:
-        st.warning(t("no_supported_files_found"))
-        return
-
-    st.success(t("found_incompatible_files").format(len(files_to_process)))
-    
-    # 2. Barra de Progresso
-    progress_bar = st.progress(0)
-    log_area = st.empty()
-    
-    processed_count = 0
-    skipped_count = 0 # NOVO
-    errors_count = 0
-    
-    stop_button = st.button(t("stop_batch_btn"))
-    
-    for i, file_path in enumerate(files_to_process):
-        if stop_button:
-            st.warning(t("batch_stopped_by_user"))
-            break
-            
-        rel_path = file_path.relative_to(root_dir)
-        
-        # Define saída: Nome_MD.md (na mesma pasta)
-        output_path = file_path.parent / f"{file_path.stem}MD.md"
-        
-        # LÓGICA INCREMENTAL
-        if output_path.exists() and not overwrite:
-            log_area.code(t("batch_skipping_existing", rel_path))
-            skipped_count += 1
-            progress = (i + 1) / len(files_to_process)
-            progress_bar.progress(progress)
-            continue
+    submit_batch_job(job_queue.JOB_LOCAL_BATCH, str(root_dir), gemini_key, overwrite, directory=str(root_dir))
 
-        log_area.code(t("batch_processing_file", i+1, len(files_to_process), rel_path))
-
-        try:
-             # Chama Pipeline
-             success = run_file_pipeline(str(file_path), str(output_path), gemini_key)
-             if success:
-                 processed_count += 1
-             else:
-                 errors_count += 1
-        except Exception as e:
-             print(f"Erro no batch para {file_path}: {e}")
-             errors_count += 1
-
-        # Atualiza progresso
-        progress = (i + 1) / len(files_to_process)
-        progress_bar.progress(progress)
-    
-    status_text.success(t("batch_completed_msg", processed_count, skipped_count, errors_count))
-    st.balloons()
-
-
-def process_dropbox_batch(folder_path_str: str, gemini_key: str, overwrite: bool = False):
+def process_dropbox_batch(folder_path_str: str, gemini_key: str, overwrite: bool = False, continuous: bool = False):
     """
-    Processamento em lote via Dropbox (Download -> Convert -> Upload).
+    Envia o processamento em lote via Dropbox (Download -> Convert -> Upload) para a fila de jobs
+    (ver job_worker.run_dropbox_batch_job).
     Args:
         overwrite: Se True, refaz arquivos já existentes. Se False, pula.
+        continuous: Se True, o job segue monitorando a pasta e converte novos uploads até ser cancelado.
     """
     token = st.session_state.get('dropbox_token')
     if not token:
         st.error(t("dbx_token_missing_error"))
         return
 
-    dbx = DropboxHandler(token)
-    
-    # 1. Verifica Conexão
-    status, msg = dbx.check_connection()
+    # 1. Verifica Conexão antes de enfileirar
+    status, msg = DropboxHandler(token, lang=st.session_state.get('lang', 'pt')).check_connection()
     if not status:
         st.error(msg)
         return
-        
     st.toast(msg, icon="☁️")
-    
-    # 2. Varredura
-    supported_extensions = {'.pdf', '.docx', '.pptx', '.xlsx', '.doc', '.xls', '.csv', '.json', '.xml', '.html', '.zip', '.mp3', '.wav', '.jpg', '.png', '.epub'}
-    
-    with st.spinner(t("dbx_scanning_files")):
-        file_entries = dbx.list_files_recursive(folder_path_str, supported_extensions)
-        
-    if not file_entries:
-        st.warning(t("dbx_no_supported_files").format(folder_path_str))
+
+    submit_batch_job(job_queue.JOB_DROPBOX_BATCH, folder_path_str if folder_path_str else "/", gemini_key, overwrite,
+                     folder=folder_path_str, dropbox_token=token, continuous=continuous)
+
+@st.fragment(run_every=3)
+def show_jobs_panel():
+    """Acompanhamento dos jobs do usuário (todos, para administradores), atualizado periodicamente."""
+    owner = None if st.session_state.get('is_admin') else st.session_state['username']
+    jobs = job_queue.list_jobs(owner=owner, limit=10)
+    if not jobs:
+        st.caption(t("jobs_empty"))
         return
-        
-    st.success(t("dbx_found_files").format(len(file_entries)))
-    
-    # 3. Processamento
-    progress_bar = st.progress(0)
-    log_area = st.empty()
-    stop_button = st.button(t("stop_dbx_btn"))
-    
-    temp_dir = Path("temp_dropbox")
-    temp_dir.mkdir(exist_ok=True)
-    
-    processed_count = 0
-    skipped_count = 0 # NOVO
-    errors_count = 0
-    
-    for i, entry in enumerate(file_entries):
-        if stop_button:
-            st.warning(t("dbx_stopping"))
-            break
-            
-        local_output_name = f"{Path(entry.name).stem}MD.md"
-        # Dropbox Output Path
-        dropbox_output_path = f"{Path(entry.path_display).parent.as_posix()}/{local_output_name}"
-        if dropbox_output_path.startswith("//"):
-             dropbox_output_path = dropbox_output_path[1:]
-
-        # LÓGICA INCREMENTAL (DROPBOX)
-        if not overwrite:
-            # Verifica se existe chamando metadados
-            if dbx.file_exists(dropbox_output_path):
-                 log_area.code(t("dbx_skipping_existing", entry.path_display))
-                 skipped_count += 1
-                 progress_bar.progress((i + 1) / len(file_entries))
-                 continue
-
-        log_area.code(t("dbx_download_processing", i+1, len(file_entries), entry.path_display))
-        
-        # Paths do download temporário
-        local_input = temp_dir / entry.name
-        local_output = temp_dir / local_output_name
-        
-        try:
-            # Download
-            if dbx.download_file(entry.path_display, str(local_input)):
-                # Converte
-                if run_file_pipeline(str(local_input), str(local_output), gemini_key):
-                    # Upload
-                    log_area.code(t("dbx_uploading") + f": {dropbox_output_path}")
-                    if dbx.upload_file(str(local_output), dropbox_output_path):
-                         processed_count += 1
-                    else:
-                         errors_count += 1
-                         st.error(t("dbx_upload_error").format(entry.name))
-                else:
-                    errors_count += 1
-            else:
-                 errors_count += 1
-        except Exception as e:
-            st.error(f"Erro DBX: {e}")
-            errors_count += 1
-        finally:
-            # Limpeza Temp
-            if local_input.exists(): os.remove(local_input)
-            if local_output.exists(): os.remove(local_output)
-
-        progress_bar.progress((i + 1) / len(file_entries))
-        
-    st.success(t("dbx_batch_completed_msg", processed_count, skipped_count, errors_count))
-    st.balloons()
+
+    for job in jobs:
+        with st.container(border=True):
+            col_info, col_action = st.columns([4, 1], vertical_alignment="center")
+            with col_info:
+                owner_label = f" · {job['owner']}" if owner is None else ""
+                st.markdown(f"**#{job['id']} {t('job_kind_' + job['kind'])}:** `{job['source']}`{owner_label} — {t('job_status_' + job['status'])}")
+                done = job['processed'] + job['skipped'] + job['errors']
+                if job['total']:
+                    st.progress(done / job['total'])
+                st.caption(t("job_counts_caption", job['processed'], job['skipped'], job['errors'], job['total']))
+                if job['message']:
+                    st.caption(job['message'])
+            with col_action:
+                if job['status'] in job_queue.ACTIVE_JOB_STATUSES:
+                    if job['cancel_requested']:
+                        st.caption(t("job_cancel_requested"))
+                    elif st.button(t("job_cancel_btn"), key=f"cancel_job_{job['id']}", use_container_width=True):
+                        job_queue.request_cancel(job['id'])
+                        st.rerun(scope="fragment")
+
+            if job['errors']:
+                with st.expander(t("job_failed_files_expander", job['errors'])):
+                    for job_file in job_queue.list_job_files(job['id'], status=job_queue.FILE_ERROR, limit=50):
+                        st.markdown(f"- `{job_file['path']}`: {job_file['error'] or ''}")
+
+    # Reinicia um worker se houver jobs pendentes sem nenhum worker ativo (ex.: após reinício do servidor)
+    if any(job['status'] in job_queue.ACTIVE_JOB_STATUSES for job in jobs):
+        ensure_worker_running()
 
 
 def process_uploaded_file(uploaded_file, gemini_key): # RENOMEADO
@@ -989,6 +517,13 @@ with st.sidebar:
             [t("nav_process_docs"), t("nav_user_mgmt")],
             key="nav_mode"
         )
+        
+        # Estatísticas do cache de conversões (apenas Admin)
+        conversion_cache = get_conversion_cache()
+        if conversion_cache is not None:
+            cache_stats = conversion_cache.stats()
+            st.caption(t("cache_stats_caption", cache_stats["hits"], cache_stats["misses"],
+                         cache_stats["entries"], cache_stats["size_bytes"] / (1024 * 1024)))
     
     st.markdown("---")
     # Language Selector UI
@@ -1266,11 +801,17 @@ with tab_dropbox:
     if not st.session_state.get('dropbox_token'):
         st.warning(t("dropbox_token_missing"))
     else:
-        # Instancia Handler
-        dbx = DropboxHandler(st.session_state['dropbox_token'])
+        # Cliente da sessão (validação da conta e listagens em cache), recriado se o token ou o idioma mudar
+        browser = st.session_state.get('dbx_browser')
+        if browser is None or not browser.matches(st.session_state['dropbox_token'], st.session_state.get('lang', 'pt')):
+            if browser is not None:
+                browser.close()
+            browser = DropboxBrowser(st.session_state['dropbox_token'], lang=st.session_state.get('lang', 'pt'))
+            st.session_state['dbx_browser'] = browser
+        dbx = browser.handler
         
         # 1. VERIFICAÇÃO PREVENTIVA DE CONEXÃO
-        is_connected, msg_connection = dbx.check_connection()
+        is_connected, msg_connection = browser.check_connection()
         
         if not is_connected:
             st.warning(f"⚠️ {msg_connection}")
@@ -1283,7 +824,7 @@ with tab_dropbox:
             st.markdown(f"**📂 {t('dropbox_current_folder')}:** `{display_path}`")
             
             # Botões de Ação (Voltar / Selecionar)
-            col_nav_1, col_nav_2 = st.columns([1, 4])
+            col_nav_1, col_nav_refresh, col_nav_2 = st.columns([1, 1, 4])
         
             with col_nav_1:
                 if current != "":
@@ -1295,6 +836,11 @@ with tab_dropbox:
                         st.rerun()
                 else:
                     st.button(t("dropbox_up_level") + " (" + t("dropbox_raiz") + ")", disabled=True, use_container_width=True)
+
+            with col_nav_refresh:
+                if st.button(t("dropbox_refresh_btn"), use_container_width=True):
+                    browser.invalidate()
+                    st.rerun()
                     
             with col_nav_2:
                  if st.button(t("dropbox_select_folder_btn"), use_container_width=True, type="primary"):
@@ -1311,9 +857,11 @@ with tab_dropbox:
             st.caption(t("dropbox_subfolders_caption"))
             
             # Listagem de Subpastas
-            subfolders = dbx.list_subfolders(current)
+            subfolders = browser.list_subfolders(current)
             
-            if not subfolders:
+            if browser.last_error:
+                st.error(browser.last_error)
+            elif not subfolders:
                 st.caption(t("dropbox_no_subfolders"))
             else:
                 # Grid de pastas para economizar espaço
@@ -1329,6 +877,7 @@ with tab_dropbox:
     selected_dbx = st.session_state.get('dbx_selected_for_processing')
     if selected_dbx is not None:
          st.success(t("dropbox_ready_msg").format(selected_dbx if selected_dbx else t("dropbox_raiz")))
+         st.checkbox(t("dbx_continuous_checkbox"), key='dbx_continuous', help=t("dbx_continuous_help"))
          
          # --- RLM INDEX GENERATION (DROPBOX) ---
          st.divider()
@@ -1346,10 +895,14 @@ with tab_dropbox:
                     index_temp_dir = Path("temp_dropbox_index")
                     index_temp_dir.mkdir(exist_ok=True)
                     
-                    # 2. Listar apenas MDs
-                    md_entries = dbx.list_files_recursive(dest_path, {'.md'})
+                    # 2. Listar os MDs e os caches de índice (só o conteúdo novo ou alterado vai ao Gemini)
+                    md_entries = dbx.list_files_recursive(dest_path, {'.md', '.json'})
+                    md_entries = [entry for entry in md_entries
+                                  if entry.name.lower().endswith('.md') or entry.name == INDEX_CACHE_NAME]
                     
-                    if not md_entries:
+                    if dbx.last_error:
+                        st.error(dbx.last_error)
+                    elif not any(entry.name.lower().endswith('.md') for entry in md_entries):
                         st.warning(t("dbx_no_md_found"))
                     else:
                         downloaded_count = 0
@@ -1377,19 +930,26 @@ with tab_dropbox:
                         else:
                             # 4. Upload
                             pdf_files = list(index_temp_dir.rglob("_INDEX_CONTENT*.pdf"))
+                            cache_files = list(index_temp_dir.rglob(INDEX_CACHE_NAME))
                             if not pdf_files:
                                 st.error(t("dbx_no_index_generated"))
                             else:
-                                uploaded_indexes = 0
-                                for pdf in pdf_files:
+                                uploads = []
+                                for pdf in pdf_files + cache_files:
                                     rel_pdf_path = pdf.relative_to(index_temp_dir)
                                     base = dest_path if dest_path != "" else ""
                                     remote_pdf_path = f"{base}/{rel_pdf_path.as_posix()}"
                                     if remote_pdf_path.startswith("//"): remote_pdf_path = remote_pdf_path[1:]
-                                    
-                                    st.toast(t("dbx_sending_toast") + f": {rel_pdf_path.name}")
-                                    dbx.upload_file(str(pdf), remote_pdf_path)
-                                    uploaded_indexes += 1
+                                    uploads.append((str(pdf), remote_pdf_path))
+                                
+                                # Envio paralelo com commit em grupo (uma confirmação para todos os índices)
+                                st.toast(t("dbx_sending_toast") + f": {len(pdf_files)} × _INDEX_CONTENT.pdf")
+                                results = dbx.upload_files(uploads)
+                                uploaded_indexes = sum(1 for result in results
+                                                       if result["metadata"] is not None and result["path"].endswith(".pdf"))
+                                for result in results:
+                                    if result["metadata"] is None:
+                                        st.error(t("dbx_upload_error", result["path"]))
                                 
                                 st.success(t("dbx_index_success").format(uploaded_indexes))
                         
@@ -1426,6 +986,14 @@ if use_gemini:
                 key="force_gemini",
                 help=t("gemini_force_help")
             )
+            st.slider(
+                t("gemini_confidence_slider"),
+                min_value=0,
+                max_value=100,
+                value=int(OCR_CONFIDENCE_THRESHOLD),
+                key="ocr_confidence_threshold",
+                help=t("gemini_confidence_help")
+            )
         else:
             st.error(t("gemini_key_invalid"))
             st.session_state['api_key'] = None
@@ -1533,7 +1101,7 @@ if has_input:
              else:
                 st.info(t("mode_local_batch"))
              
-             # Chama a função de lote (ela gerencia seu próprio spinner/progresso)
+             # Envia o lote para a fila de jobs (acompanhamento abaixo)
              process_batch_directory(selected_batch_dir, st.session_state['api_key'], overwrite=force_overwrite)
         
         # 4. Dropbox Batch
@@ -1543,9 +1111,15 @@ if has_input:
              else:
                 st.info(t("mode_local_dropbox"))
              
-             # Passa o path selecionado (pode ser "" para raiz)
-             process_dropbox_batch(dropbox_selected_processing, st.session_state['api_key'], overwrite=force_overwrite)
+             # Passa o path selecionado (pode ser "" para raiz) para a fila de jobs
+             process_dropbox_batch(dropbox_selected_processing, st.session_state['api_key'], overwrite=force_overwrite,
+                                   continuous=st.session_state.get('dbx_continuous', False))
             
+# Fila de Processamento (lotes em segundo plano)
+st.markdown("---")
+st.subheader(t("jobs_subheader"))
+show_jobs_panel()
+
 # 3. Download do Resultado
 if st.session_state['processed_file'] and os.path.exists(st.session_state['processed_file']):
     st.markdown("---")
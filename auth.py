@@ -6,6 +6,7 @@ import sqlite3
 import hmac
 from datetime import datetime
 import streamlit as st
+from cryptography.fernet import Fernet, InvalidToken
 
 def get_msg(key_pt, key_en):
     try:
@@ -18,6 +19,24 @@ def get_msg(key_pt, key_en):
 DB_PATH = os.getenv("USERS_DB_PATH", "users.db")
 ITERATIONS = 600000
 
+# Chave Fernet que cifra as credenciais dos jobs em user_credentials. Sem ela, uma chave é gerada em
+# CREDENTIALS_KEY_PATH (0600, ao lado do banco): protege o banco copiado sozinho, mas não uma cópia do volume
+# inteiro. Defina CREDENTIALS_KEY (ex.: secret do Docker) para manter a chave fora do volume.
+CREDENTIALS_KEY = os.getenv("CREDENTIALS_KEY", "")
+CREDENTIALS_KEY_PATH = os.getenv("CREDENTIALS_KEY_PATH", os.path.join(os.path.dirname(DB_PATH) or ".", "credentials.key"))
+_credentials_cipher = None
+
+def restrict_file_permissions(path: str):
+    """
+    Cria o arquivo (se ainda não existir) legível apenas pelo dono (0600): bancos com senhas e credenciais.
+    Em sistemas sem permissões POSIX (Windows) a falha é ignorada.
+    """
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        os.chmod(path, 0o600)
+    except OSError as e:
+        print(f"Aviso: não foi possível restringir as permissões de {path}: {e}")
+
 def get_db_connection():
     """Retorna uma conexão aberta com o banco de dados SQLite."""
     conn = sqlite3.connect(DB_PATH)
@@ -61,6 +80,7 @@ def init_db():
     Cria a tabela de usuários se ela não existir e cria
     o superusuário padrão 'admin' com a senha 'admin123' se a tabela estiver vazia.
     """
+    restrict_file_permissions(DB_PATH)
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
@@ -75,6 +95,16 @@ def init_db():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # Credenciais usadas pelos jobs em segundo plano (ver save_user_credentials)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_credentials (
+            username TEXT NOT NULL,
+            name TEXT NOT NULL,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (username, name)
+        )
+    ''')
     conn.commit()
     
     # Migração segura para bancos existentes que não possuem a coluna 'needs_password_change'
@@ -186,6 +216,7 @@ def update_user(user_id: int, username: str, is_admin: bool) -> tuple[bool, str]
             "UPDATE users SET username = ?, is_admin = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
             (username, 1 if is_admin else 0, user_id)
         )
+        cursor.execute("UPDATE user_credentials SET username = ? WHERE username = ?", (username, user['username']))
         conn.commit()
         return True, get_msg("Usuário atualizado com sucesso!", "User updated successfully!")
     except sqlite3.IntegrityError:
@@ -270,6 +301,7 @@ def delete_user(user_id: int, current_admin_username: str) -> tuple[bool, str]:
                 return False, get_msg("Não é permitido excluir o único administrador restante.", "It is not allowed to delete the only remaining administrator.")
                 
         cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        cursor.execute("DELETE FROM user_credentials WHERE username = ?", (user['username'],))
         conn.commit()
         return True, get_msg("Usuário excluído com sucesso!", "User deleted successfully!")
     except Exception as e:
@@ -288,3 +320,75 @@ def list_users() -> list[dict]:
     rows = cursor.fetchall()
     conn.close()
     return [dict(row) for row in rows]
+
+def get_credentials_cipher() -> Fernet:
+    """Cifra das credenciais guardadas: CREDENTIALS_KEY ou a chave local, criada na primeira chamada."""
+    global _credentials_cipher
+    if _credentials_cipher is None:
+        key = CREDENTIALS_KEY.encode() if CREDENTIALS_KEY else _load_local_credentials_key()
+        _credentials_cipher = Fernet(key)
+    return _credentials_cipher
+
+def _load_local_credentials_key() -> bytes:
+    try:
+        with open(CREDENTIALS_KEY_PATH, 'rb') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    # Grava em um temporário e publica com link (atômico): o app e os workers podem criar a chave ao mesmo tempo
+    key = Fernet.generate_key()
+    temp_path = f"{CREDENTIALS_KEY_PATH}.{os.getpid()}.tmp"
+    restrict_file_permissions(temp_path)
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(key)
+        os.link(temp_path, CREDENTIALS_KEY_PATH)
+        return key
+    except FileExistsError:
+        with open(CREDENTIALS_KEY_PATH, 'rb') as f:
+            return f.read().strip()
+    finally:
+        os.remove(temp_path)
+
+def save_user_credentials(username: str, **credentials):
+    """
+    Guarda as credenciais do usuário usadas pelos jobs em segundo plano (ex.: gemini_key=..., dropbox_token=...),
+    cifradas com get_credentials_cipher.
+    A fila de jobs não guarda segredos: o worker os obtém pelo dono do job ao executá-lo (get_user_credentials).
+    Valor None apaga a credencial (o worker passa a usar a variável de ambiente correspondente).
+    """
+    conn = get_db_connection()
+    try:
+        for name, value in credentials.items():
+            if value:
+                conn.execute(
+                    "INSERT INTO user_credentials (username, name, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(username, name) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP",
+                    (username, name, get_credentials_cipher().encrypt(value.encode()).decode())
+                )
+            else:
+                conn.execute("DELETE FROM user_credentials WHERE username = ? AND name = ?", (username, name))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_user_credentials(username: str) -> dict:
+    """
+    Credenciais guardadas do usuário ({nome: valor}); dicionário vazio se não houver.
+    Credenciais que não podem ser decifradas (chave trocada) são ignoradas.
+    """
+    conn = get_db_connection()
+    try:
+        rows = conn.execute("SELECT name, value FROM user_credentials WHERE username = ?", (username,)).fetchall()
+    except sqlite3.OperationalError:
+        # Banco ainda sem a tabela (init_db não executado)
+        return {}
+    finally:
+        conn.close()
+    credentials = {}
+    for row in rows:
+        try:
+            credentials[row['name']] = get_credentials_cipher().decrypt(row['value'].encode()).decode()
+        except InvalidToken:
+            print(f"Aviso: credencial '{row['name']}' de {username} não pôde ser decifrada (CREDENTIALS_KEY trocada?).")
+    return credentials
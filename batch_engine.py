@@ -0,0 +1,170 @@
+# batch_engine.py
+
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+# Filas de execução, cada uma com seus processos (ver create_lane_executors): CPU (Tesseract, MarkItDown) e
+# E/S (PDFs enviados inteiros ao Gemini)
+LANE_CPU = "cpu"
+LANE_IO = "io"
+
+# Arquivos convertidos em paralelo na fila de CPU (0 = um por núcleo) e na fila de E/S.
+BATCH_CPU_WORKERS = int(os.getenv("BATCH_CPU_WORKERS", "0"))
+BATCH_IO_WORKERS = int(os.getenv("BATCH_IO_WORKERS", "4"))
+
+# Manifesto incremental gravado na raiz do lote (ver batch_manifest); nunca é convertido.
+BATCH_MANIFEST_NAME = ".pdftomd_manifest.json"
+
+# Cache do índice semântico de cada pasta (ver index_generator); também nunca é convertido.
+INDEX_CACHE_NAME = "_INDEX_CACHE.json"
+INTERNAL_FILE_NAMES = {BATCH_MANIFEST_NAME, INDEX_CACHE_NAME}
+
+
+def resolve_batch_workers(cpu_workers: Optional[int] = None, io_workers: Optional[int] = None) -> tuple:
+    """Retorna (workers_cpu, workers_io): valores explícitos, variáveis de ambiente ou núcleos disponíveis."""
+    if cpu_workers is None or cpu_workers <= 0:
+        cpu_workers = BATCH_CPU_WORKERS if BATCH_CPU_WORKERS > 0 else (os.cpu_count() or 1)
+    if io_workers is None or io_workers <= 0:
+        io_workers = max(1, BATCH_IO_WORKERS)
+    return cpu_workers, io_workers
+
+def ocr_workers_per_file(cpu_workers: int) -> int:
+    """
+    Processos de OCR por arquivo quando `cpu_workers` arquivos são convertidos ao mesmo tempo,
+    para que os pools de Tesseract de cada arquivo não disputem os mesmos núcleos.
+    """
+    if getattr(sys, 'frozen', False):
+        return 1
+    return max(1, (os.cpu_count() or 1) // max(1, cpu_workers))
+
+def _init_conversion_worker(processes: int):
+    """Inicializador dos processos das filas: cada um fica com uma fração do orçamento do Gemini."""
+    from gcv_ocr import set_gemini_rate_limiter_share
+    set_gemini_rate_limiter_share(1 / max(1, processes))
+
+def create_lane_executors(cpu_workers: int, io_workers: int, lanes: Iterable[str] = (LANE_CPU, LANE_IO)) -> dict:
+    """
+    Pools de processos das filas informadas ({LANE_CPU ou LANE_IO: ProcessPoolExecutor}), repassados a
+    engine.convert_file/convert_bytes (executor=): o PyMuPDF e o MarkItDown não liberam o GIL nem são
+    seguros entre threads, e a detecção e a renderização das páginas rodam também nos arquivos da fila de
+    E/S. Os processos de todas as filas dividem o orçamento do Gemini. Dicionário vazio no executável
+    PyInstaller, onde não há interpretador para novos processos (a conversão roda na própria thread).
+    Os processos são iniciados com "spawn": os pools criam processos sob demanda enquanto as threads do
+    lote (downloads, uploads, filas) estão ativas, e um fork nesse momento pode herdar locks já adquiridos.
+    """
+    if getattr(sys, 'frozen', False):
+        return {}
+    workers = {lane: count for lane, count in ((LANE_CPU, cpu_workers), (LANE_IO, io_workers)) if lane in set(lanes)}
+    processes = sum(workers.values())
+    return {lane: ProcessPoolExecutor(max_workers=count, mp_context=multiprocessing.get_context("spawn"),
+                                      initializer=_init_conversion_worker, initargs=(processes,))
+            for lane, count in workers.items()}
+
+def shutdown_lane_executors(executors: dict, cancel_futures: bool = False):
+    """Encerra os pools de create_lane_executors, aguardando as conversões em andamento."""
+    for executor in executors.values():
+        executor.shutdown(cancel_futures=cancel_futures)
+
+def conversion_lane(file_name: str, options) -> str:
+    """
+    Fila de um arquivo (options: engine.ConversionOptions). PDFs enviados inteiros ao Gemini
+    (Forçar Gemini; o Tesseract só roda nas páginas em que o Gemini falhar) são limitados pela API (E/S);
+    o restante (Tesseract, MarkItDown) disputa CPU.
+    """
+    if options.force_gemini and file_name.lower().endswith('.pdf'):
+        return LANE_IO
+    return LANE_CPU
+
+def scan_directory(root_dir: Path, extensions: Iterable[str]) -> List[Path]:
+    """Lista recursivamente (em ordem estável) os arquivos de root_dir com as extensões informadas."""
+    extensions = {ext.lower() for ext in extensions}
+    return sorted(path for path in Path(root_dir).rglob('*')
+                  if path.name not in INTERNAL_FILE_NAMES and path.suffix.lower() in extensions and path.is_file())
+
+def batch_output_path(file_path: Path) -> Path:
+    """Caminho de saída de um arquivo do lote: NomeOriginalMD.md, na mesma pasta."""
+    return file_path.parent / f"{file_path.stem}MD.md"
+
+
+def run_batch(items: list, convert: Callable, lane: Callable = lambda item: LANE_CPU,
+              cpu_workers: Optional[int] = None, io_workers: Optional[int] = None,
+              on_result: Optional[Callable] = None, should_stop: Optional[Callable[[], bool]] = None,
+              thread_initializer: Optional[Callable] = None) -> List[dict]:
+    """
+    Converte os itens nas filas de CPU e E/S, cada uma com seu limite de concorrência. A conversão roda
+    no pool de processos da fila (create_lane_executors), despachada por threads que apenas aguardam o
+    resultado.
+
+    Args:
+        items: Itens do lote (ex.: caminhos de arquivos).
+        convert: convert(item, executor) -> bool, executado na thread da fila; executor é o pool de processos
+            da fila a repassar a engine.convert_file/convert_bytes (None no executável PyInstaller).
+            Exceções são capturadas e contam como falha só daquele item.
+        lane: lane(item) -> LANE_CPU ou LANE_IO, a fila em que o item será executado.
+        on_result: on_result(resultado, concluidos, total), chamado na thread de quem chamou run_batch
+            (seguro para atualizar a interface) à medida que cada item termina.
+        should_stop: Consultado entre conclusões; se retornar True, os itens ainda não iniciados são cancelados.
+        thread_initializer: Executado no início de cada thread de trabalho.
+
+    Returns:
+        Lista de resultados {"item", "lane", "success", "error", "seconds"} na ordem de conclusão.
+        Itens cancelados não aparecem na lista.
+    """
+    cpu_workers, io_workers = resolve_batch_workers(cpu_workers, io_workers)
+    results = []
+    total = len(items)
+    if not total:
+        return results
+
+    def run_item(item, item_lane):
+        started = time.monotonic()
+        try:
+            success, error = bool(convert(item, executors.get(item_lane))), None
+        except Exception as e:
+            print(f"Erro no batch para {item}: {e}")
+            success, error = False, str(e)
+        return {"item": item, "lane": item_lane, "success": success, "error": error,
+                "seconds": time.monotonic() - started}
+
+    executors = create_lane_executors(cpu_workers, io_workers, {lane(item) for item in items})
+    try:
+        with ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="batch-cpu",
+                                initializer=thread_initializer) as cpu_pool, \
+             ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="batch-io",
+                                initializer=thread_initializer) as io_pool:
+            pending = set()
+            try:
+                for item in items:
+                    item_lane = lane(item)
+                    pool = io_pool if item_lane == LANE_IO else cpu_pool
+                    pending.add(pool.submit(run_item, item, item_lane))
+
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.cancelled():
+                            continue
+                        results.append(future.result())
+                        if on_result:
+                            on_result(results[-1], len(results), total)
+
+                    if pending and should_stop and should_stop():
+                        for future in pending:
+                            future.cancel()
+                        # Aguarda apenas os itens já em execução
+                        pending = {future for future in pending if not future.cancelled()}
+            except BaseException:
+                # Interrupção de quem chamou (ex.: rerun do Streamlit, Ctrl+C): não inicia os itens restantes
+                for future in pending:
+                    future.cancel()
+                raise
+    finally:
+        # Depois dos pools de threads: nenhum item ainda aguarda um processo
+        shutdown_lane_executors(executors, cancel_futures=True)
+
+    return results
@@ -0,0 +1,213 @@
+# batch_manifest.py
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from batch_engine import BATCH_MANIFEST_NAME
+from conversion_cache import hash_file
+
+# Manifesto incremental de um lote: fica na raiz da pasta e registra, para cada arquivo de origem
+# (caminho relativo à raiz), o tamanho, o mtime, o hash do conteúdo, a assinatura do pipeline ("engine")
+# e o hash do Markdown gerado. Em uma nova execução, apenas arquivos novos ou alterados são convertidos:
+# tamanho + mtime iguais pulam o arquivo sem lê-lo; se só o mtime mudou, o hash confirma o conteúdo.
+# A assinatura do pipeline fica registrada para auditoria: mudar as opções não reconverte o lote (use Sobrescrever).
+MANIFEST_NAME = BATCH_MANIFEST_NAME
+MANIFEST_VERSION = 1
+
+
+def engine_signature(options) -> str:
+    """Assinatura curta das configurações do pipeline que afetam a saída (options: engine.ConversionOptions)."""
+    payload = json.dumps(options.cache_settings(), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def fingerprint_file(path: Path) -> dict:
+    """Tamanho, mtime (ns) e hash do conteúdo de um arquivo de origem, lidos antes da conversão."""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": hash_file(str(path))}
+
+
+def fingerprint_files(files: Iterable[Path]) -> dict:
+    """{arquivo: fingerprint_file(arquivo)} (None se não puder ser lido), para plan(fingerprints=...)."""
+    fingerprints = {}
+    for path in files:
+        try:
+            fingerprints[Path(path)] = fingerprint_file(Path(path))
+        except OSError:
+            fingerprints[Path(path)] = None
+    return fingerprints
+
+def hash_output(output: Path) -> Optional[str]:
+    """Hash do Markdown gerado (None se não puder ser lido), para record(output_hash=...)."""
+    try:
+        return hash_file(str(output))
+    except OSError:
+        return None
+
+
+class BatchManifest:
+    """
+    Manifesto de um lote em <raiz>/.pdftomd_manifest.json. Não é thread-safe: plan(), record() e save()
+    devem ser chamados na thread de quem executa o lote (ex.: no on_result de batch_engine.run_batch).
+    Quem compartilha o manifesto entre threads (folder_watcher) lê os arquivos fora do próprio lock:
+    stale_files() + fingerprint_files() antes de plan(), pop_deleted() + remove_outputs() no lugar de
+    remove_deleted() e hash_output() antes de record().
+    """
+
+    def __init__(self, root_dir):
+        self.root = Path(root_dir).resolve()
+        self.path = self.root / MANIFEST_NAME
+        self.entries = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("files", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # Manifesto corrompido: recomeça (as saídas existentes são readotadas em plan())
+            print(f"Aviso: manifesto inválido em {self.path}, ignorando: {e}")
+
+    def save(self):
+        """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+        tmp_path = self.path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": MANIFEST_VERSION, "files": self.entries}, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Aviso: falha ao gravar o manifesto {self.path}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    def _key(self, source: Path) -> str:
+        return Path(source).resolve().relative_to(self.root).as_posix()
+
+    def _output_key(self, output: Path) -> str:
+        return Path(os.path.relpath(Path(output).resolve(), self.root)).as_posix()
+
+    def stale_files(self, files: Iterable[Path], output_path: Callable[[Path], Path], overwrite: bool = False) -> list:
+        """Arquivos cujo conteúdo plan() precisa ler (saída existente e tamanho/mtime diferentes do registro). Só stat."""
+        stale = []
+        for path in files:
+            path = Path(path)
+            if overwrite or not Path(output_path(path)).exists():
+                continue
+            entry = self.entries.get(self._key(path))
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if not (entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns):
+                stale.append(path)
+        return stale
+
+    def plan(self, files: Iterable[Path], output_path: Callable[[Path], Path], overwrite: bool = False,
+             fingerprints: Optional[dict] = None, output_hashes: Optional[dict] = None) -> tuple:
+        """
+        Separa os arquivos em (a_converter, pulados).
+
+        - overwrite ou saída inexistente: converte;
+        - arquivo registrado com mesmo tamanho e mtime: pula sem ler;
+        - mtime/tamanho diferentes: compara o hash (arquivo só "tocado" é pulado e o registro atualizado);
+        - arquivo sem registro com saída já existente (lotes anteriores ao manifesto): é adotado e pulado.
+
+        Com fingerprints (ver fingerprint_files) e output_hashes ({saída: hash_output(saída)}), nenhum arquivo
+        é lido: os hashes vêm dos dicionários e arquivos que precisariam ser lidos e não estão neles são convertidos.
+        """
+        to_convert, skipped = [], []
+        for path in files:
+            path = Path(path)
+            output = Path(output_path(path))
+            if overwrite or not output.exists():
+                to_convert.append(path)
+                continue
+
+            key = self._key(path)
+            entry = self.entries.get(key)
+            try:
+                stat = path.stat()
+                if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+                    skipped.append(path)
+                    continue
+                fingerprint = fingerprint_file(path) if fingerprints is None else fingerprints.get(path)
+            except OSError:
+                fingerprint = None
+            if fingerprint is None:
+                to_convert.append(path)
+                continue
+
+            if entry and entry.get("hash") != fingerprint["hash"]:
+                to_convert.append(path)
+                continue
+
+            if entry:
+                entry.update(fingerprint)
+            else:
+                self.record(path, fingerprint, output, engine=None,
+                            output_hash=output_hashes.get(output) if output_hashes is not None else None)
+            skipped.append(path)
+        return to_convert, skipped
+
+    def record(self, source: Path, fingerprint: dict, output: Path, engine: Optional[str],
+               output_hash: Optional[str] = None):
+        """
+        Registra uma conversão concluída (fingerprint: ver fingerprint_file, tirado antes da conversão).
+        output_hash: hash_output(output), se já calculado; senão a saída é lida aqui.
+        """
+        if output_hash is None:
+            output_hash = hash_output(output)
+        self.entries[self._key(source)] = {
+            **fingerprint,
+            "engine": engine,
+            "output": self._output_key(output),
+            "output_hash": output_hash,
+            "updated_at": time.time(),
+        }
+
+    def remove_deleted(self, present: Iterable[Path]) -> list:
+        """
+        Remove do manifesto os arquivos que não existem mais (present: arquivos encontrados na varredura)
+        e apaga suas saídas, desde que o Markdown não tenha sido editado desde a conversão.
+        Retorna [(origem, saída apagada)].
+        """
+        return self.remove_outputs(self.pop_deleted(present))
+
+    def pop_deleted(self, present: Iterable[Path], under: Optional[Path] = None) -> list:
+        """
+        Primeira etapa de remove_deleted(): tira do manifesto as origens apagadas. Retorna [(chave, registro)].
+        Com under (arquivo ou pasta apagada, ex.: evento do monitor), só as origens nele são verificadas.
+        """
+        present_keys = {self._key(path) for path in present}
+        candidates = self.entries
+        if under is not None:
+            prefix = self._key(under)
+            candidates = [key for key in self.entries if key == prefix or key.startswith(prefix + "/")]
+        return [(key, self.entries.pop(key)) for key in [key for key in candidates if key not in present_keys]
+                if not (self.root / key).exists()]
+
+    def remove_outputs(self, deleted: list) -> list:
+        """Segunda etapa de remove_deleted(): apaga as saídas não editadas (não acessa o manifesto)."""
+        removed = []
+        for key, entry in deleted:
+            output = self.root / entry.get("output", "")
+            if not entry.get("output") or not output.is_file():
+                continue
+            try:
+                if entry.get("output_hash") and hash_file(str(output)) == entry["output_hash"]:
+                    output.unlink()
+                    removed.append((self.root / key, output))
+                else:
+                    print(f"Aviso: saída de {key} foi editada após a conversão; mantida em {output}.")
+            except OSError as e:
+                print(f"Aviso: falha ao remover a saída órfã {output}: {e}")
+        return removed
@@ -0,0 +1,87 @@
+# bench_rasterizer.py
+#
+# Compara os backends de renderização de páginas (PyMuPDF em processo x Poppler/pdf2image)
+# em páginas por segundo e pico de memória (RSS). Cada backend roda em um subprocesso
+# separado para que o pico de memória de um não contamine a medição do outro.
+#
+# Uso:
+#   python bench_rasterizer.py documento.pdf [--pages 20] [--dpi 300] [--color gray|rgb|bilevel]
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+
+def _peak_rss_mb(who) -> float:
+    """Pico de RSS em MB (ru_maxrss é KB no Linux e bytes no macOS)."""
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_child(pdf_path: str, backend: str, pages: int, dpi: int, color_mode: str):
+    """Executado no subprocesso: renderiza as páginas com um backend e imprime as métricas em JSON."""
+    from gcv_ocr import iter_pdf_pages, get_pdf_page_count
+
+    total_pages = min(pages, get_pdf_page_count(pdf_path, backend=backend))
+    if total_pages == 0:
+        # Backend indisponível (ex.: Poppler não instalado): o processo pai reporta a falha
+        sys.exit(f"nenhuma página renderizada com o backend {backend}")
+    started = time.perf_counter()
+    rendered = 0
+    for _, img in iter_pdf_pages(pdf_path, page_numbers=range(1, total_pages + 1), dpi=dpi,
+                                 backend=backend, color_mode=color_mode):
+        # Força o acesso aos pixels, como o OCR faria
+        img.getpixel((0, 0))
+        rendered += 1
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        "backend": backend,
+        "pages": rendered,
+        "seconds": elapsed,
+        "pages_per_second": rendered / elapsed if elapsed else 0.0,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF) if resource else float('nan'),
+        # O Poppler renderiza em subprocessos (pdftoppm): o pico deles conta à parte
+        "peak_children_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else float('nan'),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de renderização de PDF (PyMuPDF x Poppler).")
+    parser.add_argument("pdf_path")
+    parser.add_argument("--pages", type=int, default=20, help="Máximo de páginas renderizadas por backend.")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--color", default="gray", choices=["gray", "rgb", "bilevel"])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.pdf_path, args.child, args.pages, args.dpi, args.color)
+        return
+
+    print(f"Benchmark de renderização: {os.path.basename(args.pdf_path)} | até {args.pages} páginas | {args.dpi} DPI | {args.color}")
+    print(f"{'Backend':<10} {'Páginas':>8} {'Tempo (s)':>10} {'Pág/s':>8} {'Pico RSS (MB)':>14} {'Pico filhos (MB)':>17}")
+    for backend in ("pymupdf", "poppler"):
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), args.pdf_path, "--pages", str(args.pages),
+             "--dpi", str(args.dpi), "--color", args.color, "--child", backend],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        metrics_line = next((line for line in reversed(result.stdout.splitlines()) if line.startswith("{")), None)
+        if result.returncode != 0 or metrics_line is None:
+            print(f"{backend:<10} falhou: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'sem saída'}")
+            continue
+        m = json.loads(metrics_line)
+        print(f"{m['backend']:<10} {m['pages']:>8} {m['seconds']:>10.2f} {m['pages_per_second']:>8.2f} "
+              f"{m['peak_rss_mb']:>14.1f} {m['peak_children_rss_mb']:>17.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# cli.py
+#
+# Interface de linha de comando (sem Streamlit) para o pipeline de conversão, para uso em cron,
+# agendadores e scripts. Executa o mesmo roteamento da interface (engine.convert_file).
+#
+# Uso:
+#   python cli.py convert documentos/ "arquivos/**/*.pdf" contrato.docx [--cpu-workers 4] [--io-workers 4]
+#                 [--output-dir saida/] [--overwrite] [--gemini-key CHAVE] [--force-gemini] [--confidence 70]
+#   python cli.py watch documentos/ [--debounce 2] [--polling] [--cpu-workers 2] [--io-workers 4]
+#   python cli.py worker [--once]
+#
+# Diretórios são incrementais: o manifesto .pdftomd_manifest.json na raiz (ver batch_manifest) faz com que
+# apenas arquivos novos ou alterados sejam convertidos e remove as saídas de arquivos apagados.
+#
+# Cada arquivo gera uma linha JSON em stdout ({"input", "output", "status", "error", "seconds", "messages"});
+# os logs do pipeline vão para stderr. Códigos de saída: 0 = sucesso, 1 = algum arquivo falhou,
+# 2 = argumentos inválidos ou nenhum arquivo encontrado, 130 = interrompido.
+
+import os
+import sys
+import glob
+import json
+import signal
+import argparse
+import contextlib
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+# Avisos impressos na importação das bibliotecas (ex.: PyMuPDF) não podem misturar-se ao JSON de stdout
+with contextlib.redirect_stdout(sys.stderr):
+    from engine import SUPPORTED_EXTENSIONS, EVENT_ERROR, ConversionOptions, convert_file
+    from batch_engine import batch_output_path, conversion_lane, ocr_workers_per_file, resolve_batch_workers, run_batch, scan_directory
+    from batch_manifest import BatchManifest, engine_signature, fingerprint_file
+    from translations import translate
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+STATUS_CONVERTED = "converted"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_REMOVED = "removed"
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[tuple]:
+    """
+    Expande arquivos, globs e diretórios (recursivo) em [(arquivo, raiz)], sem repetições.
+    A raiz é a pasta de referência para preservar a estrutura relativa em --output-dir.
+    Diretórios e globs incluem apenas extensões suportadas; arquivos explícitos são mantidos como estão.
+    """
+    expanded = []
+    seen = set()
+
+    def add(path: Path, root: Path):
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            expanded.append((path, root))
+
+    for raw in inputs:
+        path = Path(raw)
+        if path.is_dir():
+            for file_path in scan_directory(path, SUPPORTED_EXTENSIONS):
+                add(file_path, path)
+        elif path.is_file():
+            add(path, path.parent)
+        else:
+            for match in sorted(glob.glob(raw, recursive=True)):
+                match_path = Path(match)
+                if match_path.is_file() and match_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                    add(match_path, match_path.parent)
+    return expanded
+
+def resolve_output_path(file_path: Path, root: Path, output_dir: Optional[str] = None) -> Path:
+    """NomeOriginalMD.md ao lado do original ou, com output_dir, na mesma estrutura relativa dentro dele."""
+    if output_dir is None:
+        return batch_output_path(file_path)
+    return Path(output_dir) / batch_output_path(file_path.relative_to(root))
+
+def convert_paths(inputs: Iterable[str], options: Optional[ConversionOptions] = None, output_dir: Optional[str] = None,
+                  overwrite: bool = False, cpu_workers: Optional[int] = None, io_workers: Optional[int] = None,
+                  lang: str = 'pt', on_result: Optional[Callable[[dict], None]] = None) -> List[dict]:
+    """
+    API importável: converte arquivos, globs e diretórios em paralelo (ver batch_engine.run_batch),
+    com as opções de conversão informadas (ver engine.ConversionOptions).
+
+    Returns:
+        Um resultado por arquivo, na ordem de conclusão:
+        {"input", "output", "status" ('converted' | 'skipped' | 'failed' | 'removed'), "error", "seconds", "messages"}.
+        on_result(resultado) é chamado assim que cada arquivo termina (inclusive os pulados).
+        'removed' indica a saída apagada de um arquivo que deixou de existir em um diretório de entrada.
+    """
+    inputs = list(inputs)
+    results = []
+
+    def emit(result: dict):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    def instant_result(file_path: Path, output_path: Path, status: str = STATUS_SKIPPED) -> dict:
+        return {"input": str(file_path), "output": str(output_path), "status": status,
+                "error": None, "seconds": 0.0, "messages": []}
+
+    # Diretórios de entrada usam o manifesto incremental da própria raiz
+    manifests = {Path(raw).resolve(): BatchManifest(raw) for raw in inputs if Path(raw).is_dir()}
+    manifest_items = {root: [] for root in manifests}
+    manifest_of = {}
+
+    pending = []
+    for file_path, root in expand_inputs(inputs):
+        output_path = resolve_output_path(file_path, root, output_dir)
+        if root.resolve() in manifests:
+            manifest_items[root.resolve()].append((file_path, output_path))
+        elif output_path.exists() and not overwrite:
+            emit(instant_result(file_path, output_path))
+        else:
+            pending.append((file_path, output_path))
+
+    for root, items in manifest_items.items():
+        manifest = manifests[root]
+        for source, removed_output in manifest.remove_deleted([file_path for file_path, _ in items]):
+            emit(instant_result(source, removed_output, STATUS_REMOVED))
+        outputs = dict(items)
+        to_convert, skipped = manifest.plan(outputs, outputs.get, overwrite=overwrite)
+        for file_path in skipped:
+            emit(instant_result(file_path, outputs[file_path]))
+        for file_path in to_convert:
+            manifest_of[file_path] = manifest
+            pending.append((file_path, outputs[file_path]))
+        manifest.save()
+
+    cpu_workers, io_workers = resolve_batch_workers(cpu_workers, io_workers)
+    options = ConversionOptions.from_dict(options.to_dict() if options else {})
+    if options.ocr_workers is None:
+        options.ocr_workers = ocr_workers_per_file(cpu_workers)
+    signature = engine_signature(options)
+    messages = {}
+    fingerprints = {}
+
+    def convert(item, executor) -> bool:
+        file_path, output_path = item
+        file_messages = messages.setdefault(str(file_path), [])
+
+        def on_event(level, key, *args):
+            message = translate(key, lang, *args)
+            print(f"{file_path.name} | {message}")
+            file_messages.append({"level": level, "message": message})
+
+        if file_path in manifest_of:
+            fingerprints[file_path] = fingerprint_file(file_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        return convert_file(str(file_path), str(output_path), options, on_event=on_event, executor=executor)
+
+    def on_batch_result(batch_result: dict, done: int, total: int):
+        file_path, output_path = batch_result["item"]
+        file_messages = messages.get(str(file_path), [])
+        error = batch_result["error"]
+        if batch_result["success"] and file_path in fingerprints:
+            manifest_of[file_path].record(file_path, fingerprints.pop(file_path), output_path, engine=signature)
+        if not batch_result["success"] and error is None:
+            error = "; ".join(m["message"] for m in file_messages if m["level"] == EVENT_ERROR) or None
+        emit({"input": str(file_path), "output": str(output_path),
+              "status": STATUS_CONVERTED if batch_result["success"] else STATUS_FAILED,
+              "error": error, "seconds": round(batch_result["seconds"], 3), "messages": file_messages})
+
+    try:
+        run_batch(pending, convert, lane=lambda item: conversion_lane(item[0].name, options),
+                  cpu_workers=cpu_workers, io_workers=io_workers, on_result=on_batch_result)
+    finally:
+        for manifest in manifests.values():
+            manifest.save()
+    return results
+
+
+def _options_from_args(args) -> Optional[ConversionOptions]:
+    """Opções de conversão dos argumentos; None (com a mensagem de erro em stderr) se forem inválidas."""
+    gemini_key = args.gemini_key or os.getenv("GOOGLE_GEMINI_API_KEY") or None
+    if args.force_gemini and not gemini_key:
+        print("Erro: --force-gemini requer uma chave Gemini (--gemini-key ou GOOGLE_GEMINI_API_KEY).", file=sys.stderr)
+        return None
+    return ConversionOptions(gemini_key, force_gemini=args.force_gemini, confidence_threshold=args.confidence)
+
+def _json_stdout():
+    """
+    Reserva stdout para o JSON: tudo o que o pipeline (e seus subprocessos) imprime passa a ir para stderr.
+    Retorna (arquivo do JSON, write_result(resultado)).
+    """
+    sys.stdout.flush()
+    json_out = os.fdopen(os.dup(1), 'w', encoding='utf-8', buffering=1)
+    os.dup2(2, 1)
+
+    def write_result(result: dict):
+        json_out.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    return json_out, write_result
+
+def _cmd_convert(args) -> int:
+    options = _options_from_args(args)
+    if options is None:
+        return EXIT_USAGE
+
+    json_out, write_result = _json_stdout()
+    try:
+        results = convert_paths(
+            args.inputs, options, output_dir=args.output_dir, overwrite=args.overwrite,
+            cpu_workers=args.cpu_workers, io_workers=args.io_workers, lang=args.lang, on_result=write_result,
+        )
+    finally:
+        json_out.flush()
+
+    if not results:
+        print("Erro: nenhum arquivo suportado encontrado nas entradas informadas.", file=sys.stderr)
+        return EXIT_USAGE
+
+    counts = {status: sum(1 for r in results if r["status"] == status)
+              for status in (STATUS_CONVERTED, STATUS_SKIPPED, STATUS_FAILED, STATUS_REMOVED)}
+    print(f"Concluído: {counts[STATUS_CONVERTED]} convertidos, {counts[STATUS_SKIPPED]} pulados, "
+          f"{counts[STATUS_FAILED]} com erro, {counts[STATUS_REMOVED]} saídas removidas.", file=sys.stderr)
+    return EXIT_FAILURES if counts[STATUS_FAILED] else EXIT_OK
+
+def _cmd_watch(args) -> int:
+    options = _options_from_args(args)
+    if options is None:
+        return EXIT_USAGE
+    invalid = [raw for raw in args.folders if not Path(raw).is_dir()]
+    if invalid:
+        print(f"Erro: pastas inválidas: {', '.join(invalid)}", file=sys.stderr)
+        return EXIT_USAGE
+
+    from folder_watcher import FolderWatcher, WATCH_DEBOUNCE_SECONDS
+
+    # SIGTERM (docker stop, systemd) encerra como Ctrl+C: conversões em andamento terminam e o manifesto é salvo
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    json_out, write_result = _json_stdout()
+    watcher = FolderWatcher(args.folders, options, cpu_workers=args.cpu_workers, io_workers=args.io_workers,
+                            debounce=WATCH_DEBOUNCE_SECONDS if args.debounce is None else args.debounce, polling=args.polling, lang=args.lang, on_result=write_result)
+    try:
+        watcher.run_forever()
+    finally:
+        json_out.flush()
+    return EXIT_OK
+
+def _cmd_worker(args) -> int:
+    from job_worker import run_worker
+    run_worker(poll_interval=args.poll, idle_exit=args.idle_exit, once=args.once)
+    return EXIT_OK
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Conversão de documentos para Markdown sem interface (PDFtoMD).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_conversion_arguments(subparser):
+        subparser.add_argument("--gemini-key", help="Chave Gemini (padrão: GOOGLE_GEMINI_API_KEY). Sem chave, OCR 100%% local.")
+        subparser.add_argument("--force-gemini", action="store_true", help="Envia todas as páginas escaneadas ao Gemini.")
+        subparser.add_argument("--confidence", type=float, default=None,
+                               help="Confiança mínima do Tesseract (0-100) antes de reenviar a página ao Gemini.")
+        subparser.add_argument("--cpu-workers", type=int, default=None, help="Arquivos em paralelo com Tesseract/MarkItDown (padrão: BATCH_CPU_WORKERS).")
+        subparser.add_argument("--io-workers", type=int, default=None, help="Arquivos em paralelo enviados ao Gemini (padrão: BATCH_IO_WORKERS).")
+        subparser.add_argument("--lang", choices=["pt", "en"], default="pt", help="Idioma das mensagens no JSON.")
+
+    convert = subparsers.add_parser("convert", help="Converte arquivos, globs ou diretórios.")
+    convert.add_argument("inputs", nargs="+", help="Arquivos, globs (ex.: 'pasta/**/*.pdf') ou diretórios (recursivo).")
+    convert.add_argument("--output-dir", help="Pasta de saída (padrão: NomeOriginalMD.md ao lado de cada arquivo).")
+    convert.add_argument("--overwrite", action="store_true", help="Refaz arquivos cuja saída já existe.")
+    add_conversion_arguments(convert)
+    convert.set_defaults(func=_cmd_convert)
+
+    watch = subparsers.add_parser("watch", help="Monitora pastas e converte documentos novos ou alterados.")
+    watch.add_argument("folders", nargs="+", help="Pastas monitoradas (recursivo); o MD.md é salvo ao lado de cada arquivo.")
+    watch.add_argument("--debounce", type=float, default=None,
+                       help="Segundos sem alterações antes de converter um arquivo (padrão: WATCH_DEBOUNCE_SECONDS).")
+    watch.add_argument("--polling", action="store_true", help="Consulta periódica em vez de eventos do sistema (compartilhamentos de rede).")
+    add_conversion_arguments(watch)
+    watch.set_defaults(func=_cmd_watch)
+
+    worker = subparsers.add_parser("worker", help="Consome a fila de jobs enviados pela interface.")
+    worker.add_argument("--once", action="store_true", help="Processa os jobs pendentes e sai.")
+    worker.add_argument("--poll", type=float, default=2.0, help="Intervalo (s) entre consultas à fila.")
+    worker.add_argument("--idle-exit", type=float, default=0, help="Sai após N segundos sem jobs (0 = nunca).")
+    worker.set_defaults(func=_cmd_worker)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        print("Interrompido.", file=sys.stderr)
+        return EXIT_INTERRUPTED
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+# conversion_cache.py
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Optional
+
+# O cache fica ao lado do banco de usuários (volume persistente no Docker), salvo indicação contrária.
+_DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.getenv("USERS_DB_PATH", "users.db")) or ".", "conversion_cache")
+CONVERSION_CACHE_DIR = os.getenv("CONVERSION_CACHE_DIR", _DEFAULT_CACHE_DIR)
+
+# Tamanho máximo do cache em MB (0 = cache desativado).
+CONVERSION_CACHE_MAX_MB = int(os.getenv("CONVERSION_CACHE_MAX_MB", "2048"))
+
+# Máximo de páginas no cache de OCR por página (0 = cache de páginas desativado).
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "200000"))
+
+# Marcadores de páginas com falha: resultados com erro não são armazenados para não "congelar" a falha.
+_ERROR_MARKERS = ("# ERRO DE API NA PÁGINA", "# ERRO DE EXTRAÇÃO NA PÁGINA")
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Retorna o SHA-256 do conteúdo do arquivo, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def package_version(name: str) -> str:
+    """Versão instalada de um pacote (entra na chave do cache), ou 'unknown'."""
+    try:
+        return metadata.version(name)
+    except Exception:
+        return "unknown"
+
+def hash_page_image(img) -> str:
+    """
+    Hash exato de uma página renderizada (modo, dimensões e pixels). Páginas idênticas
+    (capas, certidões, procurações repetidas) renderizadas no mesmo DPI geram o mesmo hash.
+    """
+    digest = hashlib.sha256(f"{img.mode}:{img.width}x{img.height}:".encode('ascii'))
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+def make_cache_key(content_hash: str, settings: dict) -> str:
+    """Chave do cache: hash do conteúdo do arquivo + configurações do pipeline que afetam a saída."""
+    payload = content_hash + json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _contains_error_markers(path: str) -> bool:
+    with open(path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+        for line in f:
+            if line.startswith(_ERROR_MARKERS):
+                return True
+    return False
+
+
+class ConversionCache:
+    """
+    Cache persistente de conversões (Markdown final) endereçado por conteúdo.
+    Os arquivos ficam em <cache_dir>/<2 primeiros caracteres>/<chave>.md e o índice em SQLite,
+    com remoção LRU (último acesso) quando o tamanho total passa de max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = CONVERSION_CACHE_DIR, max_bytes: int = CONVERSION_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(self.cache_dir / "index.db")
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    source_name TEXT,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _blob_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.md"
+
+    def _bump_stat(self, conn, name: str):
+        conn.execute("INSERT INTO stats (name, value) VALUES (?, 1) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def get(self, key: str, dest_path: str) -> bool:
+        """Copia o Markdown em cache para dest_path. Retorna True em caso de acerto."""
+        blob = self._blob_path(key)
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT key FROM entries WHERE key = ?", (key,)).fetchone()
+            if row and blob.exists():
+                Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(blob, dest_path)
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._bump_stat(conn, "hits")
+                conn.commit()
+                return True
+
+            if row:
+                # Entrada órfã (arquivo removido externamente)
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._bump_stat(conn, "misses")
+            conn.commit()
+            return False
+        finally:
+            conn.close()
+
+    def put(self, key: str, src_path: str, source_name: Optional[str] = None) -> bool:
+        """Armazena o Markdown gerado em src_path sob a chave informada e aplica a remoção LRU."""
+        size = os.path.getsize(src_path)
+        if size > self.max_bytes or _contains_error_markers(src_path):
+            return False
+
+        blob = self._blob_path(key)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # Escrita atômica: copia para um temporário no mesmo diretório e renomeia
+        fd, tmp_path = tempfile.mkstemp(dir=str(blob.parent), suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, blob)
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, size, source_name, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, size, source_name, now, now)
+            )
+            conn.commit()
+            self._evict(conn)
+        finally:
+            conn.close()
+        return True
+
+    def _evict(self, conn):
+        """Remove as entradas menos usadas recentemente até o cache caber em max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                self._blob_path(row["key"]).unlink()
+            except FileNotFoundError:
+                pass
+            conn.execute("DELETE FROM entries WHERE key = ?", (row["key"],))
+            self._bump_stat(conn, "evictions")
+            total -= row["size"]
+        conn.commit()
+
+    def stats(self) -> dict:
+        """Retorna estatísticas do cache: acertos, falhas, remoções, entradas e tamanho em bytes."""
+        conn = self._connect()
+        try:
+            counters = {row["name"]: row["value"] for row in conn.execute("SELECT name, value FROM stats")}
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        finally:
+            conn.close()
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class PageCache:
+    """
+    Cache persistente do OCR por página, chaveado pelo hash da imagem renderizada + motor
+    (ex.: 'tesseract:por', 'gemini:gemini-2.5-flash'). Guarda apenas texto, em SQLite,
+    com remoção LRU quando o número de páginas passa de max_entries.
+    Seguro entre threads e processos (cada operação abre sua própria conexão).
+    """
+
+    # Frequência (em gravações) da verificação de limite de entradas
+    EVICT_EVERY = 500
+
+    def __init__(self, cache_dir: str = CONVERSION_CACHE_DIR, max_entries: int = PAGE_CACHE_MAX_ENTRIES):
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.db_path = str(Path(cache_dir) / "pages.db")
+        self.max_entries = max_entries
+        self._puts = 0
+        self._lock = threading.Lock()
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    image_hash TEXT NOT NULL,
+                    engine TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    confidence REAL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (image_hash, engine)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, image_hash: str, engine: str) -> Optional[tuple]:
+        """Retorna (texto, confiança) da página em cache para o motor informado, ou None."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT text, confidence FROM pages WHERE image_hash = ? AND engine = ?",
+                               (image_hash, engine)).fetchone()
+            if row:
+                conn.execute("UPDATE pages SET last_access = ? WHERE image_hash = ? AND engine = ?",
+                             (time.time(), image_hash, engine))
+                conn.commit()
+            return (row[0], row[1]) if row else None
+        finally:
+            conn.close()
+
+    def put(self, image_hash: str, engine: str, text: str, confidence: Optional[float] = None):
+        """Armazena o resultado do OCR de uma página."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (image_hash, engine, text, confidence, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (image_hash, engine, text, confidence, now, now)
+            )
+            conn.commit()
+            with self._lock:
+                self._puts += 1
+                should_evict = self._puts % self.EVICT_EVERY == 0
+            if should_evict:
+                self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        excess = total - self.max_entries
+        if excess > 0:
+            conn.execute("DELETE FROM pages WHERE rowid IN "
+                         "(SELECT rowid FROM pages ORDER BY last_access ASC LIMIT ?)", (excess,))
+            conn.commit()
+
+
+_conversion_cache = None
+_conversion_cache_lock = threading.Lock()
+_page_cache = None
+
+def get_conversion_cache() -> Optional[ConversionCache]:
+    """Retorna o cache de conversões do processo, ou None se desativado (CONVERSION_CACHE_MAX_MB=0)."""
+    global _conversion_cache
+    if CONVERSION_CACHE_MAX_MB <= 0:
+        return None
+    with _conversion_cache_lock:
+        if _conversion_cache is None:
+            try:
+                _conversion_cache = ConversionCache()
+            except Exception as e:
+                print(f"Aviso: cache de conversões indisponível ({e}).")
+                return None
+        return _conversion_cache
+
+def get_page_cache() -> Optional[PageCache]:
+    """Retorna o cache de OCR por página do processo, ou None se desativado (PAGE_CACHE_MAX_ENTRIES=0)."""
+    global _page_cache
+    if PAGE_CACHE_MAX_ENTRIES <= 0:
+        return None
+    with _conversion_cache_lock:
+        if _page_cache is None:
+            try:
+                _page_cache = PageCache()
+            except Exception as e:
+                print(f"Aviso: cache de páginas indisponível ({e}).")
+                return None
+        return _page_cache
@@ -0,0 +1,143 @@
+# dropbox_browser.py
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from dropbox.exceptions import AuthError
+
+from dropbox_handler import DropboxHandler
+from translations import translate
+
+# Navegação de pastas do Dropbox na interface. Um DropboxBrowser vive na sessão do Streamlit (um por token):
+# a validação da conta e as listagens de subpastas ficam em cache, e as subpastas da pasta exibida são
+# listadas em segundo plano, de modo que abrir uma delas não espera pela API.
+
+# Validade (s) das listagens de subpastas em cache
+DROPBOX_BROWSER_TTL = float(os.getenv("DROPBOX_BROWSER_TTL", "60"))
+
+# Validade (s) da validação do token (users_get_current_account) em cache
+DROPBOX_ACCOUNT_TTL = float(os.getenv("DROPBOX_ACCOUNT_TTL", "600"))
+
+# Listagens simultâneas em segundo plano (0 = sem pré-carregamento)
+DROPBOX_PREFETCH_WORKERS = int(os.getenv("DROPBOX_PREFETCH_WORKERS", "4"))
+
+
+class DropboxBrowser:
+    """
+    Cliente Dropbox da sessão com cache para a navegação. `handler` é o DropboxHandler compartilhado,
+    usado também pelas demais ações da aba (índice, upload). As threads de pré-carregamento não acessam
+    o Streamlit. A falha da última listagem pedida pela interface fica em `last_error`.
+    """
+
+    def __init__(self, access_token: str, lang: str = 'pt', ttl: float = DROPBOX_BROWSER_TTL,
+                 prefetch_workers: int = DROPBOX_PREFETCH_WORKERS):
+        self.access_token = access_token
+        self.lang = lang
+        self.ttl = ttl
+        self.handler = DropboxHandler(access_token, lang=lang)
+        self.last_error = None
+        self._connection = None      # (instante, status, mensagem)
+        self._listings = {}          # pasta (minúsculas) -> (instante, [FolderMetadata])
+        self._loading = {}           # pasta (minúsculas) -> Future do pré-carregamento
+        self._lock = threading.Lock()
+        self._pool = (ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="dbx-prefetch")
+                      if prefetch_workers > 0 else None)
+
+    def matches(self, access_token: str, lang: str) -> bool:
+        """Se este navegador serve para o token e idioma atuais da sessão."""
+        return self.access_token == access_token and self.lang == lang
+
+    def check_connection(self) -> tuple:
+        """check_connection() do handler, reaproveitado por DROPBOX_ACCOUNT_TTL (falhas não ficam em cache)."""
+        cached = self._connection
+        if cached and time.monotonic() - cached[0] < DROPBOX_ACCOUNT_TTL:
+            return cached[1], cached[2]
+        status, msg = self.handler.check_connection()
+        self._connection = (time.monotonic(), status, msg) if status else None
+        return status, msg
+
+    def list_subfolders(self, folder_path: str) -> list:
+        """
+        Subpastas diretas (do cache, se ainda válido; aguarda um pré-carregamento em andamento) e agenda
+        o pré-carregamento das subpastas de cada uma delas. Em erro retorna [] e preenche last_error.
+        """
+        self.last_error = None
+        key = self._key(folder_path)
+        folders = self._cached(key)
+        if folders is None:
+            with self._lock:
+                future = self._loading.get(key)
+            if future is not None:
+                try:
+                    future.result()
+                except Exception:
+                    # Falha do pré-carregamento não fica em cache: a listagem abaixo tenta de novo
+                    pass
+                folders = self._cached(key)
+        if folders is None:
+            try:
+                folders = self._fetch(folder_path)
+            except AuthError:
+                self.last_error = translate("dbx_auth_error", self.lang)
+            except Exception as e:
+                self.last_error = translate("dbx_list_error", self.lang, e)
+            if self.last_error:
+                print(f"Erro ao listar pastas de {folder_path or '/'}: {self.last_error}")
+                return []
+        for folder in folders:
+            self._prefetch(folder.path_display)
+        return folders
+
+    def invalidate(self, folder_path: Optional[str] = None):
+        """Descarta a listagem de uma pasta (ou todas), para a próxima consulta ir à API."""
+        with self._lock:
+            if folder_path is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(self._key(folder_path), None)
+
+    def close(self):
+        """Cancela pré-carregamentos pendentes (ex.: troca de token)."""
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _key(self, folder_path: str) -> str:
+        return (folder_path or "").rstrip("/").lower()
+
+    def _cached(self, key: str) -> Optional[list]:
+        with self._lock:
+            cached = self._listings.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        return None
+
+    def _fetch(self, folder_path: str) -> list:
+        """Lista a pasta na API e guarda no cache. Erros da API são propagados (nada fica em cache)."""
+        folders = self.handler.fetch_subfolders(folder_path)
+        with self._lock:
+            self._listings[self._key(folder_path)] = (time.monotonic(), folders)
+        return folders
+
+    def _prefetch(self, folder_path: str):
+        if self._pool is None:
+            return
+        key = self._key(folder_path)
+        if self._cached(key) is not None:
+            return
+        with self._lock:
+            if key in self._loading:
+                return
+            try:
+                future = self._pool.submit(self._fetch, folder_path)
+            except RuntimeError:
+                # Pool já encerrado (close())
+                return
+            self._loading[key] = future
+        future.add_done_callback(lambda _: self._forget_loading(key))
+
+    def _forget_loading(self, key: str):
+        with self._lock:
+            self._loading.pop(key, None)
@@ -1,45 +1,198 @@
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import dropbox
-from dropbox.exceptions import AuthError, ApiError
-from dropbox.files import WriteMode
+import requests
+from dropbox.exceptions import AuthError, ApiError, InternalServerError, RateLimitError
+from dropbox.files import CommitInfo, UploadSessionCursor, UploadSessionFinishArg, WriteMode
 from pathlib import Path
-import streamlit as st
+from translations import translate
+
+# Tamanho (MB) de cada parte dos uploads em sessão. Arquivos até esse tamanho vão em uma única chamada;
+# acima dele, em partes (files_upload aceita no máximo 150 MB). Use múltiplos de 4 MB.
+DROPBOX_UPLOAD_CHUNK_MB = int(os.getenv("DROPBOX_UPLOAD_CHUNK_MB", "8"))
+
+# Arquivos até esse tamanho (MB) são baixados em memória e entregues direto ao conversor, sem passar pelo disco.
+DROPBOX_STREAM_MAX_MB = int(os.getenv("DROPBOX_STREAM_MAX_MB", "16"))
+
+# Uploads em lote: arquivos confirmados por chamada de files_upload_session_finish_batch (máx. 1000) e
+# espera máxima (s) de um arquivo já enviado até o commit do seu grupo. O Dropbox serializa os commits
+# de cada namespace; confirmar em grupos evita a disputa de lock e o limite de requisições.
+DROPBOX_COMMIT_BATCH_SIZE = int(os.getenv("DROPBOX_COMMIT_BATCH_SIZE", "100"))
+DROPBOX_COMMIT_MAX_DELAY = float(os.getenv("DROPBOX_COMMIT_MAX_DELAY", "2"))
+
+# Limite da API por commit em lote e intervalo inicial (s) de consulta ao job assíncrono do commit
+MAX_COMMIT_BATCH_ENTRIES = 1000
+COMMIT_CHECK_INTERVAL = 0.5
+
+# Conexões HTTP mantidas por cliente (um cliente por token, compartilhado por todas as instâncias de
+# DropboxHandler do processo). Dimensione para downloads + uploads + pré-carregamentos simultâneos.
+DROPBOX_MAX_CONNECTIONS = int(os.getenv("DROPBOX_MAX_CONNECTIONS", "16"))
+
+# Novas tentativas por chamada em limite de requisições (429, respeitando o Retry-After), erros 5xx,
+# falhas de rede e disputa de lock de escrita (too_many_write_operations), com espera exponencial a
+# partir de DROPBOX_RETRY_BACKOFF segundos.
+DROPBOX_MAX_RETRIES = int(os.getenv("DROPBOX_MAX_RETRIES", "5"))
+DROPBOX_RETRY_BACKOFF = float(os.getenv("DROPBOX_RETRY_BACKOFF", "1"))
+
+# Espera máxima (s) entre duas tentativas
+MAX_RETRY_DELAY = 60.0
+
+
+class DropboxStats:
+    """Contadores de uso de um cliente Dropbox (thread-safe): chamadas, novas tentativas, erros e bytes."""
+
+    FIELDS = ("calls", "retries", "rate_limited", "errors", "bytes_downloaded", "bytes_uploaded")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+def _is_transient(error) -> bool:
+    """Erros que valem uma nova tentativa: 5xx, falhas de rede e disputa de lock de escrita no namespace."""
+    if isinstance(error, (InternalServerError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    return isinstance(error, ApiError) and "too_many_write_operations" in str(error.error)
+
+def _is_not_found(error) -> bool:
+    return isinstance(error, ApiError) and "not_found" in str(error.error)
+
+def _payload_size(args, kwargs) -> int:
+    data = args[0] if args else kwargs.get("f")
+    return len(data) if isinstance(data, (bytes, bytearray)) else 0
+
+def _downloaded_size(result) -> int:
+    metadata = result[0] if isinstance(result, tuple) else result
+    return getattr(metadata, "size", 0) or 0
+
+
+class _RetryingClient:
+    """
+    Cliente Dropbox compartilhado: as chamadas da API (files_*, users_*) passam por novas tentativas e
+    alimentam `stats`. As novas tentativas do próprio SDK ficam desligadas para serem contadas aqui.
+    """
 
-class DropboxHandler:
     def __init__(self, access_token):
-        self.dbx = dropbox.Dropbox(access_token)
+        self.stats = DropboxStats()
+        self._client = dropbox.Dropbox(
+            access_token,
+            session=dropbox.create_session(max_connections=DROPBOX_MAX_CONNECTIONS),
+            max_retries_on_error=0,
+            max_retries_on_rate_limit=0,
+        )
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute) or not name.startswith(("files_", "users_")):
+            return attribute
+
+        def call(*args, **kwargs):
+            delay = DROPBOX_RETRY_BACKOFF
+            for attempt in range(DROPBOX_MAX_RETRIES + 1):
+                self.stats.add("calls")
+                try:
+                    result = attribute(*args, **kwargs)
+                except RateLimitError as e:
+                    self.stats.add("rate_limited")
+                    wait = e.backoff if e.backoff is not None else delay
+                    error = e
+                except Exception as e:
+                    if not _is_transient(e):
+                        self.stats.add("errors")
+                        raise
+                    wait, error = delay, e
+                else:
+                    self.stats.add("bytes_uploaded", _payload_size(args, kwargs))
+                    if name.startswith("files_download"):
+                        self.stats.add("bytes_downloaded", _downloaded_size(result))
+                    return result
+                if attempt == DROPBOX_MAX_RETRIES:
+                    self.stats.add("errors")
+                    raise error
+                self.stats.add("retries")
+                print(f"Dropbox {name}: {type(error).__name__}; nova tentativa em {wait:.1f}s "
+                      f"({attempt + 1}/{DROPBOX_MAX_RETRIES}).")
+                time.sleep(min(wait, MAX_RETRY_DELAY))
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+
+        return call
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_dropbox_client(access_token) -> _RetryingClient:
+    """Cliente (e pool de conexões) de longa duração para o token, criado na primeira chamada."""
+    with _clients_lock:
+        client = _clients.get(access_token)
+        if client is None:
+            client = _clients[access_token] = _RetryingClient(access_token)
+        return client
+
+
+class DropboxHandler:
+    """
+    Integração com a API do Dropbox, sem dependência do Streamlit (usada também pelo worker de jobs).
+    Instâncias com o mesmo token compartilham o cliente (get_dropbox_client): conexões HTTP reaproveitadas,
+    novas tentativas automáticas e contadores em `stats`. As mensagens saem no idioma `lang`; o último erro
+    fica em `last_error` para a interface ou o job exibir.
+    """
+
+    def __init__(self, access_token, lang='pt'):
+        self.dbx = get_dropbox_client(access_token)
+        self.lang = lang
+        self.last_error = None
+        self.account_id = None
+
+    @property
+    def stats(self) -> dict:
+        """Contadores do cliente compartilhado (ver DropboxStats)."""
+        return self.dbx.stats.snapshot()
+
+    def _error(self, message):
+        """Registra uma falha em last_error e no log; retorna a mensagem."""
+        self.last_error = message
+        print(message)
+        return message
 
     def check_connection(self):
         """Verifica se a conexão e o token são validos."""
         try:
             account = self.dbx.users_get_current_account()
-            lang = st.session_state.get('lang', 'pt')
-            connected_msg = f"Connected as: {account.name.display_name}" if lang == 'en' else f"Conectado como: {account.name.display_name}"
-            return True, connected_msg
+            self.account_id = account.account_id
+            return True, translate("dbx_connected_as", self.lang, account.name.display_name)
         except AuthError:
-            lang = st.session_state.get('lang', 'pt')
-            err_msg = "Authentication Error: Expired or invalid token." if lang == 'en' else "Erro de Autenticação: Token expirado ou inválido."
-            return False, err_msg
+            return False, self._error(translate("dbx_auth_error", self.lang))
         except Exception as e:
-            lang = st.session_state.get('lang', 'pt')
-            err_msg = f"Connection Error: {str(e)}" if lang == 'en' else f"Erro de Conexão: {str(e)}"
-            return False, err_msg
+            return False, self._error(translate("dbx_connection_error", self.lang, str(e)))
 
-    def list_files_recursive(self, folder_path, supported_extensions):
-        """Lista arquivos recursivamente filtrando por extensão."""
+    def list_folder_files(self, folder_path):
+        """
+        Lista recursivamente todos os arquivos (FileMetadata) da pasta em uma única varredura paginada:
+        origens e saídas já existentes vêm da mesma listagem, sem uma consulta de metadados por arquivo.
+        """
         files_found = []
+        self.last_error = None
         try:
             # Garante formato correto do path (vazio para root ou iniciando com /)
             path = folder_path if folder_path != "/" else ""
-            
+
             result = self.dbx.files_list_folder(path, recursive=True)
-            
+
             def process_entries(entries):
                 for entry in entries:
                     if isinstance(entry, dropbox.files.FileMetadata):
-                        ext = os.path.splitext(entry.name)[1].lower()
-                        if ext in supported_extensions:
-                            files_found.append(entry)
+                        files_found.append(entry)
 
             process_entries(result.entries)
 
@@ -50,49 +203,106 @@ class DropboxHandler:
 
             return files_found
         except ApiError as e:
-            lang = st.session_state.get('lang', 'pt')
-            msg = f"Erro ao listar arquivos do Dropbox: {e}" if lang == 'pt' else f"Error listing Dropbox files: {e}"
-            st.error(msg)
+            self._error(translate("dbx_list_error", self.lang, e))
             return []
 
-    def list_subfolders(self, folder_path):
-        """Lista apenas as subpastas diretas de um diretório (para navegação)."""
-        folders = []
+    def list_folder_changes(self, folder_path, cursor=None):
+        """
+        Listagem recursiva a partir de um cursor: sem cursor, lista a pasta inteira; com cursor, apenas o que
+        mudou desde então (files_list_folder_continue), incluindo DeletedMetadata das remoções.
+        Retorna (entradas, novo_cursor, reset); reset=True indica cursor expirado (refazer a listagem completa).
+        Em erro retorna None e preenche last_error.
+        """
+        entries = []
+        self.last_error = None
         try:
-            # Garante formato correto do path (vazio para root ou iniciando com /)
-            path = folder_path if folder_path != "/" else ""
-            
-            result = self.dbx.files_list_folder(path)
-            
-            def process_entries(entries):
-                for entry in entries:
-                    if isinstance(entry, dropbox.files.FolderMetadata):
-                        folders.append(entry)
-
-            process_entries(result.entries)
-            
-            # Paginação (se houver muitas pastas)
+            if cursor:
+                result = self.dbx.files_list_folder_continue(cursor)
+            else:
+                result = self.dbx.files_list_folder(folder_path if folder_path != "/" else "", recursive=True)
+            entries.extend(result.entries)
             while result.has_more:
                 result = self.dbx.files_list_folder_continue(result.cursor)
-                process_entries(result.entries)
+                entries.extend(result.entries)
+            return entries, result.cursor, False
+        except ApiError as e:
+            if cursor and isinstance(e.error, dropbox.files.ListFolderContinueError) and e.error.is_reset():
+                return [], None, True
+            self._error(translate("dbx_list_error", self.lang, e))
+            return None
+
+    def wait_for_changes(self, cursor, timeout=30):
+        """
+        Aguarda (longpoll, até `timeout` segundos) mudanças na pasta do cursor.
+        Retorna (houve_mudancas, backoff_segundos ou None), ou None em caso de erro.
+        """
+        try:
+            result = self.dbx.files_list_folder_longpoll(cursor, timeout=timeout)
+            return result.changes, result.backoff
+        except Exception as e:
+            self._error(f"Erro ao aguardar mudanças no Dropbox: {e}")
+            return None
 
-            return sorted(folders, key=lambda x: x.name)
-            return sorted(folders, key=lambda x: x.name)
+    def list_files_recursive(self, folder_path, supported_extensions):
+        """Lista arquivos recursivamente filtrando por extensão."""
+        return [entry for entry in self.list_folder_files(folder_path)
+                if os.path.splitext(entry.name)[1].lower() in supported_extensions]
+
+    def fetch_subfolders(self, folder_path):
+        """Subpastas diretas de um diretório (FolderMetadata, por nome). Erros da API são propagados."""
+        folders = []
+        # Garante formato correto do path (vazio para root ou iniciando com /)
+        path = folder_path if folder_path != "/" else ""
+
+        result = self.dbx.files_list_folder(path)
+
+        def process_entries(entries):
+            for entry in entries:
+                if isinstance(entry, dropbox.files.FolderMetadata):
+                    folders.append(entry)
+
+        process_entries(result.entries)
+
+        # Paginação (se houver muitas pastas)
+        while result.has_more:
+            result = self.dbx.files_list_folder_continue(result.cursor)
+            process_entries(result.entries)
+
+        return sorted(folders, key=lambda x: x.name)
+
+    def list_subfolders(self, folder_path):
+        """Lista apenas as subpastas diretas de um diretório (para navegação)."""
+        try:
+            return self.fetch_subfolders(folder_path)
         except AuthError:
-            print("Erro de Autenticação ao listar pastas.")
+            self._error(translate("dbx_auth_error", self.lang))
             return []
         except ApiError as e:
             # Tratamento silencioso ou log
-            print(f"Erro ao listar pastas: {e}")
+            self._error(translate("dbx_list_error", self.lang, e))
             return []
 
     def file_exists(self, dropbox_path):
-        """Verifica se um arquivo existe."""
+        """Verifica se um arquivo existe (uma chamada à API; em lotes, prefira o índice de list_folder_files)."""
+        return self.get_metadata(dropbox_path) is not None
+
+    def get_metadata(self, dropbox_path):
+        """Metadados de um arquivo (FileMetadata), ou None se não existir (outras falhas ficam em last_error)."""
         try:
-            self.dbx.files_get_metadata(dropbox_path)
-            return True
-        except:
-            return False
+            metadata = self.dbx.files_get_metadata(dropbox_path)
+            return metadata if isinstance(metadata, dropbox.files.FileMetadata) else None
+        except Exception as e:
+            if not _is_not_found(e):
+                self._error(f"Erro ao consultar {dropbox_path}: {e}")
+            return None
+
+    def copy_file(self, from_path, to_path):
+        """Copia um arquivo dentro do Dropbox (sem download). Retorna o FileMetadata da cópia, ou None."""
+        try:
+            return self.dbx.files_copy_v2(from_path, to_path).metadata
+        except Exception as e:
+            self._error(f"Erro ao copiar {from_path} para {to_path}: {e}")
+            return None
 
     def download_file(self, dropbox_path, local_path):
         """Baixa um arquivo do Dropbox para o disco local."""
@@ -101,19 +311,211 @@ class DropboxHandler:
             self.dbx.files_download_to_file(local_path, dropbox_path)
             return True
         except Exception as e:
-            print(f"Erro ao baixar {dropbox_path}: {e}")
+            self._error(f"Erro ao baixar {dropbox_path}: {e}")
             return False
 
-    def upload_file(self, local_path, dropbox_path):
-        """Faz upload de um arquivo local para o Dropbox (Sobrescrevendo se existir)."""
+    def download_bytes(self, dropbox_path):
+        """Baixa um arquivo para a memória (em blocos, sem gravar em disco). Retorna os bytes, ou None em erro."""
+        try:
+            _, response = self.dbx.files_download(dropbox_path)
+            try:
+                return b"".join(response.iter_content(chunk_size=1024 * 1024))
+            finally:
+                response.close()
+        except Exception as e:
+            self._error(f"Erro ao baixar {dropbox_path}: {e}")
+            return None
+
+    def upload_file(self, local_path, dropbox_path, chunk_size=None):
+        """
+        Faz upload de um arquivo local para o Dropbox (Sobrescrevendo se existir).
+        Arquivos maiores que chunk_size (padrão: DROPBOX_UPLOAD_CHUNK_MB) são enviados em partes por uma
+        sessão de upload, lidas do disco uma a uma (sem carregar o arquivo inteiro na memória).
+        Retorna o FileMetadata enviado (com o rev), ou None em caso de erro.
+        """
+        chunk_size = chunk_size or DROPBOX_UPLOAD_CHUNK_MB * 1024 * 1024
         try:
+            file_size = os.path.getsize(local_path)
             with open(local_path, "rb") as f:
-                self.dbx.files_upload(
-                    f.read(), 
-                    dropbox_path, 
-                    mode=WriteMode('overwrite')
-                )
-            return True
+                if file_size <= chunk_size:
+                    return self.dbx.files_upload(
+                        f.read(), 
+                        dropbox_path, 
+                        mode=WriteMode('overwrite')
+                    )
+
+                session = self.dbx.files_upload_session_start(f.read(chunk_size))
+                cursor = UploadSessionCursor(session_id=session.session_id, offset=f.tell())
+                while file_size - cursor.offset > chunk_size:
+                    self.dbx.files_upload_session_append_v2(f.read(chunk_size), cursor)
+                    cursor.offset = f.tell()
+                commit = CommitInfo(path=dropbox_path, mode=WriteMode('overwrite'))
+                return self.dbx.files_upload_session_finish(f.read(chunk_size), cursor, commit)
         except Exception as e:
-            print(f"Erro ao subir {dropbox_path}: {e}")
+            self._error(f"Erro ao subir {dropbox_path}: {e}")
+            return None
+
+    def stage_upload(self, local_path, chunk_size=None):
+        """
+        Envia o conteúdo de um arquivo local para uma sessão de upload fechada, sem ainda criar o arquivo
+        no Dropbox (o commit é feito em grupo por commit_uploads). Arquivos maiores que chunk_size vão em partes.
+        Retorna o UploadSessionCursor da sessão, ou None em caso de erro.
+        """
+        chunk_size = chunk_size or DROPBOX_UPLOAD_CHUNK_MB * 1024 * 1024
+        try:
+            file_size = os.path.getsize(local_path)
+            with open(local_path, "rb") as f:
+                session = self.dbx.files_upload_session_start(f.read(chunk_size), close=file_size <= chunk_size)
+                cursor = UploadSessionCursor(session_id=session.session_id, offset=f.tell())
+                while cursor.offset < file_size:
+                    data = f.read(chunk_size)
+                    self.dbx.files_upload_session_append_v2(data, cursor, close=cursor.offset + len(data) >= file_size)
+                    cursor.offset += len(data)
+            return cursor
+        except Exception as e:
+            self._error(f"Erro ao enviar {local_path} para sessão de upload: {e}")
+            return None
+
+    def commit_uploads(self, staged):
+        """
+        Confirma sessões de upload em uma única chamada (files_upload_session_finish_batch), sobrescrevendo
+        arquivos existentes, e aguarda o job assíncrono do Dropbox terminar.
+
+        Args:
+            staged: [(UploadSessionCursor de stage_upload, caminho no Dropbox)], no máximo 1000.
+
+        Returns:
+            [(FileMetadata ou None, mensagem de erro ou None)] na mesma ordem de staged.
+        """
+        if not staged:
+            return []
+        entries = [UploadSessionFinishArg(cursor=cursor, commit=CommitInfo(path=dropbox_path, mode=WriteMode('overwrite')))
+                   for cursor, dropbox_path in staged]
+        try:
+            launch = self.dbx.files_upload_session_finish_batch(entries)
+            if launch.is_complete():
+                results = launch.get_complete().entries
+            else:
+                job_id, delay = launch.get_async_job_id(), COMMIT_CHECK_INTERVAL
+                while True:
+                    status = self.dbx.files_upload_session_finish_batch_check(job_id)
+                    if status.is_complete():
+                        results = status.get_complete().entries
+                        break
+                    time.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+        except Exception as e:
+            self._error(f"Erro ao confirmar {len(staged)} uploads no Dropbox: {e}")
+            return [(None, str(e))] * len(staged)
+
+        committed = []
+        for (_, dropbox_path), result in zip(staged, results):
+            if result.is_success():
+                committed.append((result.get_success(), None))
+            else:
+                error = str(result.get_failure())
+                self._error(f"Erro ao subir {dropbox_path}: {error}")
+                committed.append((None, error))
+        return committed
+
+    def upload_files(self, files, workers=4, on_result=None):
+        """
+        Faz upload de vários arquivos com commits em grupo (ver BatchUploader), enviando até `workers`
+        arquivos em paralelo.
+
+        Args:
+            files: [(caminho local, caminho no Dropbox)].
+            on_result: on_result(resultado) a cada arquivo confirmado ou com erro.
+
+        Returns:
+            Lista de resultados {"item", "path", "metadata", "error"}, onde item é o caminho local.
+        """
+        uploader = BatchUploader(self, on_result=on_result)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                list(pool.map(lambda file: uploader.add(file[0], file[1], item=file[0]), files))
+        finally:
+            results = uploader.close()
+        return results
+
+
+class BatchUploader:
+    """
+    Uploads com commit em grupo: add() envia o conteúdo de um arquivo para uma sessão de upload (pode ser
+    chamado de várias threads) e uma thread própria confirma as sessões em grupos de até `batch_size`
+    arquivos, ou depois de `max_delay` segundos do primeiro arquivo pendente. close() confirma o restante.
+
+    on_result(resultado) recebe {"item", "path", "metadata", "error"} de cada arquivo enviado por add(),
+    na thread de commit; metadata é o FileMetadata confirmado (com o rev), ou None em erro.
+    """
+
+    def __init__(self, handler: DropboxHandler, batch_size=None, max_delay=None, on_result=None):
+        self.handler = handler
+        self.batch_size = max(1, min(MAX_COMMIT_BATCH_ENTRIES, batch_size or DROPBOX_COMMIT_BATCH_SIZE))
+        self.max_delay = DROPBOX_COMMIT_MAX_DELAY if max_delay is None else max(0.0, max_delay)
+        self.on_result = on_result
+        self.results = []
+        self._pending = []          # (cursor, caminho no Dropbox, item)
+        self._oldest = None         # instante em que o grupo pendente começou a esperar
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._commit_loop, name="dropbox-commit", daemon=True)
+        self._thread.start()
+
+    def add(self, local_path, dropbox_path, item=None) -> bool:
+        """
+        Envia o arquivo para uma sessão de upload e o coloca no próximo commit. Se o envio falhar, o erro
+        é informado como resultado do arquivo (on_result) e retorna False.
+        """
+        cursor = self.handler.stage_upload(local_path)
+        if cursor is None:
+            self._report(item, dropbox_path, None, translate("dbx_upload_error", self.handler.lang, Path(dropbox_path).name))
             return False
+        with self._condition:
+            self._pending.append((cursor, dropbox_path, item))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._condition.notify_all()
+        return True
+
+    def close(self) -> list:
+        """Confirma os arquivos pendentes, encerra a thread de commit e retorna todos os resultados."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        return self.results
+
+    def _next_group(self):
+        """Aguarda o próximo grupo a confirmar; None quando fechado e sem pendências (chamado com o lock)."""
+        while True:
+            if self._pending and (len(self._pending) >= self.batch_size or self._closed
+                                  or time.monotonic() - self._oldest >= self.max_delay):
+                group = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                self._oldest = time.monotonic() if self._pending else None
+                return group
+            if self._closed:
+                return None
+            timeout = self._oldest + self.max_delay - time.monotonic() if self._pending else None
+            self._condition.wait(timeout)
+
+    def _commit_loop(self):
+        while True:
+            with self._condition:
+                group = self._next_group()
+            if group is None:
+                return
+            committed = self.handler.commit_uploads([(cursor, dropbox_path) for cursor, dropbox_path, _ in group])
+            for (_, dropbox_path, item), (metadata, error) in zip(group, committed):
+                self._report(item, dropbox_path, metadata, error)
+
+    def _report(self, item, dropbox_path, metadata, error):
+        result = {"item": item, "path": dropbox_path, "metadata": metadata, "error": error}
+        with self._condition:
+            self.results.append(result)
+        if self.on_result:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                print(f"Erro ao registrar o upload de {dropbox_path}: {e}")
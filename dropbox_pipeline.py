@@ -0,0 +1,255 @@
+# dropbox_pipeline.py
+
+import os
+import time
+import queue
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from batch_engine import LANE_CPU, LANE_IO, create_lane_executors, resolve_batch_workers, shutdown_lane_executors
+
+# Pipeline em três estágios para lotes remotos (Dropbox): download -> conversão -> upload.
+# Cada estágio tem seus próprios workers e as filas entre eles são limitadas, de modo que transferências
+# de rede acontecem enquanto outros arquivos passam pelo OCR. A conversão usa as filas de CPU e E/S do
+# batch_engine. Os temporários de cada estágio são apagados assim que o estágio seguinte não precisa mais deles.
+
+# Downloads e uploads simultâneos
+DROPBOX_DOWNLOAD_WORKERS = int(os.getenv("DROPBOX_DOWNLOAD_WORKERS", "4"))
+DROPBOX_UPLOAD_WORKERS = int(os.getenv("DROPBOX_UPLOAD_WORKERS", "4"))
+
+# Arquivos aguardando entre um estágio e o seguinte (por fila)
+DROPBOX_PIPELINE_QUEUE_SIZE = int(os.getenv("DROPBOX_PIPELINE_QUEUE_SIZE", "8"))
+
+# Limite (MB) de arquivos baixados e ainda não convertidos (em disco ou em memória); um arquivo maior que o limite
+# só é baixado quando nenhum outro estiver em andamento (0 = sem limite).
+DROPBOX_PIPELINE_MAX_MB = int(os.getenv("DROPBOX_PIPELINE_MAX_MB", "1024"))
+
+# Retorno de download() para itens concluídos sem conversão (ex.: Markdown copiado no próprio Dropbox)
+PIPELINE_DONE = object()
+
+_STOP = object()
+_POLL_INTERVAL = 0.5
+
+
+class _DiskBudget:
+    """Reserva de bytes para arquivos baixados e ainda não convertidos."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int, stop: threading.Event) -> bool:
+        with self._condition:
+            while (self.max_bytes > 0 and self.in_use > 0 and self.in_use + size > self.max_bytes
+                   and not stop.is_set()):
+                self._condition.wait(_POLL_INTERVAL)
+            if stop.is_set():
+                return False
+            self.in_use += size
+            return True
+
+    def release(self, size: int):
+        with self._condition:
+            self.in_use = max(0, self.in_use - size)
+            self._condition.notify_all()
+
+
+class _PipelineItem:
+    def __init__(self, item, size: int, work_dir: Path):
+        self.item = item
+        self.size = size
+        self.work_dir = work_dir
+        self.reserved = 0
+        self.local_input = None
+        self.local_output = None
+        self.started = time.monotonic()
+
+
+def run_pipeline(items: list, download: Callable, convert: Callable, upload: Callable, temp_dir: Path,
+                 size: Callable = lambda item: 0, lane: Callable = lambda item: LANE_CPU, label: Callable = str,
+                 cpu_workers: Optional[int] = None, io_workers: Optional[int] = None,
+                 download_workers: int = DROPBOX_DOWNLOAD_WORKERS, upload_workers: int = DROPBOX_UPLOAD_WORKERS,
+                 queue_size: int = DROPBOX_PIPELINE_QUEUE_SIZE, max_disk_mb: int = DROPBOX_PIPELINE_MAX_MB,
+                 on_result: Optional[Callable] = None,
+                 should_stop: Optional[Callable[[], bool]] = None) -> List[dict]:
+    """
+    Processa os itens em três estágios concorrentes com filas limitadas entre eles.
+
+    Args:
+        download: download(item, pasta_de_trabalho) -> caminho local do arquivo baixado, bytes (arquivo
+            baixado em memória) ou PIPELINE_DONE se o item já foi concluído sem conversão.
+            Exceções contam como falha só daquele item.
+        convert: convert(item, entrada, pasta_de_trabalho, executor) -> caminho local do resultado, onde entrada
+            é o retorno de download (caminhos locais de entrada são apagados em seguida) e executor é o pool de
+            processos da fila do item (ver batch_engine.run_batch).
+        upload: upload(item, saida_local) envia o resultado (a pasta de trabalho é apagada em seguida). Se o
+            envio só se completa depois (ex.: commit em grupo), o resultado "uploaded" permite ao chamador
+            distinguir os itens entregues ao upload dos concluídos sem conversão.
+        temp_dir: Pasta dos temporários; cada item usa uma subpasta própria.
+        size: size(item) -> bytes a reservar no limite de disco/memória (ex.: tamanho informado pela listagem).
+        lane: lane(item) -> LANE_CPU ou LANE_IO, a fila de conversão do item (ver batch_engine).
+        label: label(item) -> nome do item nos logs.
+        on_result: on_result(resultado, concluidos, total), chamado na thread de quem chamou.
+        should_stop: Consultado periodicamente; se retornar True, nenhum novo download é iniciado e os
+            itens ainda não convertidos são descartados (os que já estão em conversão terminam).
+
+    Returns:
+        Lista de resultados {"item", "lane", "success", "error", "seconds", "uploaded"} na ordem de conclusão.
+        Itens descartados por should_stop não aparecem na lista.
+    """
+    cpu_workers, io_workers = resolve_batch_workers(cpu_workers, io_workers)
+    download_workers, upload_workers = max(1, download_workers), max(1, upload_workers)
+    results = []
+    total = len(items)
+    if not total:
+        return results
+
+    temp_dir = Path(temp_dir)
+    stop = threading.Event()
+    budget = _DiskBudget(max_disk_mb * 1024 * 1024)
+    source = iter(items)
+    source_lock = threading.Lock()
+    convert_queues = {LANE_CPU: queue.Queue(maxsize=max(1, queue_size)), LANE_IO: queue.Queue(maxsize=max(1, queue_size))}
+    upload_queue = queue.Queue(maxsize=max(1, queue_size))
+    result_queue = queue.Queue()
+    executors = create_lane_executors(cpu_workers, io_workers, {lane(item) for item in items})
+
+    def put(target: queue.Queue, value) -> bool:
+        """put bloqueante que desiste se o pipeline for interrompido."""
+        while True:
+            try:
+                target.put(value, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                if stop.is_set() and value is not _STOP:
+                    return False
+
+    def finish(work: _PipelineItem, success: bool, error: Optional[str] = None, uploaded: bool = False):
+        """Encerra um item: libera a reserva de disco, apaga os temporários e informa o resultado."""
+        if work.reserved:
+            budget.release(work.reserved)
+            work.reserved = 0
+        shutil.rmtree(work.work_dir, ignore_errors=True)
+        if success is not None:
+            result_queue.put({"item": work.item, "lane": lane(work.item), "success": success, "error": error,
+                              "seconds": time.monotonic() - work.started, "uploaded": uploaded})
+
+    def fail(work: _PipelineItem, stage: str, e: Exception):
+        print(f"Erro ({stage}) em {label(work.item)}: {e}")
+        finish(work, False, str(e))
+
+    def download_worker():
+        while not stop.is_set():
+            with source_lock:
+                item = next(source, _STOP)
+            if item is _STOP:
+                return
+            work = _PipelineItem(item, max(0, int(size(item) or 0)), temp_dir / uuid.uuid4().hex)
+            if not budget.acquire(work.size, stop):
+                return
+            work.reserved = work.size
+            work.started = time.monotonic()
+            try:
+                work.work_dir.mkdir(parents=True, exist_ok=True)
+                local_input = download(item, work.work_dir)
+            except Exception as e:
+                fail(work, "download", e)
+                continue
+            if local_input is PIPELINE_DONE:
+                finish(work, True)
+                continue
+            work.local_input = local_input if isinstance(local_input, bytes) else Path(local_input)
+            if not put(convert_queues[lane(item)], work):
+                finish(work, None)
+
+    def convert_worker(lane_name: str):
+        while True:
+            work = convert_queues[lane_name].get()
+            if work is _STOP:
+                return
+            if stop.is_set():
+                finish(work, None)
+                continue
+            try:
+                work.local_output = Path(convert(work.item, work.local_input, work.work_dir, executors.get(lane_name)))
+            except Exception as e:
+                fail(work, "conversão", e)
+                continue
+            # Entrada não é mais necessária: libera o disco (ou a memória) antes do upload
+            if isinstance(work.local_input, Path):
+                try:
+                    work.local_input.unlink()
+                except OSError:
+                    pass
+            work.local_input = None
+            budget.release(work.reserved)
+            work.reserved = 0
+            put(upload_queue, work)
+
+    def upload_worker():
+        while True:
+            work = upload_queue.get()
+            if work is _STOP:
+                return
+            try:
+                upload(work.item, work.local_output)
+            except Exception as e:
+                fail(work, "upload", e)
+                continue
+            finish(work, True, uploaded=True)
+
+    def start(target, count: int, name: str, *args) -> list:
+        threads = [threading.Thread(target=target, args=args, name=f"{name}-{i}", daemon=True) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    downloaders = start(download_worker, download_workers, "pipeline-download")
+    converters = {LANE_CPU: start(convert_worker, cpu_workers, "pipeline-cpu", LANE_CPU),
+                  LANE_IO: start(convert_worker, io_workers, "pipeline-io", LANE_IO)}
+    uploaders = start(upload_worker, upload_workers, "pipeline-upload")
+
+    def shutdown():
+        """Encerra os estágios em ordem: cada um termina depois de esvaziar a fila que o alimenta."""
+        for thread in downloaders:
+            thread.join()
+        for lane_name, threads in converters.items():
+            for _ in threads:
+                put(convert_queues[lane_name], _STOP)
+            for thread in threads:
+                thread.join()
+        shutdown_lane_executors(executors)
+        for _ in uploaders:
+            put(upload_queue, _STOP)
+        for thread in uploaders:
+            thread.join()
+
+    closer = threading.Thread(target=shutdown, name="pipeline-shutdown", daemon=True)
+    closer.start()
+    try:
+        while closer.is_alive() or not result_queue.empty():
+            try:
+                result = result_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                result = None
+            if result is not None:
+                results.append(result)
+                if on_result:
+                    on_result(result, len(results), total)
+            if not stop.is_set() and should_stop and should_stop():
+                stop.set()
+    except BaseException:
+        # Interrupção de quem chamou: não inicia novos downloads e descarta o que ainda não foi convertido
+        stop.set()
+        raise
+    finally:
+        if closer.is_alive():
+            stop.set()
+            closer.join()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return results
@@ -0,0 +1,196 @@
+# dropbox_sync_state.py
+
+import os
+import time
+import sqlite3
+from datetime import datetime
+from typing import Optional
+
+import dropbox
+
+# Estado de sincronização dos lotes Dropbox, ao lado do banco de usuários (volume persistente no Docker).
+# Para cada arquivo de origem guarda o content_hash, o rev e o server_modified vistos na última conversão,
+# além do caminho e do rev do Markdown gerado. Assim, apenas origens novas ou alteradas são baixadas, e
+# arquivos idênticos em outras pastas reaproveitam o Markdown já convertido (cópia no próprio Dropbox).
+#
+# Também guarda, por pasta sincronizada, o cursor de files_list_folder e a última listagem de arquivos:
+# execuções seguintes buscam apenas as mudanças (files_list_folder_continue) em vez de varrer a pasta inteira.
+_DEFAULT_SYNC_DB = os.path.join(os.path.dirname(os.getenv("USERS_DB_PATH", "users.db")) or ".", "dropbox_sync.db")
+DROPBOX_SYNC_DB_PATH = os.getenv("DROPBOX_SYNC_DB_PATH", _DEFAULT_SYNC_DB)
+
+
+def get_db_connection():
+    """Retorna uma conexão aberta com o banco de sincronização (uma por operação, segura entre processos)."""
+    conn = sqlite3.connect(DROPBOX_SYNC_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_sync_db():
+    """Cria as tabelas do estado de sincronização, se ainda não existirem."""
+    os.makedirs(os.path.dirname(os.path.abspath(DROPBOX_SYNC_DB_PATH)), exist_ok=True)
+    conn = get_db_connection()
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sources (
+                account_id TEXT NOT NULL,
+                path_lower TEXT NOT NULL,
+                path_display TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                rev TEXT,
+                server_modified TEXT,
+                output_path TEXT NOT NULL,
+                output_rev TEXT,
+                engine TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (account_id, path_lower)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_hash ON sources(account_id, content_hash)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS folder_cursors (
+                account_id TEXT NOT NULL,
+                folder_lower TEXT NOT NULL,
+                cursor TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (account_id, folder_lower)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS folder_files (
+                account_id TEXT NOT NULL,
+                folder_lower TEXT NOT NULL,
+                path_lower TEXT NOT NULL,
+                path_display TEXT NOT NULL,
+                name TEXT NOT NULL,
+                id TEXT,
+                rev TEXT,
+                size INTEGER,
+                content_hash TEXT,
+                server_modified TEXT,
+                PRIMARY KEY (account_id, folder_lower, path_lower)
+            )
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_sources(account_id: str, folder_path: str = "") -> dict:
+    """
+    Estado de todas as origens sob folder_path ("" ou "/" = conta inteira) em uma consulta:
+    {path_lower: linha}, para as decisões do lote serem tomadas em memória.
+    """
+    prefix = folder_path.rstrip("/").lower()
+    conn = get_db_connection()
+    try:
+        if prefix:
+            rows = conn.execute(
+                "SELECT * FROM sources WHERE account_id = ? AND (path_lower = ? OR substr(path_lower, 1, ?) = ?)",
+                (account_id, prefix, len(prefix) + 1, prefix + "/")).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM sources WHERE account_id = ?", (account_id,)).fetchall()
+        return {row["path_lower"]: dict(row) for row in rows}
+    finally:
+        conn.close()
+
+def find_converted(account_id: str, content_hash: str, engine: Optional[str]) -> list:
+    """Conversões já registradas de um conteúdo idêntico (mesmo content_hash e pipeline), mais recentes primeiro."""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM sources WHERE account_id = ? AND content_hash = ? AND engine IS ? AND output_rev IS NOT NULL "
+            "ORDER BY updated_at DESC", (account_id, content_hash, engine)).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+def record_source(account_id: str, entry, output_path: str, output_rev: Optional[str], engine: Optional[str]):
+    """Registra a conversão de uma origem (entry: dropbox.files.FileMetadata) e o Markdown correspondente."""
+    conn = get_db_connection()
+    try:
+        conn.execute("""
+            INSERT OR REPLACE INTO sources (account_id, path_lower, path_display, content_hash, rev, server_modified,
+                                            output_path, output_rev, engine, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (account_id, entry.path_lower, entry.path_display, entry.content_hash or "", entry.rev,
+              entry.server_modified.isoformat() if entry.server_modified else None,
+              output_path, output_rev, engine, time.time()))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _folder_key(folder_path: str) -> str:
+    return folder_path.rstrip("/").lower()
+
+def _file_from_row(row) -> "dropbox.files.FileMetadata":
+    server_modified = datetime.fromisoformat(row["server_modified"]) if row["server_modified"] else None
+    return dropbox.files.FileMetadata(
+        name=row["name"], id=row["id"], rev=row["rev"], size=row["size"], path_lower=row["path_lower"],
+        path_display=row["path_display"], content_hash=row["content_hash"],
+        server_modified=server_modified, client_modified=server_modified)
+
+def sync_folder_listing(dbx, folder_path: str) -> Optional[tuple]:
+    """
+    Atualiza a listagem local da pasta pelo cursor salvo (ou lista tudo na primeira vez / cursor expirado).
+
+    Args:
+        dbx: dropbox_handler.DropboxHandler já conectado (check_connection preenche account_id).
+
+    Returns:
+        (arquivos, cursor): arquivos = {path_lower: FileMetadata} de toda a pasta, já com as mudanças aplicadas;
+        cursor para files_list_folder_longpoll. None em erro (ver dbx.last_error).
+    """
+    account_id, folder_lower = dbx.account_id, _folder_key(folder_path)
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT cursor FROM folder_cursors WHERE account_id = ? AND folder_lower = ?",
+                           (account_id, folder_lower)).fetchone()
+    finally:
+        conn.close()
+
+    cursor = row["cursor"] if row else None
+    listing = dbx.list_folder_changes(folder_path, cursor)
+    if listing is not None and listing[2]:
+        print(f"Cursor do Dropbox expirado para {folder_path}; refazendo a listagem completa.")
+        cursor = None
+        listing = dbx.list_folder_changes(folder_path)
+    if listing is None:
+        return None
+    entries, new_cursor, _ = listing
+
+    changed, deleted = set(), []
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if cursor is None:
+            conn.execute("DELETE FROM folder_files WHERE account_id = ? AND folder_lower = ?", (account_id, folder_lower))
+        for entry in entries:
+            if isinstance(entry, dropbox.files.FileMetadata):
+                changed.add(entry.path_lower)
+                conn.execute("""
+                    INSERT OR REPLACE INTO folder_files (account_id, folder_lower, path_lower, path_display, name, id,
+                                                         rev, size, content_hash, server_modified)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (account_id, folder_lower, entry.path_lower, entry.path_display, entry.name, entry.id,
+                      entry.rev, entry.size, entry.content_hash,
+                      entry.server_modified.isoformat() if entry.server_modified else None))
+            elif isinstance(entry, dropbox.files.DeletedMetadata):
+                # Uma pasta apagada remove também tudo o que estava dentro dela
+                prefix = entry.path_lower + "/"
+                changed = {path for path in changed if path != entry.path_lower and not path.startswith(prefix)}
+                conn.execute("DELETE FROM folder_files WHERE account_id = ? AND folder_lower = ? "
+                             "AND (path_lower = ? OR substr(path_lower, 1, ?) = ?)",
+                             (account_id, folder_lower, entry.path_lower, len(prefix), prefix))
+                deleted.append(entry.path_lower)
+        conn.execute("INSERT OR REPLACE INTO folder_cursors (account_id, folder_lower, cursor, updated_at) VALUES (?, ?, ?, ?)",
+                     (account_id, folder_lower, new_cursor, time.time()))
+        conn.commit()
+        files = {row["path_lower"]: _file_from_row(row) for row in conn.execute(
+            "SELECT * FROM folder_files WHERE account_id = ? AND folder_lower = ?", (account_id, folder_lower))}
+    finally:
+        conn.close()
+
+    if cursor:
+        print(f"Dropbox {folder_path}: {len(changed)} arquivos novos/alterados e {len(deleted)} remoções desde a última sincronização.")
+    return files, new_cursor
@@ -0,0 +1,274 @@
+# engine.py
+
+import os
+import time
+import hashlib
+from pathlib import Path
+from typing import Callable, Optional
+
+from pdf_detector import PDF_DIGITAL, detect_pdf_layout, extract_structured_markitdown, open_pdf_document
+from gcv_ocr import (OCR_CONFIDENCE_THRESHOLD, OCR_DPI, RASTER_BACKEND, RASTER_COLOR_MODE, TESSERACT_LANG, GEMINI_MODEL,
+                     GEMINI_RASTER_COLOR_MODE)
+from conversion_cache import get_conversion_cache, hash_file, make_cache_key, package_version
+from page_router import extract_pdf_hybrid
+
+# Núcleo de conversão sem dependência do Streamlit: usado pela interface, pelo worker de jobs e pela CLI.
+#
+# Interface de eventos: o progresso é informado por on_event(nivel, chave, *args), onde nivel é um de
+# EVENT_LEVELS e chave é uma chave de translations.TRANSLATIONS (os args preenchem o texto traduzido).
+# A interface mostra os eventos com st.<nivel>; o worker e a CLI os registram no log/JSON.
+
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.pptx', '.xlsx', '.doc', '.xls', '.csv', '.json', '.xml', '.html', '.zip', '.mp3', '.wav', '.jpg', '.png', '.epub'}
+
+EVENT_INFO = "info"
+EVENT_SUCCESS = "success"
+EVENT_WARNING = "warning"
+EVENT_ERROR = "error"
+EVENT_LEVELS = (EVENT_INFO, EVENT_SUCCESS, EVENT_WARNING, EVENT_ERROR)
+
+# Versão do formato do Markdown gerado: incrementar quando a saída de um mesmo arquivo mudar, para que
+# as entradas antigas do cache de conversões deixem de ser servidas.
+OUTPUT_FORMAT_VERSION = 3
+
+
+class ConversionOptions:
+    """
+    Opções do pipeline de conversão, independentes da interface. Objeto simples e serializável
+    (to_dict/from_dict), para ser repassado a threads, processos e jobs da fila.
+    """
+
+    def __init__(self, gemini_key: Optional[str] = None, force_gemini: bool = False,
+                 confidence_threshold: Optional[float] = None, ocr_workers: Optional[int] = None):
+        self.gemini_key = gemini_key or None
+        # Forçar Gemini só tem efeito com chave
+        self.force_gemini = bool(self.gemini_key) and bool(force_gemini)
+        self.confidence_threshold = OCR_CONFIDENCE_THRESHOLD if confidence_threshold is None else confidence_threshold
+        # Processos de Tesseract por arquivo (None = OCR_WORKERS / núcleos); não altera o resultado
+        self.ocr_workers = ocr_workers
+
+    def to_dict(self) -> dict:
+        return {
+            "gemini_key": self.gemini_key,
+            "force_gemini": self.force_gemini,
+            "confidence_threshold": self.confidence_threshold,
+            "ocr_workers": self.ocr_workers,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConversionOptions":
+        return cls(**{name: data.get(name) for name in ("gemini_key", "force_gemini", "confidence_threshold", "ocr_workers")})
+
+    def cache_settings(self) -> dict:
+        """Configurações que afetam o Markdown gerado (compõem a chave do cache de conversões)."""
+        use_gemini = bool(self.gemini_key)
+        return {
+            "tesseract_lang": TESSERACT_LANG,
+            "dpi": OCR_DPI,
+            "raster_backend": RASTER_BACKEND,
+            "raster_color_mode": RASTER_COLOR_MODE,
+            "gemini_model": GEMINI_MODEL if use_gemini else None,
+            "gemini_color_mode": GEMINI_RASTER_COLOR_MODE if use_gemini else None,
+            "force_gemini": self.force_gemini,
+            "confidence_threshold": self.confidence_threshold if use_gemini else None,
+            "markitdown": package_version("markitdown"),
+            "output_format": OUTPUT_FORMAT_VERSION,
+        }
+
+
+def print_event(level: str, key: str, *args):
+    """Tratador de eventos padrão: apenas registra no log."""
+    print(f"[{level}] {key}{' ' + str(args) if args else ''}")
+
+def convert_file(input_path_str: str, output_path_str: str, options: Optional[ConversionOptions] = None,
+                 on_event: Callable = print_event, executor=None) -> bool:
+    """
+    Executa o pipeline de conversão, consultando antes o cache de conversões
+    (hash do conteúdo + configurações). Em caso de acerto o Markdown é copiado do cache.
+    Com executor (pool de processos de uma fila do lote, ver batch_engine.create_lane_executors), a conversão
+    roda em um processo do pool e os eventos são repassados a on_event ao final.
+    Retorna True se sucesso, False caso contrário.
+    """
+    if options is None:
+        options = ConversionOptions()
+    if executor is not None:
+        return _run_in_executor(executor, convert_file, (input_path_str, output_path_str), options, on_event)
+    cache = get_conversion_cache()
+    if cache is None or Path(input_path_str).suffix.lower() not in SUPPORTED_EXTENSIONS:
+        return _convert_file_uncached(input_path_str, output_path_str, options, on_event)
+
+    cache_key = None
+    try:
+        cache_key = make_cache_key(hash_file(input_path_str), options.cache_settings())
+        if cache.get(cache_key, output_path_str):
+            on_event(EVENT_SUCCESS, "cache_hit")
+            return True
+    except Exception as e:
+        print(f"Aviso: falha ao consultar o cache de conversões: {e}")
+
+    started_at = time.time()
+    success = _convert_file_uncached(input_path_str, output_path_str, options, on_event)
+    if success:
+        _store_in_cache(cache, cache_key, output_path_str, started_at, Path(input_path_str).name)
+    return success
+
+def convert_bytes(data: bytes, file_name: str, output_path_str: str, spool_dir: str,
+                  options: Optional[ConversionOptions] = None, on_event: Callable = print_event,
+                  executor=None) -> bool:
+    """
+    Converte um arquivo já em memória (ex.: download em streaming de arquivos pequenos).
+    Acertos no cache de conversões e PDFs totalmente digitais (MarkItDown a partir do stream) são resolvidos
+    direto dos bytes, sem gravar a entrada em disco; nos demais casos (OCR, outros formatos) a entrada é
+    gravada em spool_dir e apagada ao final. executor: ver convert_file.
+    Retorna True se sucesso, False caso contrário.
+    """
+    if options is None:
+        options = ConversionOptions()
+    if executor is not None:
+        return _run_in_executor(executor, convert_bytes, (data, file_name, output_path_str, spool_dir), options, on_event)
+    extension = Path(file_name).suffix.lower()
+    cache = get_conversion_cache() if extension in SUPPORTED_EXTENSIONS else None
+
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = make_cache_key(hashlib.sha256(data).hexdigest(), options.cache_settings())
+            if cache.get(cache_key, output_path_str):
+                on_event(EVENT_SUCCESS, "cache_hit")
+                return True
+        except Exception as e:
+            print(f"Aviso: falha ao consultar o cache de conversões: {e}")
+
+    started_at = time.time()
+    layout = None
+    if extension == '.pdf':
+        document = open_pdf_document(file_name, stream=data)
+        if document is None:
+            layout = (None, {})
+        else:
+            with document:
+                layout = detect_pdf_layout(file_name, document=document)
+                if layout[0] == PDF_DIGITAL:
+                    on_event(EVENT_SUCCESS, "pdf_digital_detected")
+                    extract_structured_markitdown(file_name, output_path_str, stream=data, document=document)
+                    _store_in_cache(cache, cache_key, output_path_str, started_at, file_name)
+                    return True
+
+    spool_path = Path(spool_dir) / file_name
+    spool_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        spool_path.write_bytes(data)
+        success = _convert_file_uncached(str(spool_path), output_path_str, options, on_event, layout=layout)
+    finally:
+        try:
+            spool_path.unlink()
+        except OSError:
+            pass
+    if success:
+        _store_in_cache(cache, cache_key, output_path_str, started_at, file_name)
+    return success
+
+def _run_in_executor(executor, converter: Callable, args: tuple, options: ConversionOptions, on_event: Callable) -> bool:
+    """Executa converter(*args) em um processo do executor e repassa os eventos coletados lá a on_event."""
+    success, events = executor.submit(_convert_in_worker, converter, args, options.to_dict()).result()
+    for level, key, event_args in events:
+        on_event(level, key, *event_args)
+    return success
+
+def _convert_in_worker(converter: Callable, args: tuple, options_data: dict) -> tuple:
+    """Lado do processo de _run_in_executor: retorna (sucesso, [(nivel, chave, args)])."""
+    events = []
+
+    def on_event(level, key, *event_args):
+        events.append((level, key, event_args))
+
+    return converter(*args, ConversionOptions.from_dict(options_data), on_event=on_event), events
+
+def _store_in_cache(cache, cache_key: Optional[str], output_path_str: str, started_at: float, source_name: str):
+    """Armazena no cache uma saída gerada nesta execução (evita cachear um arquivo antigo)."""
+    if cache is None or not cache_key:
+        return
+    if os.path.exists(output_path_str) and os.path.getmtime(output_path_str) >= started_at - 1:
+        try:
+            cache.put(cache_key, output_path_str, source_name=source_name)
+        except Exception as e:
+            print(f"Aviso: falha ao gravar no cache de conversões: {e}")
+
+def _convert_file_uncached(input_path_str: str, output_path_str: str, options: ConversionOptions,
+                           on_event: Callable, layout: Optional[tuple] = None) -> bool:
+    """
+    Executa o pipeline de conversão (Core Logic).
+    Retorna True se sucesso, False caso contrário.
+    """
+    input_path = Path(input_path_str)
+    file_extension = input_path.suffix.lower()
+    gemini_key, force_gemini = options.gemini_key, options.force_gemini
+    confidence_threshold = options.confidence_threshold
+
+    # --- LÓGICA CORE DE PROCESSAMENTO ---
+    if file_extension == '.pdf':
+        # Detecção por amostragem, confirmada pelos sinais baratos de todas as páginas: PDFs totalmente
+        # digitais seguem pelo MarkItDown (títulos, listas e tabelas), sem ler o texto de cada página; nos
+        # mistos, o texto lido na classificação é reaproveitado nas páginas digitais da extração híbrida.
+        # O documento aberto na detecção é reaproveitado pelo fallback do MarkItDown e fechado antes do OCR.
+        document = open_pdf_document(input_path_str) if layout is None else None
+        try:
+            if layout is None:
+                layout = detect_pdf_layout(input_path_str, document=document) if document is not None else (None, {})
+            verdict, text_layer = layout
+
+            if verdict == PDF_DIGITAL:
+                on_event(EVENT_SUCCESS, "pdf_digital_detected")
+                extract_structured_markitdown(input_path_str, output_path_str, document=document)
+        finally:
+            if document is not None:
+                document.close()
+
+        if verdict != PDF_DIGITAL:
+            # PDF misto ou escaneado: texto nativo onde existe, OCR apenas nas páginas escaneadas
+            text_pages = sum(1 for text in text_layer.values() if text is not None)
+            scanned_pages = len(text_layer) - text_pages
+            if text_pages > 0:
+                on_event(EVENT_INFO, "pdf_hybrid_detected", text_pages, scanned_pages)
+            else:
+                on_event(EVENT_WARNING, "pdf_scanned_detected")
+
+            report = extract_pdf_hybrid(input_path_str, output_path_str, gemini_key, force_gemini,
+                                        text_layer=text_layer, confidence_threshold=confidence_threshold,
+                                        ocr_workers=options.ocr_workers)
+
+            if report is None:
+                on_event(EVENT_ERROR, "gemini_processing_failure" if gemini_key else "pdf_processing_failure")
+                return False
+
+            if report["ocr_pages"]:
+                if report["tesseract_pages"]:
+                    on_event(EVENT_SUCCESS, "tesseract_success")
+                elif not force_gemini:
+                    # Com Forçar Gemini o Tesseract só roda nas páginas em que o Gemini falhar
+                    on_event(EVENT_ERROR, "tesseract_failure")
+
+                if report["escalated_pages"]:
+                    if force_gemini or not report["tesseract_pages"]:
+                        on_event(EVENT_INFO, "initiating_gemini_ocr")
+                    else:
+                        on_event(EVENT_INFO, "gemini_escalated_pages", len(report["escalated_pages"]), confidence_threshold)
+                    if report["gemini_pages"]:
+                        on_event(EVENT_SUCCESS, "gemini_processing_success")
+                    else:
+                        on_event(EVENT_ERROR, "gemini_processing_failure")
+                elif report["low_confidence_pages"]:
+                    on_event(EVENT_WARNING, "low_confidence_pages_warning", len(report["low_confidence_pages"]))
+
+            if text_pages > 0:
+                on_event(EVENT_SUCCESS, "pdf_hybrid_success")
+
+    elif file_extension in SUPPORTED_EXTENSIONS:
+        # Extração direta via MarkItDown para outros formatos
+        on_event(EVENT_SUCCESS, "markitdown_extraction", file_extension)
+        extract_structured_markitdown(input_path_str, output_path_str)
+
+    else:
+        on_event(EVENT_ERROR, "unsupported_format", file_extension)
+        return False
+
+    return True
@@ -0,0 +1,281 @@
+# folder_watcher.py
+#
+# Modo de monitoramento de pastas (watchdog): documentos novos ou alterados são convertidos assim que
+# terminam de ser gravados, com o NomeOriginalMD.md salvo ao lado do original. Usa o mesmo manifesto
+# incremental dos lotes (batch_manifest): ao iniciar, converte o que mudou enquanto o monitor estava parado.
+#
+# Uso: python cli.py watch pasta1/ pasta2/ [--debounce 2] [--polling] [--cpu-workers 2] [--io-workers 4]
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+from engine import SUPPORTED_EXTENSIONS, EVENT_ERROR, ConversionOptions, convert_file
+from batch_engine import (INTERNAL_FILE_NAMES, LANE_IO, batch_output_path, conversion_lane, create_lane_executors,
+                          ocr_workers_per_file, resolve_batch_workers, scan_directory, shutdown_lane_executors)
+from batch_manifest import BatchManifest, engine_signature, fingerprint_file, fingerprint_files, hash_output
+from translations import translate
+
+# Segundos sem novos eventos (e com tamanho/mtime estáveis) antes de converter um arquivo ainda em gravação.
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "2"))
+
+# Intervalo (s) de verificação dos arquivos aguardando o debounce
+SCHEDULER_INTERVAL = 0.25
+
+STATUS_CONVERTED = "converted"
+STATUS_FAILED = "failed"
+
+
+def _stat_signature(path: Path) -> Optional[tuple]:
+    try:
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+class _WatchEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "FolderWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        if event.event_type in ("deleted", "moved"):
+            # Origem apagada ou renomeada (arquivo ou pasta): sai do manifesto, junto com a saída gerada
+            self.watcher.forget(Path(os.fsdecode(event.src_path)))
+        if event.is_directory or event.event_type == "deleted":
+            return
+        # Em renomeações (ex.: arquivo temporário -> nome final) interessa o destino
+        path = getattr(event, "dest_path", "") or event.src_path
+        self.watcher.schedule(Path(os.fsdecode(path)))
+
+
+class FolderWatcher:
+    """
+    Monitora pastas e converte documentos suportados com concorrência limitada (filas de CPU e E/S,
+    como em batch_engine.run_batch). Cada arquivo só é convertido depois de `debounce` segundos sem
+    eventos e com tamanho e mtime inalterados, evitando ler arquivos ainda em cópia/digitalização.
+
+    on_result(resultado) recebe {"input", "output", "status", "error", "seconds", "messages"}
+    (mesmo formato de cli.convert_paths) a cada arquivo convertido ou com erro.
+    """
+
+    def __init__(self, roots: Iterable[str], options: Optional[ConversionOptions] = None,
+                 cpu_workers: Optional[int] = None, io_workers: Optional[int] = None,
+                 debounce: float = WATCH_DEBOUNCE_SECONDS, polling: bool = False,
+                 lang: str = 'pt', on_result: Optional[Callable[[dict], None]] = None):
+        self.roots = [Path(root).resolve() for root in roots]
+        self.debounce = max(0.0, debounce)
+        self.polling = polling
+        self.lang = lang
+        self.on_result = on_result
+
+        self.cpu_workers, self.io_workers = resolve_batch_workers(cpu_workers, io_workers)
+        self.options = ConversionOptions.from_dict(options.to_dict() if options else {})
+        if self.options.ocr_workers is None:
+            self.options.ocr_workers = ocr_workers_per_file(self.cpu_workers)
+        self.signature = engine_signature(self.options)
+
+        self.manifests = {root: BatchManifest(root) for root in self.roots}
+        self._lock = threading.Lock()
+        self._waiting = {}      # arquivo -> [prazo, (tamanho, mtime) no último evento]
+        self._in_flight = set()
+        self._dirty = set()     # alterados de novo durante a conversão: voltam para a espera ao terminar
+        self._stop = threading.Event()
+        self._observer = None
+        self._scheduler = None
+        self._cpu_pool = None
+        self._io_pool = None
+        self._executors = {}    # processos de cada fila; as threads de _cpu_pool/_io_pool só aguardam o resultado
+
+    def _root_of(self, path: Path) -> Optional[Path]:
+        for root in sorted(self.roots, key=lambda r: len(r.parts), reverse=True):
+            if path == root or root in path.parents:
+                return root
+        return None
+
+    def schedule(self, path: Path):
+        """Registra um evento: o arquivo (re)inicia a contagem do debounce."""
+        if path.suffix.lower() not in SUPPORTED_EXTENSIONS or path.name in INTERNAL_FILE_NAMES:
+            return
+        path = path.resolve()
+        if self._root_of(path) is None:
+            return
+        with self._lock:
+            self._waiting[path] = [time.monotonic() + self.debounce, _stat_signature(path)]
+
+    def forget(self, path: Path):
+        """
+        Registra uma exclusão: as origens apagadas no arquivo ou pasta `path` saem do manifesto (sob o lock)
+        e suas saídas não editadas são apagadas (fora dele), como na varredura de start().
+        """
+        path = path.resolve()
+        root = self._root_of(path)
+        if root is None or path == root:
+            return
+        manifest = self.manifests[root]
+        with self._lock:
+            self._waiting.pop(path, None)
+            deleted = manifest.pop_deleted([], under=path)
+            if deleted:
+                manifest.save()
+        for source, output in manifest.remove_outputs(deleted):
+            print(f"Monitor | {source} apagado; saída removida: {output}")
+
+    def start(self):
+        """Converte o que mudou desde a última execução e passa a monitorar as pastas."""
+        self._cpu_pool = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="watch-cpu")
+        self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="watch-io")
+        self._executors = create_lane_executors(self.cpu_workers, self.io_workers)
+
+        # Observador antes da varredura inicial: nada gravado durante a varredura é perdido
+        self._observer = PollingObserver() if self.polling else Observer()
+        handler = _WatchEventHandler(self)
+        for root in self.roots:
+            self._observer.schedule(handler, str(root), recursive=True)
+        self._observer.start()
+
+        for root, manifest in self.manifests.items():
+            files = scan_directory(root, SUPPORTED_EXTENSIONS)
+            with self._lock:
+                deleted = manifest.pop_deleted(files)
+            for source, output in manifest.remove_outputs(deleted):
+                print(f"Monitor | {source} apagado; saída removida: {output}")
+            pending = self._plan(manifest, files)
+            with self._lock:
+                manifest.save()
+            for path in pending:
+                self._submit(path.resolve())
+            print(f"Monitor | {root}: {len(files)} arquivos, {len(pending)} a converter. Aguardando novos documentos...")
+
+        self._scheduler = threading.Thread(target=self._scheduler_loop, name="watch-scheduler", daemon=True)
+        self._scheduler.start()
+
+    def stop(self):
+        """Para o monitoramento; conversões em andamento terminam, as que aguardavam são descartadas."""
+        self._stop.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+        if self._scheduler:
+            self._scheduler.join()
+        for pool in (self._cpu_pool, self._io_pool):
+            if pool:
+                pool.shutdown(wait=True, cancel_futures=True)
+        shutdown_lane_executors(self._executors, cancel_futures=True)
+        with self._lock:
+            for manifest in self.manifests.values():
+                manifest.save()
+
+    def run_forever(self):
+        """start() e bloqueia até Ctrl+C / SIGTERM (KeyboardInterrupt), encerrando de forma limpa."""
+        self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        finally:
+            self.stop()
+
+    def _scheduler_loop(self):
+        while not self._stop.wait(SCHEDULER_INTERVAL):
+            now = time.monotonic()
+            ready = []
+            with self._lock:
+                for path, (deadline, signature) in list(self._waiting.items()):
+                    if deadline > now:
+                        continue
+                    current = _stat_signature(path)
+                    if current is None:
+                        del self._waiting[path]
+                    elif current != signature:
+                        # Ainda em gravação: aguarda mais um intervalo de debounce
+                        self._waiting[path] = [now + self.debounce, current]
+                    else:
+                        del self._waiting[path]
+                        ready.append(path)
+            for path in ready:
+                self._submit(path)
+
+    def _plan(self, manifest: BatchManifest, files: list) -> list:
+        """
+        Arquivos a converter (manifest.plan). Os hashes são calculados fora do lock, que só protege o
+        dicionário do manifesto: conversões e eventos não esperam pela leitura de arquivos grandes.
+        """
+        with self._lock:
+            stale = manifest.stale_files(files, batch_output_path)
+        fingerprints = fingerprint_files(stale)
+        output_hashes = {batch_output_path(path): hash_output(batch_output_path(path)) for path in stale}
+        with self._lock:
+            to_convert, _ = manifest.plan(files, batch_output_path, fingerprints=fingerprints,
+                                          output_hashes=output_hashes)
+        return to_convert
+
+    def _submit(self, path: Path):
+        with self._lock:
+            if path in self._in_flight:
+                self._dirty.add(path)
+                return
+            self._in_flight.add(path)
+        pool = self._io_pool if conversion_lane(path.name, self.options) == LANE_IO else self._cpu_pool
+        try:
+            pool.submit(self._process, path)
+        except RuntimeError:
+            # Pool já encerrado (stop() em andamento)
+            with self._lock:
+                self._in_flight.discard(path)
+
+    def _process(self, path: Path):
+        root = self._root_of(path)
+        manifest = self.manifests[root]
+        output_path = batch_output_path(path)
+        try:
+            # Eventos sem mudança de conteúdo (ex.: touch, chmod) não reconvertem o arquivo
+            if not self._plan(manifest, [path]):
+                return
+            self._convert(path, output_path, manifest)
+        except Exception as e:
+            print(f"Monitor | erro em {path}: {e}")
+            self._emit(path, output_path, False, str(e), 0.0, [])
+        finally:
+            with self._lock:
+                self._in_flight.discard(path)
+                if path in self._dirty:
+                    self._dirty.discard(path)
+                    self._waiting[path] = [time.monotonic() + self.debounce, _stat_signature(path)]
+
+    def _convert(self, path: Path, output_path: Path, manifest: BatchManifest):
+        messages = []
+
+        def on_event(level, key, *args):
+            message = translate(key, self.lang, *args)
+            print(f"{path.name} | {message}")
+            messages.append({"level": level, "message": message})
+
+        started = time.monotonic()
+        fingerprint = fingerprint_file(path)
+        executor = self._executors.get(conversion_lane(path.name, self.options))
+        success = convert_file(str(path), str(output_path), self.options, on_event=on_event, executor=executor)
+        if success:
+            output_hash = hash_output(output_path)
+            with self._lock:
+                manifest.record(path, fingerprint, output_path, engine=self.signature, output_hash=output_hash)
+                manifest.save()
+        error = None if success else ("; ".join(m["message"] for m in messages if m["level"] == EVENT_ERROR) or None)
+        self._emit(path, output_path, success, error, time.monotonic() - started, messages)
+
+    def _emit(self, path: Path, output_path: Path, success: bool, error: Optional[str], seconds: float, messages: list):
+        if not self.on_result:
+            return
+        result = {"input": str(path), "output": str(output_path),
+                  "status": STATUS_CONVERTED if success else STATUS_FAILED,
+                  "error": error, "seconds": round(seconds, 3), "messages": messages}
+        with self._lock:
+            self.on_result(result)
@@ -4,10 +4,19 @@ import os
 import sys
 import google.generativeai as genai
 from pdf2image import convert_from_path, pdfinfo_from_path
+try:
+    import fitz # PyMuPDF
+except ImportError:
+    fitz = None
 import pytesseract
 from PIL import Image
-from typing import List
+from typing import Dict, List, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from rate_limiter import RateLimiter, call_with_retries
+from conversion_cache import get_page_cache, hash_page_image
 
 # --- Configuração de Caminhos para Executáveis (Poppler e Tesseract) ---
 # O PyInstaller define _MEIPASS para o caminho da pasta temporária de extração.
@@ -23,11 +32,202 @@ if (BIN_PATH / "tesseract.exe").exists():
     pytesseract.pytesseract.tesseract_cmd = str(BIN_PATH / "tesseract.exe")
 # ----------------------------------------------------------------------
 
+# DPI 300 é um bom equilíbrio para OCR de documentos jurídicos
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+
+# Backend de renderização das páginas: 'pymupdf' (em processo) ou 'poppler' (pdf2image, subprocesso).
+RASTER_BACKEND = os.getenv("RASTER_BACKEND", "pymupdf")
+
+# Modo de cor das páginas renderizadas para o Tesseract: 'gray' (suficiente para OCR), 'rgb' ou 'bilevel'.
+RASTER_COLOR_MODE = os.getenv("RASTER_COLOR_MODE", "gray")
+
+# Modo de cor das páginas enviadas ao Gemini (Forçar Gemini e páginas escaladas): 'rgb' preserva carimbos,
+# assinaturas e realces coloridos, que o modelo usa para entender a página; 'gray' reduz o envio.
+GEMINI_RASTER_COLOR_MODE = os.getenv("GEMINI_RASTER_COLOR_MODE", "rgb")
+
+# Quantas páginas são renderizadas por chamada ao Poppler (janela limitada de memória).
+OCR_RENDER_WINDOW = max(1, int(os.getenv("OCR_RENDER_WINDOW", "1")))
+
+# Idioma do Tesseract ('por' para português).
+TESSERACT_LANG = os.getenv("TESSERACT_LANG", "por")
+
+# Processos de OCR em paralelo (0 = automático, um por núcleo).
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))
+
+# Teto de memória (MB) para o conjunto de workers de OCR (0 = sem limite). O padrão comporta ~20 workers
+# a 300 DPI em cinza (~180 MB cada) e evita que máquinas com muitos núcleos esgotem a memória.
+OCR_MAX_MEMORY_MB = int(os.getenv("OCR_MAX_MEMORY_MB", "4096"))
+
+# Confiança mínima (0-100) do Tesseract por página; abaixo disso a página é reenviada ao Gemini.
+OCR_CONFIDENCE_THRESHOLD = float(os.getenv("OCR_CONFIDENCE_THRESHOLD", "70"))
+
+# Modelo Gemini usado no OCR em nuvem.
+GEMINI_MODEL = os.getenv("GEMINI_OCR_MODEL", "gemini-2.5-flash")
+
+# Requisições de página simultâneas ao Gemini.
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+
+# Orçamento de requisições e tokens por minuto do Gemini (0 = sem limite).
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "0"))
+
+# Novas tentativas para erros transitórios (429/5xx/timeouts) por página.
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+
+# Tokens de saída esperados por página (usado na estimativa do orçamento de TPM).
+GEMINI_EXPECTED_OUTPUT_TOKENS = 1500
+
+# Consumo base aproximado (MB) de um processo Tesseract, além da imagem da página.
+TESSERACT_BASE_MEMORY_MB = 150
+
+
+def _resolve_raster_backend(backend: Optional[str] = None) -> str:
+    """Backend efetivo de renderização: PyMuPDF quando disponível, senão Poppler."""
+    backend = (backend or RASTER_BACKEND).lower()
+    if backend == "pymupdf" and fitz is None:
+        return "poppler"
+    return backend
+
+def get_pdf_page_count(pdf_path: str, backend: Optional[str] = None) -> int:
+    """
+    Retorna o número de páginas do PDF (PyMuPDF em processo, ou pdfinfo do Poppler),
+    ou 0 se o PDF não puder ser lido.
+    """
+    pdf_filename = os.path.basename(pdf_path)
+    if _resolve_raster_backend(backend) == "pymupdf":
+        try:
+            with fitz.open(pdf_path) as doc:
+                total_pages = doc.page_count
+            if total_pages == 0:
+                print(f"Nenhuma página encontrada no PDF '{pdf_filename}'.")
+            return total_pages
+        except Exception as e:
+            print(f"Aviso: PyMuPDF não conseguiu abrir '{pdf_filename}' ({e}). Tentando via Poppler...")
+
+    try:
+        info = pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH)
+        total_pages = int(info.get("Pages", 0))
+    except Exception as e:
+        print(f"Erro Crítico ao ler o PDF '{pdf_filename}'. Verifique a instalação do Poppler e o caminho POPPLER_PATH.")
+        print(f"Detalhe do erro: {e}")
+        return 0
+    if total_pages == 0:
+        print(f"Nenhuma página encontrada no PDF '{pdf_filename}'.")
+    return total_pages
+
+def _pixmap_to_pil(pix) -> Image.Image:
+    """Converte um Pixmap do PyMuPDF (cinza ou RGB, sem alfa) em imagem PIL, direto da memória."""
+    mode = "L" if pix.n == 1 else "RGB"
+    img = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+    # frombuffer referencia a memória do Pixmap: copia para que a imagem sobreviva ao Pixmap
+    return img.copy()
+
+def _render_page_pymupdf(doc, page_num: int, dpi: int, color_mode: str) -> Image.Image:
+    """Renderiza uma página (1-based) de um documento PyMuPDF já aberto como imagem PIL."""
+    colorspace = fitz.csRGB if color_mode == "rgb" else fitz.csGRAY
+    pix = doc[page_num - 1].get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False)
+    img = _pixmap_to_pil(pix)
+    del pix
+    if color_mode == "bilevel":
+        bilevel = img.convert("1")
+        img.close()
+        img = bilevel
+    return img
+
+def _iter_pages_pymupdf(pdf_path: str, pages: List[int], dpi: int, color_mode: str) -> Iterator[Tuple[int, Image.Image]]:
+    """Renderiza as páginas em processo com fitz.Page.get_pixmap (sem subprocessos nem arquivos temporários)."""
+    with fitz.open(pdf_path) as doc:
+        for page_num in pages:
+            img = _render_page_pymupdf(doc, page_num, dpi, color_mode)
+            try:
+                yield page_num, img
+            finally:
+                img.close()
+
+def _iter_pages_poppler(pdf_path: str, pages: List[int], dpi: int, color_mode: str,
+                        window: int) -> Iterator[Tuple[int, Image.Image]]:
+    """Renderiza as páginas via pdf2image/Poppler, em janelas de páginas consecutivas."""
+    pdf_filename = os.path.basename(pdf_path)
+    # Agrupa páginas consecutivas em janelas para reduzir o número de chamadas ao Poppler
+    start = 0
+    while start < len(pages):
+        end = start + 1
+        while end < len(pages) and end - start < window and pages[end] == pages[end - 1] + 1:
+            end += 1
+        first_page, last_page = pages[start], pages[end - 1]
+        start = end
+
+        try:
+            images = convert_from_path(pdf_path, poppler_path=POPPLER_PATH, dpi=dpi,
+                                       first_page=first_page, last_page=last_page,
+                                       grayscale=(color_mode != "rgb"))
+        except Exception as e:
+            print(f"Erro ao renderizar páginas {first_page}-{last_page} de '{pdf_filename}': {e}")
+            continue
+
+        try:
+            for offset, img in enumerate(images):
+                if color_mode == "bilevel":
+                    bilevel = img.convert("1")
+                    img.close()
+                    img = images[offset] = bilevel
+                yield first_page + offset, img
+                # Libera a página assim que o consumidor terminar de usá-la
+                img.close()
+        finally:
+            for img in images:
+                img.close()
+            del images
+
+def iter_pdf_pages(pdf_path: str, page_numbers: Optional[Iterable[int]] = None,
+                   dpi: int = OCR_DPI, window: int = OCR_RENDER_WINDOW,
+                   backend: Optional[str] = None, color_mode: str = RASTER_COLOR_MODE) -> Iterator[Tuple[int, Image.Image]]:
+    """
+    Gera as páginas do PDF como imagens PIL, uma janela de no máximo `window` páginas por vez.
+    Cada imagem é fechada assim que o consumidor avança para a próxima, mantendo o pico
+    de memória constante independentemente do tamanho do documento.
+
+    Args:
+        pdf_path: Caminho do PDF.
+        page_numbers: Páginas (1-based) a renderizar. Se None, todas as páginas.
+        dpi: Resolução de renderização.
+        window: Número máximo de páginas renderizadas simultaneamente (apenas Poppler;
+            o PyMuPDF renderiza sempre uma página por vez).
+        backend: 'pymupdf' (em processo, padrão) ou 'poppler'. Se o PyMuPDF falhar ao abrir
+            o arquivo, o Poppler é usado como fallback.
+        color_mode: 'gray', 'rgb' ou 'bilevel'.
+
+    Yields:
+        Tuplas (numero_da_pagina, imagem).
+    """
+    backend = _resolve_raster_backend(backend)
+    total_pages = get_pdf_page_count(pdf_path, backend=backend)
+
+    if page_numbers is None:
+        pages = list(range(1, total_pages + 1))
+    else:
+        pages = sorted(p for p in set(page_numbers) if 1 <= p <= total_pages)
+    if not pages:
+        return
+
+    if backend == "pymupdf":
+        rendered = 0
+        try:
+            for page_num, img in _iter_pages_pymupdf(pdf_path, pages, dpi, color_mode):
+                rendered += 1
+                yield page_num, img
+            return
+        except Exception as e:
+            print(f"Aviso: falha ao renderizar '{os.path.basename(pdf_path)}' com PyMuPDF ({e}). Usando Poppler...")
+            pages = pages[rendered:]
+
+    yield from _iter_pages_poppler(pdf_path, pages, dpi, color_mode, window)
 
 def pdf_to_pil_images(pdf_path: str) -> List[Image.Image]:
     """
     Converte um PDF em uma lista de imagens PIL usando pdf2image.
     Requer a instalação do Poppler no sistema ou no caminho POPPLER_PATH.
+    Atenção: mantém todas as páginas em memória; para OCR prefira iter_pdf_pages.
     """
     pdf_filename = os.path.basename(pdf_path)
     print(f"Convertendo PDF '{pdf_filename}' em imagens PIL (requer Poppler)...")
@@ -35,8 +235,7 @@ def pdf_to_pil_images(pdf_path: str) -> List[Image.Image]:
         # Tenta obter informações para checar se o PDF é válido
         pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH)
         
-        # DPI 300 é um bom equilíbrio para OCR de documentos jurídicos
-        images_from_path = convert_from_path(pdf_path, poppler_path=POPPLER_PATH, dpi=300)
+        images_from_path = convert_from_path(pdf_path, poppler_path=POPPLER_PATH, dpi=OCR_DPI)
         
         if not images_from_path:
             print(f"Nenhuma imagem gerada a partir do PDF '{pdf_filename}'.")
@@ -49,31 +248,210 @@ def pdf_to_pil_images(pdf_path: str) -> List[Image.Image]:
         print(f"Detalhe do erro: {e}")
         return []
 
-def ocr_local_tesseract(pdf_path: str, output_md: str) -> bool:
+def estimate_page_memory_mb(dpi: int = OCR_DPI) -> int:
+    """
+    Estima a memória (MB) que um worker de OCR consome para uma página A4 renderizada
+    no DPI e modo de cor configurados, somada ao consumo típico do próprio Tesseract.
+    """
+    width_px = int(8.27 * dpi)
+    height_px = int(11.69 * dpi)
+    bytes_per_pixel = 3 if RASTER_COLOR_MODE == "rgb" else 1
+    image_mb = (width_px * height_px * bytes_per_pixel) / (1024 * 1024)
+    # O Tesseract mantém cópias binarizadas e estruturas de layout (~3x a imagem) + overhead fixo
+    return int(image_mb * 4 + TESSERACT_BASE_MEMORY_MB)
+
+def resolve_ocr_workers(workers: Optional[int] = None, dpi: int = OCR_DPI) -> int:
+    """
+    Define quantos processos de OCR usar: valor explícito, OCR_WORKERS ou núcleos disponíveis,
+    limitado por OCR_MAX_MEMORY_MB para que mais workers não multipliquem o custo de renderização.
+    """
+    # No executável PyInstaller os processos filhos reiniciariam a aplicação: OCR sequencial
+    if getattr(sys, 'frozen', False):
+        return 1
+
+    if workers is None or workers <= 0:
+        workers = OCR_WORKERS if OCR_WORKERS > 0 else (os.cpu_count() or 1)
+
+    if OCR_MAX_MEMORY_MB > 0:
+        memory_bound = max(1, OCR_MAX_MEMORY_MB // max(1, estimate_page_memory_mb(dpi)))
+        workers = min(workers, memory_bound)
+
+    return max(1, workers)
+
+# Documento aberto uma única vez por processo do pool de OCR: (caminho, documento PyMuPDF ou None)
+_worker_pdf = None
+
+def _init_tesseract_worker(pdf_path: Optional[str] = None):
+    """
+    Inicializador dos processos do pool: evita que cada Tesseract abra várias threads OpenMP e abre
+    o PDF do pool uma única vez, para que cada página não reabra o arquivo nem reconte as páginas.
+    """
+    global _worker_pdf
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    if pdf_path is None or _resolve_raster_backend() != "pymupdf":
+        return
+    try:
+        _worker_pdf = (pdf_path, fitz.open(pdf_path))
+    except Exception as e:
+        # Sem documento aberto, _tesseract_page_worker renderiza pelo caminho normal (com fallback ao Poppler)
+        print(f"Aviso: PyMuPDF não conseguiu abrir '{os.path.basename(pdf_path)}' no worker de OCR ({e}).")
+        _worker_pdf = (pdf_path, None)
+
+def tesseract_image_to_scored_text(img: Image.Image, lang: str = TESSERACT_LANG) -> Tuple[str, float]:
+    """
+    Roda o Tesseract com image_to_data e retorna (texto, confiança da página).
+    O texto é remontado por bloco/parágrafo/linha, como no image_to_string.
+    A confiança (0-100) é a média da confiança por palavra, ponderada pelo tamanho da palavra;
+    páginas sem nenhuma palavra reconhecida recebem 0.
+    """
+    data = pytesseract.image_to_data(img, lang=lang, output_type=pytesseract.Output.DICT)
+
+    lines = {}
+    weighted_conf, total_chars = 0.0, 0
+    for i, word in enumerate(data['text']):
+        word = word.strip()
+        conf = float(data['conf'][i])
+        if not word or conf < 0:
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(key, []).append(word)
+        weighted_conf += conf * len(word)
+        total_chars += len(word)
+
+    paragraphs = []
+    previous_par = None
+    for key in sorted(lines):
+        par = key[:2]
+        if par != previous_par:
+            paragraphs.append([])
+            previous_par = par
+        paragraphs[-1].append(" ".join(lines[key]))
+
+    text = "\n\n".join("\n".join(par_lines) for par_lines in paragraphs)
+    confidence = weighted_conf / total_chars if total_chars else 0.0
+    return text, confidence
+
+def cached_tesseract_scored_text(img: Image.Image, lang: str = TESSERACT_LANG) -> Tuple[str, float]:
+    """
+    Como tesseract_image_to_scored_text, consultando antes o cache de OCR por página
+    (hash da imagem renderizada): páginas repetidas no acervo não são reprocessadas.
+    """
+    page_cache = get_page_cache()
+    if page_cache is None:
+        return tesseract_image_to_scored_text(img, lang=lang)
+
+    engine = f"tesseract:{lang}"
+    image_hash = hash_page_image(img)
+    cached = page_cache.get(image_hash, engine)
+    if cached is not None:
+        return cached[0], cached[1] or 0.0
+
+    text, confidence = tesseract_image_to_scored_text(img, lang=lang)
+    page_cache.put(image_hash, engine, text, confidence)
+    return text, confidence
+
+def _tesseract_page_worker(pdf_path: str, page_num: int, dpi: int, lang: str) -> Tuple[int, str, float]:
+    """
+    Executado em um processo do pool: renderiza uma única página, roda o Tesseract e libera a imagem.
+    Cada worker mantém no máximo uma página em memória e reutiliza o documento aberto em _init_tesseract_worker.
+    """
+    doc = _worker_pdf[1] if _worker_pdf is not None and _worker_pdf[0] == pdf_path else None
+    if doc is not None:
+        if not 1 <= page_num <= doc.page_count:
+            return page_num, "", 0.0
+        try:
+            img = _render_page_pymupdf(doc, page_num, dpi, RASTER_COLOR_MODE)
+        except Exception as e:
+            print(f"Aviso: falha ao renderizar a página {page_num} de '{os.path.basename(pdf_path)}' com PyMuPDF ({e}). Usando Poppler...")
+            img = None
+        if img is not None:
+            try:
+                text, confidence = cached_tesseract_scored_text(img, lang=lang)
+            finally:
+                img.close()
+            return page_num, text, confidence
+        for _, img in _iter_pages_poppler(pdf_path, [page_num], dpi, RASTER_COLOR_MODE, 1):
+            text, confidence = cached_tesseract_scored_text(img, lang=lang)
+            return page_num, text, confidence
+        return page_num, "", 0.0
+
+    for _, img in iter_pdf_pages(pdf_path, page_numbers=[page_num], dpi=dpi):
+        text, confidence = cached_tesseract_scored_text(img, lang=lang)
+        return page_num, text, confidence
+    return page_num, "", 0.0
+
+def ocr_tesseract_pages_scored(pdf_path: str, page_numbers: Optional[Iterable[int]] = None,
+                               workers: Optional[int] = None, lang: str = TESSERACT_LANG) -> Dict[int, Tuple[str, float]]:
+    """
+    Roda o Tesseract nas páginas informadas (todas, se None) e retorna
+    {numero_da_pagina: (texto, confiança 0-100)}.
+    Com mais de um worker, as páginas são distribuídas em um pool de processos; cada processo
+    renderiza a própria página, então o pico de memória é de uma página por worker.
+    Exceções do Tesseract (ex.: TesseractNotFoundError) são propagadas ao chamador.
+    """
+    # Tesseract precisa saber onde está o tessdata (apenas se fornecido localmente em bin/tessdata)
+    if (BIN_PATH / "tessdata").exists():
+        os.environ['TESSDATA_PREFIX'] = str(BIN_PATH / "tessdata")
+
+    if page_numbers is None:
+        total_pages = get_pdf_page_count(pdf_path)
+        pages = list(range(1, total_pages + 1))
+    else:
+        pages = sorted(set(page_numbers))
+    if not pages:
+        return {}
+
+    workers = min(resolve_ocr_workers(workers), len(pages))
+    results = {}
+
+    if workers <= 1:
+        # Modo sequencial: páginas renderizadas sob demanda (uma janela por vez) e liberadas após o OCR
+        for done_count, (page_num, img) in enumerate(iter_pdf_pages(pdf_path, page_numbers=pages), start=1):
+            print(f"-> Tesseract processando página {page_num} ({done_count}/{len(pages)})...")
+            results[page_num] = cached_tesseract_scored_text(img, lang=lang)
+        return results
+
+    # Falha cedo (no processo principal) se o executável não estiver disponível
+    pytesseract.get_tesseract_version()
+
+    print(f"-> Tesseract em paralelo: {len(pages)} páginas em {workers} processos...")
+    # "spawn": o pool pode ser criado de um processo com outras threads ativas (filas do lote, Streamlit,
+    # monitor de pastas), e um fork nesse momento pode herdar locks já adquiridos
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_tesseract_worker, initargs=(pdf_path,)) as executor:
+        futures = [executor.submit(_tesseract_page_worker, pdf_path, page_num, OCR_DPI, lang) for page_num in pages]
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            page_num, text, confidence = future.result()
+            results[page_num] = (text, confidence)
+            print(f"-> Tesseract concluiu página {page_num} ({done_count}/{len(pages)})...")
+
+    # Devolve as páginas na ordem original do documento
+    return dict(sorted(results.items()))
+
+def ocr_tesseract_pages(pdf_path: str, page_numbers: Optional[Iterable[int]] = None,
+                        workers: Optional[int] = None, lang: str = TESSERACT_LANG) -> Dict[int, str]:
+    """
+    Como ocr_tesseract_pages_scored, mas retorna apenas {numero_da_pagina: texto}.
+    """
+    scored = ocr_tesseract_pages_scored(pdf_path, page_numbers=page_numbers, workers=workers, lang=lang)
+    return {page_num: text for page_num, (text, _) in scored.items()}
+
+def ocr_local_tesseract(pdf_path: str, output_md: str, workers: Optional[int] = None) -> bool:
     """
     Roda OCR em um PDF escaneado usando Tesseract (local).
+    Args:
+        workers: Número de processos de OCR (None = OCR_WORKERS ou núcleos disponíveis).
     """
     pdf_filename = os.path.basename(pdf_path)
     print(f"Iniciando OCR local com Tesseract para {pdf_filename}...")
     
-    # Reutilizamos a função de conversão para imagens
-    pil_images = pdf_to_pil_images(pdf_path)
-    if not pil_images:
-        return False
-        
-    full_markdown_content = []
-    
     try:
-        # Tesseract precisa saber onde está o tessdata (apenas se fornecido localmente em bin/tessdata)
-        if (BIN_PATH / "tessdata").exists():
-            os.environ['TESSDATA_PREFIX'] = str(BIN_PATH / "tessdata")
+        page_texts = ocr_tesseract_pages(pdf_path, workers=workers)
         
-        for i, img in enumerate(pil_images):
-            page_num = i + 1
-            print(f"-> Tesseract processando página {page_num}/{len(pil_images)}...")
-            
-            # lang='por' para português.
-            text = pytesseract.image_to_string(img, lang='por')
+        full_markdown_content = []
+        # Reordena as páginas (o modo paralelo conclui fora de ordem)
+        for page_num in sorted(page_texts):
+            text = page_texts[page_num]
             
             if text.strip():
                 # Formatação simples em Markdown
@@ -99,79 +477,180 @@ def ocr_local_tesseract(pdf_path: str, output_md: str) -> bool:
         print(f"Erro durante o OCR local com Tesseract: {e}")
         return False
 
-def extract_ocr_to_markdown_gemini(pdf_path: str, output_md: str, api_key: str):
+_gemini_rate_limiter = None
+_gemini_rate_limiter_lock = threading.Lock()
+
+def get_gemini_rate_limiter() -> RateLimiter:
     """
-    Roda OCR e extração estruturada em um PDF escaneado usando Gemini Multimodal,
-    processando uma página por vez para evitar bloqueios de conteúdo em documentos longos.
+    Retorna o limitador de taxa do Gemini compartilhado pelo processo (GEMINI_RPM / GEMINI_TPM),
+    para que arquivos processados em paralelo dividam o mesmo orçamento.
     """
-    pdf_filename = os.path.basename(pdf_path)
+    global _gemini_rate_limiter
+    with _gemini_rate_limiter_lock:
+        if _gemini_rate_limiter is None:
+            _gemini_rate_limiter = RateLimiter(GEMINI_RPM, GEMINI_TPM)
+        return _gemini_rate_limiter
+
+def set_gemini_rate_limiter_share(share: float):
+    """
+    Limita este processo a uma fração do orçamento do Gemini (ex.: processos das filas dos lotes,
+    cada um com o próprio limitador, dividem GEMINI_RPM / GEMINI_TPM entre si). Limites 0 continuam sem limite.
+    """
+    global _gemini_rate_limiter
+    rpm = max(1, int(GEMINI_RPM * share)) if GEMINI_RPM > 0 else 0
+    tpm = max(1, int(GEMINI_TPM * share)) if GEMINI_TPM > 0 else 0
+    with _gemini_rate_limiter_lock:
+        _gemini_rate_limiter = RateLimiter(rpm, tpm)
+
+def _estimate_gemini_tokens(img: Image.Image) -> int:
+    """
+    Estima os tokens de uma requisição de OCR: a imagem é cobrada em blocos de 768x768 px
+    (258 tokens cada), somada ao prompt e a uma resposta típica de uma página.
+    """
+    tiles = max(1, -(-img.width // 768)) * max(1, -(-img.height // 768))
+    return tiles * 258 + GEMINI_EXPECTED_OUTPUT_TOKENS
+
+def _gemini_ocr_page(model, img_page: Image.Image, page_num: int, limiter: RateLimiter) -> str:
+    """
+    Envia uma página ao Gemini respeitando o orçamento de taxa e repetindo erros transitórios
+    (429/5xx/timeouts) com backoff. Retorna o Markdown extraído (pode ser vazio).
+    """
+    prompt_text = f"""
+    A imagem a seguir é a página {page_num} de um documento.
     
-    # 1. Configuração do Gemini
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name="gemini-2.5-flash")
-    except Exception as e:
-        print(f"Erro ao configurar SDK Gemini: {e}")
-        return False
+    Sua única tarefa é realizar o OCR e extrair todo o conteúdo textual desta imagem.
+    
+    Preserve a estrutura original (parágrafos, títulos, listas, tabelas, etc.).
+    
+    Formate a saída inteiramente em Markdown. Use cabeçalhos (#, ##, ###) para títulos e seções.
+    
+    Não inclua nenhuma explicação, introdução, ou texto adicional antes ou depois do conteúdo Markdown.
+    
+    Gere o conteúdo Markdown para a Página {page_num}:
+    """
+    
+    content_parts = [prompt_text, img_page]
+    estimated_tokens = _estimate_gemini_tokens(img_page)
 
-    # 2. Conversão para Imagens
-    pil_images = pdf_to_pil_images(pdf_path)
-    if not pil_images:
-        return False
+    def _request():
+        reservation = limiter.acquire(estimated_tokens)
+        response = model.generate_content(
+            content_parts,
+            generation_config=genai.types.GenerationConfig(),
+            request_options={"timeout": 120} # 2 minutos de timeout por página
+        )
+        usage = getattr(response, 'usage_metadata', None)
+        limiter.settle(reservation, getattr(usage, 'total_token_count', None))
+        return response
 
-    full_markdown_content = []
+    response = call_with_retries(_request, max_retries=GEMINI_MAX_RETRIES, label=f"Gemini página {page_num}")
+    markdown_content = response.text.strip()
     
-    # 3. Processamento Página por Página
-    for i, img_page in enumerate(pil_images):
-        page_num = i + 1
-        print(f"-> Processando página {page_num}/{len(pil_images)}...")
-        
-        prompt_text = f"""
-        A imagem a seguir é a página {page_num} de um documento.
-        
-        Sua única tarefa é realizar o OCR e extrair todo o conteúdo textual desta imagem.
-        
-        Preserve a estrutura original (parágrafos, títulos, listas, tabelas, etc.).
-        
-        Formate a saída inteiramente em Markdown. Use cabeçalhos (#, ##, ###) para títulos e seções.
-        
-        Não inclua nenhuma explicação, introdução, ou texto adicional antes ou depois do conteúdo Markdown.
-        
-        Gere o conteúdo Markdown para a Página {page_num}:
-        """
-        
-        content_parts = [prompt_text, img_page]
-        
+    # Limpeza: Remove blocos de código Markdown (```markdown ... ```) se o Gemini os adicionar
+    if markdown_content.lower().startswith("```markdown"):
+        markdown_content = markdown_content[len("```markdown"):].strip()
+    if markdown_content.endswith("```"):
+        markdown_content = markdown_content[:-len("```")].strip()
+
+    return markdown_content
+
+def ocr_gemini_pages(pdf_path: str, api_key: str, page_numbers: Optional[Iterable[int]] = None,
+                     concurrency: Optional[int] = None) -> Tuple[Dict[int, str], Dict[int, str]]:
+    """
+    Roda OCR via Gemini nas páginas informadas (todas, se None), mantendo até `concurrency`
+    requisições em andamento. Apenas essas páginas ficam renderizadas em memória ao mesmo tempo.
+
+    Returns:
+        (paginas, falhas): {numero_da_pagina: markdown} para páginas extraídas e
+        {numero_da_pagina: bloco_markdown_de_erro} para páginas que falharam após as tentativas.
+        Erros de configuração do SDK são propagados ao chamador.
+    """
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(model_name=GEMINI_MODEL)
+    limiter = get_gemini_rate_limiter()
+
+    if page_numbers is None:
+        total_pages = get_pdf_page_count(pdf_path)
+        pages = list(range(1, total_pages + 1))
+    else:
+        pages = sorted(set(page_numbers))
+
+    concurrency = max(1, concurrency or GEMINI_CONCURRENCY)
+    results, failures = {}, {}
+    # Limita as páginas renderizadas aguardando/em envio ao número de requisições simultâneas
+    in_flight = threading.BoundedSemaphore(concurrency)
+
+    page_cache = get_page_cache()
+    engine = f"gemini:{GEMINI_MODEL}"
+
+    def _process(page_num, img_page):
         try:
-            generation_config = genai.types.GenerationConfig()
-            
-            response = model.generate_content(
-                content_parts,
-                generation_config=generation_config,
-                request_options={"timeout": 120} # 2 minutos de timeout por página
-            )
-            
-            markdown_content = response.text.strip()
-            
-            # Limpeza: Remove blocos de código Markdown (```markdown ... ```) se o Gemini os adicionar
-            if markdown_content.lower().startswith("```markdown"):
-                markdown_content = markdown_content[len("```markdown"):].strip()
-            if markdown_content.endswith("```"):
-                markdown_content = markdown_content[:-len("```")].strip()
+            # Páginas já extraídas pelo Gemini (em qualquer documento) não são reenviadas
+            image_hash = hash_page_image(img_page) if page_cache is not None else None
+            if image_hash:
+                cached = page_cache.get(image_hash, engine)
+                if cached is not None:
+                    print(f"-> Página {page_num} reaproveitada do cache de OCR (Gemini).")
+                    return cached[0]
+
+            markdown_content = _gemini_ocr_page(model, img_page, page_num, limiter)
+            if image_hash and markdown_content:
+                page_cache.put(image_hash, engine, markdown_content)
+            return markdown_content
+        finally:
+            img_page.close()
+            in_flight.release()
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for page_num, img in iter_pdf_pages(pdf_path, page_numbers=pages, color_mode=GEMINI_RASTER_COLOR_MODE):
+            in_flight.acquire()
+            print(f"-> Enviando página {page_num} ao Gemini ({len(futures) + 1}/{len(pages)})...")
+            # Cópia própria da página: o gerador libera a original ao avançar
+            futures[executor.submit(_process, page_num, img.copy())] = page_num
+
+        for future in as_completed(futures):
+            page_num = futures[future]
+            try:
+                markdown_content = future.result()
+            except Exception as e:
+                print(f"Erro ao chamar a API Gemini para a página {page_num}: {e}")
+                # Se falhar, adiciona um placeholder de erro e continua para as próximas páginas
+                failures[page_num] = f"\n\n# ERRO DE API NA PÁGINA {page_num}: {e}\n\n"
+                continue
 
             if not markdown_content:
                 print(f"Alerta: Resposta do Gemini para a página {page_num} está vazia.")
-                full_markdown_content.append(f"\n\n# ERRO DE EXTRAÇÃO NA PÁGINA {page_num}\n\n")
+                failures[page_num] = f"\n\n# ERRO DE EXTRAÇÃO NA PÁGINA {page_num}\n\n"
             else:
-                # Adiciona um cabeçalho de página para estruturação
-                full_markdown_content.append(f"\n\n# PÁGINA {page_num}\n\n{markdown_content}")
+                results[page_num] = markdown_content
 
-        except Exception as e:
-            print(f"Erro ao chamar a API Gemini para a página {page_num}: {e}")
-            # Se falhar, adiciona um placeholder de erro e continua para a próxima página
-            full_markdown_content.append(f"\n\n# ERRO DE API NA PÁGINA {page_num}: {e}\n\n")
+    return dict(sorted(results.items())), failures
+
+def extract_ocr_to_markdown_gemini(pdf_path: str, output_md: str, api_key: str, concurrency: Optional[int] = None):
+    """
+    Roda OCR e extração estruturada em um PDF escaneado usando Gemini Multimodal,
+    processando cada página em uma requisição separada para evitar bloqueios de conteúdo em
+    documentos longos. Até `concurrency` páginas (GEMINI_CONCURRENCY) ficam em andamento ao mesmo tempo.
+    """
+    pdf_filename = os.path.basename(pdf_path)
+    
+    try:
+        pages, failures = ocr_gemini_pages(pdf_path, api_key, concurrency=concurrency)
+    except Exception as e:
+        print(f"Erro ao configurar SDK Gemini: {e}")
+        return False
+
+    # Reordena as páginas (as requisições concluem fora de ordem)
+    full_markdown_content = []
+    for page_num in sorted(set(pages) | set(failures)):
+        if page_num in pages:
+            # Adiciona um cabeçalho de página para estruturação
+            full_markdown_content.append(f"\n\n# PÁGINA {page_num}\n\n{pages[page_num]}")
+        else:
+            full_markdown_content.append(failures[page_num])
             
-    # 4. Salvar o resultado concatenado
+    # Salvar o resultado concatenado
     if full_markdown_content:
         final_output = "\n".join(full_markdown_content)
         with open(output_md, 'w', encoding='utf-8-sig') as f:
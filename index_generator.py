@@ -1,5 +1,10 @@
 import os
+import re
+import json
+import hashlib
 import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
@@ -8,154 +13,297 @@ from reportlab.lib import colors
 from reportlab.lib import colors
 # Use GeminiClient diretamente para maior robustez na sumarização simples
 from rlm.utils.llm import GeminiClient
+from rate_limiter import call_with_retries, is_retryable_api_error
+from gcv_ocr import GEMINI_MAX_RETRIES, get_gemini_rate_limiter
+from batch_engine import INDEX_CACHE_NAME
 
-def generate_index_for_folder(folder_path_str: str, api_key: str, recursive: bool = True) -> int:
-    """
-    Gera um índice semântico em PDF para a pasta especificada.
-    Analisa arquivos .md, gera resumos e keywords usando RLM.
-    Se recursive=True, processa subpastas também.
-    Retorna o número de arquivos .md indexados com sucesso.
-    """
-    folder_path = Path(folder_path_str)
-    if not folder_path.exists():
-        print(f"[ERROR] Pasta nao encontrada: {folder_path}")
-        return 0
+# Arquivos analisados em paralelo por indexação, somando todas as pastas da árvore. As requisições
+# dividem o orçamento do Gemini do processo (GEMINI_RPM / GEMINI_TPM, o mesmo do OCR em nuvem).
+INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", "4"))
 
-    print(f"[INDEX] Iniciando indexacao de: {folder_path.name}")
+INDEX_MODEL = "gemini-2.5-flash"
+INDEX_PDF_NAME = "_INDEX_CONTENT.pdf"
 
-    # 1. Identificar arquivos Markdown de forma case-insensitive e robusta na raiz desta pasta
-    # Ignora arquivos que começam com ponto ou underscore (como _INDEX, .git)
-    md_files = []
-    all_files = []
-    try:
-        if folder_path.is_dir():
-            all_files = [f for f in folder_path.iterdir() if f.is_file()]
-            for f in all_files:
-                if f.suffix.lower() == '.md' and not f.name.startswith("_") and not f.name.startswith("."):
-                    md_files.append(f)
-    except Exception as e_list:
-        print(f"[ERROR] Erro ao listar arquivos da pasta: {e_list}")
-        return 0
+# Cache incremental por pasta (INDEX_CACHE_NAME): hash do conteúdo analisado -> resumo e keywords.
+# Reindexar uma pasta só envia ao Gemini os Markdown novos ou alterados.
+INDEX_CACHE_VERSION = 1
+
+# Keywords de uma análise cuja resposta não era JSON válido (ver analyze_markdown). Essas análises vão para
+# o PDF, mas não para o cache: o arquivo é analisado de novo na próxima indexação.
+FALLBACK_KEYWORDS = "Tags não disponíveis."
+
+# Caracteres de cada Markdown enviados ao Gemini e tokens de resposta esperados (estimativa do orçamento de TPM)
+INDEX_MAX_CHARS = 30000
+INDEX_EXPECTED_OUTPUT_TOKENS = 300
+
+_thread_state = threading.local()
+
+
+def _list_markdown_files(folder_path: Path) -> list:
+    """
+    Arquivos Markdown de forma case-insensitive e robusta na raiz da pasta.
+    Ignora arquivos que começam com ponto ou underscore (como _INDEX, .git)
+    """
+    all_files = [f for f in folder_path.iterdir() if f.is_file()]
+    md_files = [f for f in all_files
+                if f.suffix.lower() == '.md' and not f.name.startswith("_") and not f.name.startswith(".")]
 
     # Fornecer avisos no console se existirem outros tipos de arquivos, mas nenhum .md
     if not md_files and all_files:
         non_md = [f for f in all_files if f.suffix.lower() != '.md' and not f.name.startswith("_") and not f.name.startswith(".")]
         if non_md:
-            print(f"[WARN] Nao foram encontrados arquivos .md para indexar. Existem {len(non_md)} outros arquivos (ex: {', '.join(f.name for f in non_md[:3])}) que precisam ser convertidos para Markdown (.md) antes da indexacao.")
+            print(f"[WARN] {folder_path.name}: Nao foram encontrados arquivos .md para indexar. Existem {len(non_md)} outros arquivos (ex: {', '.join(f.name for f in non_md[:3])}) que precisam ser convertidos para Markdown (.md) antes da indexacao.")
+    return md_files
 
-    index_data = []
-    indexed_count = 0
-    
-    # 2. Processar Arquivos
-    if md_files:
-        # Inicializa Gemini Client Diretamente (Bypass RLM REPL complexo)
+def _list_folders(folder_path: Path, recursive: bool) -> list:
+    """A pasta e, se recursive, todas as subpastas (exceto as que começam com ponto), em profundidade."""
+    folders = [folder_path]
+    if recursive:
         try:
-            client = GeminiClient(api_key=api_key, model="gemini-2.5-flash")
+            for sub in sorted(d for d in folder_path.iterdir() if d.is_dir() and not d.name.startswith(".")):
+                folders.extend(_list_folders(sub, recursive=True))
+        except Exception as e_sub:
+            print(f"[ERROR] Erro ao processar subpastas: {e_sub}")
+    return folders
+
+def _load_index_cache(folder_path: Path) -> dict:
+    try:
+        with open(folder_path / INDEX_CACHE_NAME, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_CACHE_VERSION and data.get("model") == INDEX_MODEL:
+            return data.get("files", {})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[WARN] Cache de indice invalido em {folder_path}, ignorando: {e}")
+    return {}
+
+def _save_index_cache(folder_path: Path, entries: dict):
+    """Grava o cache da pasta (só com os arquivos atuais) de forma atômica."""
+    cache_path = folder_path / INDEX_CACHE_NAME
+    tmp_path = cache_path.with_name(f"{INDEX_CACHE_NAME}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_CACHE_VERSION, "model": INDEX_MODEL, "files": entries},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"[WARN] Falha ao gravar o cache de indice {cache_path}: {e}")
+
+def _get_client(api_key: str) -> GeminiClient:
+    """Um GeminiClient por thread: completion() troca o modelo do cliente a cada chamada."""
+    client = getattr(_thread_state, "client", None)
+    if client is None or client.api_key != api_key:
+        client = _thread_state.client = GeminiClient(api_key=api_key, model=INDEX_MODEL)
+    return client
+
+def _is_retryable_completion_error(error: Exception) -> bool:
+    """GeminiClient.completion embrulha o erro da API em RuntimeError: verifica toda a cadeia de causas."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if is_retryable_api_error(error):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+def analyze_markdown(file_name: str, content: str, api_key: str, limiter=None) -> dict:
+    """
+    Resumo e keywords de um Markdown ({"summary", "keywords"}) pelo Gemini, dentro do orçamento de
+    taxa compartilhado (limiter, padrão: o do processo) e com novas tentativas em erros transitórios.
+    Se a resposta não for um JSON válido, o resumo é o início da resposta crua e o resultado vem com
+    "fallback": True (entra no PDF, mas não no cache nem na contagem de arquivos indexados).
+    """
+    limiter = limiter or get_gemini_rate_limiter()
+
+    # Otimização: Se for muito grande, pegamos os primeiros 30k chars
+    truncated_content = content[:INDEX_MAX_CHARS]
+
+    system_prompt = """You are a helpful assistant that analyzes documents.
+    Your Goal: Provide a concise summary and relevant keywords for the given document content.
+    
+    Output Format: STRICT JSON with keys "summary" and "keywords".
+    Do not include markdown formatting like ```json ... ``` in the response if possible, just the raw JSON string.
+    """
+    
+    user_prompt = f"""
+    Analyze the following text from file '{file_name}':
+    
+    --- BEGIN TEXT ---
+    {truncated_content}
+    --- END TEXT ---
+
+    1. Provide a concise summary (max 3 sentences).
+    2. Extract 5 relevant keywords.
+    
+    RETURN ONLY VALID JSON:
+    {{
+        "summary": "Your summary here",
+        "keywords": ["Tag1", "Tag2", "Tag3", "Tag4", "Tag5"]
+    }}
+    """
+    estimated_tokens = (len(system_prompt) + len(user_prompt)) // 4 + INDEX_EXPECTED_OUTPUT_TOKENS
+
+    def _request():
+        limiter.acquire(estimated_tokens)
+        # Direct Call
+        return _get_client(api_key).completion([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ])
+
+    analysis = call_with_retries(_request, max_retries=GEMINI_MAX_RETRIES,
+                                 is_retryable=_is_retryable_completion_error, label=f"indice {file_name}")
+    
+    # Parse JSON Robustamente
+    summary = "Resumo não disponível."
+    keywords = FALLBACK_KEYWORDS
+
+    try:
+        # Tenta limpar markdown de código se houver (```json ... ```)
+        cleaned_analysis = analysis.strip()
+        if "```" in cleaned_analysis:
+            # Remove blocos de código
+            cleaned_analysis = re.sub(r"```json\s*", "", cleaned_analysis)
+            cleaned_analysis = re.sub(r"```", "", cleaned_analysis)
+        
+        data = json.loads(cleaned_analysis)
+        summary = data.get("summary", summary)
+        keywords_list = data.get("keywords", [])
+        if isinstance(keywords_list, list):
+            keywords = ", ".join(keywords_list)
+        else:
+            keywords = str(keywords_list)
             
-            for md_file in md_files:
-                print(f"  [READ] Analisando: {md_file.name}")
-                try:
-                    with open(md_file, 'r', encoding='utf-8-sig') as f:
-                        content = f.read()
-                    
-                    if not content.strip():
-                        continue
-
-                    # Otimização: Se for muito grande, pegamos os primeiros 30k chars
-                    truncated_content = content[:30000] 
-                    
-                    system_prompt = """You are a helpful assistant that analyzes documents.
-                    Your Goal: Provide a concise summary and relevant keywords for the given document content.
-                    
-                    Output Format: STRICT JSON with keys "summary" and "keywords".
-                    Do not include markdown formatting like ```json ... ``` in the response if possible, just the raw JSON string.
-                    """
-                    
-                    user_prompt = f"""
-                    Analyze the following text from file '{md_file.name}':
-                    
-                    --- BEGIN TEXT ---
-                    {truncated_content}
-                    --- END TEXT ---
-
-                    1. Provide a concise summary (max 3 sentences).
-                    2. Extract 5 relevant keywords.
-                    
-                    RETURN ONLY VALID JSON:
-                    {{
-                        "summary": "Your summary here",
-                        "keywords": ["Tag1", "Tag2", "Tag3", "Tag4", "Tag5"]
-                    }}
-                    """
-                    
-                    # Direct Call
-                    analysis = client.completion([
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ])
-                    
-                    # Parse JSON Robustamente
-                    import json
-                    import re
-                    
-                    summary = "Resumo não disponível."
-                    keywords = "Tags não disponíveis."
-
-                    try:
-                        # Tenta limpar markdown de código se houver (```json ... ```)
-                        cleaned_analysis = analysis.strip()
-                        if "```" in cleaned_analysis:
-                            # Remove blocos de código
-                            cleaned_analysis = re.sub(r"```json\s*", "", cleaned_analysis)
-                            cleaned_analysis = re.sub(r"```", "", cleaned_analysis)
-                        
-                        data = json.loads(cleaned_analysis)
-                        summary = data.get("summary", summary)
-                        keywords_list = data.get("keywords", [])
-                        if isinstance(keywords_list, list):
-                            keywords = ", ".join(keywords_list)
-                        else:
-                            keywords = str(keywords_list)
-                            
-                    except json.JSONDecodeError:
-                        print(f"  [WARN] Erro ao decodificar JSON para {md_file.name}. Tentando fallback texto.")
-                        # Fallback: Tenta pegar texto cru se o JSON falhar muito feio
-                        summary = analysis[:300].replace("\n", " ").strip() + "..."
-                    except Exception as e_parse:
-                         print(f"  [WARN] Erro de parse generico: {e_parse}")
-                         summary = analysis[:300].replace("\n", " ") + "..."
-
-                    index_data.append({
-                        "filename": md_file.name,
-                        "summary": summary,
-                        "keywords": keywords
-                    })
-                    indexed_count += 1
-                    
-                except Exception as e:
-                    print(f"  [ERROR] Erro ao analisar {md_file.name}: {e}")
-        except Exception as e_init:
-             print(f"[ERROR] Erro ao inicializar Gemini Client: {e_init}")
+    except json.JSONDecodeError:
+        print(f"  [WARN] Erro ao decodificar JSON para {file_name}. Tentando fallback texto.")
+        # Fallback: Tenta pegar texto cru se o JSON falhar muito feio
+        summary = analysis[:300].replace("\n", " ").strip() + "..."
+        return {"summary": summary, "keywords": FALLBACK_KEYWORDS, "fallback": True}
+    except Exception as e_parse:
+         print(f"  [WARN] Erro de parse generico: {e_parse}")
+         summary = analysis[:300].replace("\n", " ") + "..."
+         return {"summary": summary, "keywords": FALLBACK_KEYWORDS, "fallback": True}
+
+    return {"summary": summary, "keywords": keywords}
 
+
+class _FolderIndex:
+    """Estado de uma pasta durante a indexação: arquivos em ordem, resultados e análises pendentes."""
+
+    def __init__(self, folder_path: Path, md_files: list):
+        self.path = folder_path
+        self.md_files = md_files
+        self.cache = _load_index_cache(folder_path)
+        self.hashes = {}        # arquivo -> hash do conteúdo analisado
+        self.results = {}       # arquivo -> {"summary", "keywords"[, "fallback"]}
+        self.pending = 0
+
+    def write(self) -> int:
+        """
+        Gera o _INDEX_CONTENT.pdf da pasta (na ordem dos arquivos) e o cache, sem as análises de fallback.
+        Retorna os arquivos indexados com sucesso.
+        """
+        index_data = [{"filename": md_file.name, **self.results[md_file]}
+                      for md_file in self.md_files if md_file in self.results]
+        _save_index_cache(self.path, {self.hashes[md_file]: result for md_file, result in self.results.items()
+                                      if not result.get("fallback")})
         # 3. Gerar PDF se houver dados
         if index_data:
-            pdf_filename = "_INDEX_CONTENT.pdf"
-            pdf_path = folder_path / pdf_filename
+            pdf_path = self.path / INDEX_PDF_NAME
             try:
-                create_pdf_report(str(pdf_path), folder_path.name, index_data)
+                create_pdf_report(str(pdf_path), self.path.name, index_data)
                 print(f"  [SUCCESS] Indice PDF Criado: {pdf_path}")
             except Exception as e_pdf:
                 print(f"[ERROR] Erro ao gerar PDF: {e_pdf}")
+        return sum(1 for item in index_data if not item.get("fallback"))
 
-    # 4. Recursividade (Depth First)
-    if recursive:
+
+def generate_index_for_folder(folder_path_str: str, api_key: str, recursive: bool = True,
+                              workers: int = INDEX_WORKERS, limiter=None) -> int:
+    """
+    Gera um índice semântico em PDF para a pasta especificada.
+    Analisa arquivos .md, gera resumos e keywords usando RLM.
+    Se recursive=True, processa subpastas também.
+
+    As análises de todas as pastas rodam em um único pool de `workers` threads, dentro do orçamento de
+    taxa compartilhado (limiter, padrão: o do Gemini no processo); cada pasta recebe o seu
+    _INDEX_CONTENT.pdf assim que os seus arquivos terminam. Markdown inalterados desde a última
+    indexação vêm do _INDEX_CACHE.json da pasta, sem chamar o Gemini.
+    Retorna o número de arquivos .md indexados com sucesso.
+    """
+    folder_path = Path(folder_path_str)
+    if not folder_path.exists():
+        print(f"[ERROR] Pasta nao encontrada: {folder_path}")
+        return 0
+
+    print(f"[INDEX] Iniciando indexacao de: {folder_path.name}")
+    limiter = limiter or get_gemini_rate_limiter()
+
+    # 1. Identificar pastas e arquivos Markdown; o conteúdo inalterado sai do cache da pasta
+    folders, tasks = [], []
+    for path in (_list_folders(folder_path, recursive) if folder_path.is_dir() else []):
         try:
-            # Pega todas as subpastas diretias
-            subfolders = [d for d in folder_path.iterdir() if d.is_dir() and not d.name.startswith(".")]
-            for sub in subfolders:
-                indexed_count += generate_index_for_folder(str(sub), api_key, recursive=True)
-        except Exception as e_sub:
-            print(f"[ERROR] Erro ao processar subpastas: {e_sub}")
+            md_files = _list_markdown_files(path)
+        except Exception as e_list:
+            print(f"[ERROR] Erro ao listar arquivos da pasta: {e_list}")
+            continue
+        if not md_files:
+            continue
+        folder = _FolderIndex(path, md_files)
+        folders.append(folder)
+        for md_file in md_files:
+            try:
+                with open(md_file, 'r', encoding='utf-8-sig') as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"  [ERROR] Erro ao analisar {md_file.name}: {e}")
+                continue
+            if not content.strip():
+                continue
+            content_hash = hashlib.sha256(content[:INDEX_MAX_CHARS].encode('utf-8')).hexdigest()
+            folder.hashes[md_file] = content_hash
+            if content_hash in folder.cache:
+                folder.results[md_file] = folder.cache[content_hash]
+            else:
+                folder.pending += 1
+                tasks.append((folder, md_file, content))
+
+    cached_count = sum(len(folder.results) for folder in folders)
+    print(f"[INDEX] {len(folders)} pastas: {len(tasks)} arquivos a analisar, {cached_count} sem alteracao (cache).")
+
+    # 2. Processar Arquivos (todas as pastas em paralelo) e gerar o PDF de cada pasta ao concluir
+    indexed_count = 0
+    for folder in folders:
+        if folder.pending == 0:
+            indexed_count += folder.write()
+    if not tasks:
+        return indexed_count
+
+    try:
+        _get_client(api_key)
+    except Exception as e_init:
+        print(f"[ERROR] Erro ao inicializar Gemini Client: {e_init}")
+        for folder in folders:
+            if folder.pending:
+                indexed_count += folder.write()
+        return indexed_count
+
+    def analyze(md_file: Path, content: str) -> dict:
+        print(f"  [READ] Analisando: {md_file.name}")
+        return analyze_markdown(md_file.name, content, api_key, limiter)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="index") as pool:
+        futures = {pool.submit(analyze, md_file, content): (folder, md_file) for folder, md_file, content in tasks}
+        for future in as_completed(futures):
+            folder, md_file = futures[future]
+            try:
+                folder.results[md_file] = future.result()
+            except Exception as e:
+                print(f"  [ERROR] Erro ao analisar {md_file.name}: {e}")
+            folder.pending -= 1
+            if folder.pending == 0:
+                indexed_count += folder.write()
 
     return indexed_count
 
@@ -0,0 +1,313 @@
+# job_queue.py
+
+import os
+import json
+import time
+import sqlite3
+from typing import Iterable, List, Optional
+
+# Fila persistente de jobs de conversão em lote, ao lado do banco de usuários (volume persistente no Docker).
+_DEFAULT_JOBS_DB = os.path.join(os.path.dirname(os.getenv("USERS_DB_PATH", "users.db")) or ".", "jobs.db")
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", _DEFAULT_JOBS_DB)
+
+# Segundos sem sinal de vida após os quais um job em execução volta para a fila (worker encerrado no meio).
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "120"))
+
+# Tipos de job
+JOB_LOCAL_BATCH = "local_batch"
+JOB_DROPBOX_BATCH = "dropbox_batch"
+
+# Estados do job
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# Estados de cada arquivo do job
+FILE_PENDING = "pending"
+FILE_RUNNING = "running"
+FILE_DONE = "done"
+FILE_SKIPPED = "skipped"
+FILE_ERROR = "error"
+
+# Parâmetros sensíveis e a variável de ambiente de cada um. Nunca são gravados na fila: o worker os obtém
+# do dono do job ao executá-lo (credenciais guardadas em auth ou a variável de ambiente).
+SECRET_PARAMS = {"gemini_key": "GOOGLE_GEMINI_API_KEY", "dropbox_token": "DROPBOX_ACCESS_TOKEN"}
+
+
+def get_db_connection():
+    """Retorna uma conexão aberta com o banco de jobs (uma por operação, segura entre processos)."""
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_jobs_db():
+    """Cria as tabelas da fila de jobs, se ainda não existirem (banco legível apenas pelo dono, 0600)."""
+    from auth import restrict_file_permissions
+    os.makedirs(os.path.dirname(os.path.abspath(JOBS_DB_PATH)), exist_ok=True)
+    restrict_file_permissions(JOBS_DB_PATH)
+    conn = get_db_connection()
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                source TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                heartbeat REAL,
+                total INTEGER NOT NULL DEFAULT 0,
+                processed INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                message TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_files (
+                job_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                output TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, path)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                pid INTEGER,
+                heartbeat REAL NOT NULL
+            )
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+def _job_from_row(row) -> dict:
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    return job
+
+def submit_job(kind: str, owner: str, source: str, params: dict) -> int:
+    """Enfileira um job e retorna seu id. Segredos (SECRET_PARAMS) em params são descartados."""
+    params = {name: value for name, value in params.items() if name not in SECRET_PARAMS}
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute(
+            "INSERT INTO jobs (kind, owner, source, params, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, owner, source, json.dumps(params), JOB_QUEUED, time.time())
+        )
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+def claim_next_job(worker_id: str) -> Optional[dict]:
+    """
+    Reserva atomicamente o job mais antigo da fila para o worker. Jobs em execução sem sinal de vida
+    há mais de JOB_STALE_SECONDS são devolvidos à fila antes (os arquivos já concluídos são mantidos).
+    """
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        stale = [row["id"] for row in conn.execute(
+            "SELECT id FROM jobs WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?)",
+            (JOB_RUNNING, now - JOB_STALE_SECONDS))]
+        for job_id in stale:
+            print(f"Job {job_id}: worker sem sinal de vida, devolvendo à fila.")
+            conn.execute("UPDATE jobs SET status = ?, worker_id = NULL WHERE id = ?", (JOB_QUEUED, job_id))
+            conn.execute("UPDATE job_files SET status = ? WHERE job_id = ? AND status = ?",
+                         (FILE_PENDING, job_id, FILE_RUNNING))
+
+        row = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at, id LIMIT 1",
+                           (JOB_QUEUED,)).fetchone()
+        if row is None:
+            conn.commit()
+            return None
+
+        if row["cancel_requested"]:
+            conn.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?", (JOB_CANCELLED, now, row["id"]))
+            conn.commit()
+            return None
+
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = ?, heartbeat = ?, started_at = COALESCE(started_at, ?) WHERE id = ?",
+            (JOB_RUNNING, worker_id, now, now, row["id"])
+        )
+        conn.commit()
+        return get_job(row["id"])
+    finally:
+        conn.close()
+
+def heartbeat_job(job_id: int):
+    """Registra sinal de vida do worker que executa o job."""
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def heartbeat_worker(worker_id: str):
+    """Registra sinal de vida de um processo worker (usado para saber se é preciso iniciar outro)."""
+    conn = get_db_connection()
+    try:
+        conn.execute("INSERT OR REPLACE INTO workers (worker_id, pid, heartbeat) VALUES (?, ?, ?)",
+                     (worker_id, os.getpid(), time.time()))
+        conn.commit()
+    finally:
+        conn.close()
+
+def unregister_worker(worker_id: str):
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def active_worker_count(max_age: float = 30.0) -> int:
+    """Quantos workers deram sinal de vida nos últimos max_age segundos."""
+    conn = get_db_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM workers WHERE heartbeat >= ?", (time.time() - max_age,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def active_job_count() -> int:
+    """Quantos jobs estão na fila ou em execução."""
+    conn = get_db_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", ACTIVE_JOB_STATUSES).fetchone()[0]
+    finally:
+        conn.close()
+
+def add_job_files(job_id: int, paths: Iterable[str]):
+    """Registra os arquivos do job como pendentes (arquivos já registrados mantêm o estado atual)."""
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.executemany("INSERT OR IGNORE INTO job_files (job_id, path, status, updated_at) VALUES (?, ?, ?, ?)",
+                         [(job_id, path, FILE_PENDING, now) for path in paths])
+        conn.commit()
+    finally:
+        conn.close()
+
+def requeue_job_files(job_id: int, paths: Iterable[str]):
+    """Registra arquivos como pendentes, inclusive os já concluídos no job (ex.: alterados durante um job contínuo)."""
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.executemany("INSERT INTO job_files (job_id, path, status, updated_at) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT(job_id, path) DO UPDATE SET status = excluded.status, error = NULL, "
+                         "updated_at = excluded.updated_at",
+                         [(job_id, path, FILE_PENDING, now) for path in paths])
+        _refresh_counts(conn, job_id)
+        conn.commit()
+    finally:
+        conn.close()
+
+def set_file_status(job_id: int, path: str, status: str, output: Optional[str] = None, error: Optional[str] = None):
+    """Atualiza o estado de um arquivo do job e os contadores do job."""
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE job_files SET status = ?, output = COALESCE(?, output), error = ?, updated_at = ? "
+                     "WHERE job_id = ? AND path = ?", (status, output, error, time.time(), job_id, path))
+        _refresh_counts(conn, job_id)
+        conn.commit()
+    finally:
+        conn.close()
+
+def _refresh_counts(conn, job_id: int):
+    counts = {row["status"]: row["n"] for row in conn.execute(
+        "SELECT status, COUNT(*) AS n FROM job_files WHERE job_id = ? GROUP BY status", (job_id,))}
+    conn.execute("UPDATE jobs SET total = ?, processed = ?, skipped = ?, errors = ?, heartbeat = ? WHERE id = ?",
+                 (sum(counts.values()), counts.get(FILE_DONE, 0), counts.get(FILE_SKIPPED, 0),
+                  counts.get(FILE_ERROR, 0), time.time(), job_id))
+
+def pending_job_files(job_id: int) -> List[str]:
+    """Arquivos do job que ainda não foram concluídos (pendentes ou com erro em uma execução anterior)."""
+    conn = get_db_connection()
+    try:
+        return [row["path"] for row in conn.execute(
+            "SELECT path FROM job_files WHERE job_id = ? AND status NOT IN (?, ?) ORDER BY path",
+            (job_id, FILE_DONE, FILE_SKIPPED))]
+    finally:
+        conn.close()
+
+def list_job_files(job_id: int, status: Optional[str] = None, limit: int = 200) -> List[dict]:
+    conn = get_db_connection()
+    try:
+        if status:
+            rows = conn.execute("SELECT * FROM job_files WHERE job_id = ? AND status = ? ORDER BY path LIMIT ?",
+                                (job_id, status, limit))
+        else:
+            rows = conn.execute("SELECT * FROM job_files WHERE job_id = ? ORDER BY path LIMIT ?", (job_id, limit))
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+def finish_job(job_id: int, status: str, message: Optional[str] = None):
+    """Encerra o job (concluído, falho ou cancelado)."""
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE job_files SET status = ? WHERE job_id = ? AND status = ?",
+                     (FILE_PENDING, job_id, FILE_RUNNING))
+        _refresh_counts(conn, job_id)
+        conn.execute("UPDATE jobs SET status = ?, message = ?, finished_at = ? WHERE id = ?",
+                     (status, message, time.time(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def request_cancel(job_id: int):
+    """Pede o cancelamento do job: jobs na fila são cancelados na hora; em execução, pelo worker."""
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        conn.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                     (JOB_CANCELLED, time.time(), job_id, JOB_QUEUED))
+        conn.commit()
+    finally:
+        conn.close()
+
+def is_cancel_requested(job_id: int) -> bool:
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+    finally:
+        conn.close()
+
+def get_job(job_id: int) -> Optional[dict]:
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_from_row(row) if row else None
+    finally:
+        conn.close()
+
+def list_jobs(owner: Optional[str] = None, limit: int = 10) -> List[dict]:
+    """Jobs mais recentes (de um usuário, ou de todos se owner for None)."""
+    conn = get_db_connection()
+    try:
+        if owner is None:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+        else:
+            rows = conn.execute("SELECT * FROM jobs WHERE owner = ? ORDER BY id DESC LIMIT ?", (owner, limit))
+        return [_job_from_row(row) for row in rows]
+    finally:
+        conn.close()
@@ -0,0 +1,490 @@
+# job_worker.py
+#
+# Worker da fila de jobs (job_queue): executa os lotes (pasta local e Dropbox) fora do processo do
+# Streamlit, de modo que reruns, cliques ou abas fechadas não interrompem a conversão.
+#
+# Uso:
+#   python job_worker.py [--once] [--poll 2] [--idle-exit 0]
+#
+# A interface inicia um worker automaticamente ao enviar um job, se nenhum estiver ativo.
+# Vários workers podem rodar ao mesmo tempo (cada um executa um job por vez).
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+import job_queue
+import dropbox_sync_state
+from job_queue import (JOB_LOCAL_BATCH, JOB_DROPBOX_BATCH, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED,
+                       FILE_RUNNING, FILE_DONE, FILE_SKIPPED, FILE_ERROR)
+from engine import SUPPORTED_EXTENSIONS, EVENT_ERROR, ConversionOptions, convert_bytes, convert_file
+from batch_engine import (INTERNAL_FILE_NAMES, batch_output_path, conversion_lane, ocr_workers_per_file, resolve_batch_workers,
+                          run_batch, scan_directory)
+from batch_manifest import BatchManifest, engine_signature, fingerprint_file
+from dropbox_pipeline import PIPELINE_DONE, run_pipeline
+from translations import translate
+
+# Máximo de workers iniciados automaticamente pela interface (cada um executa um job por vez).
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "2"))
+
+# Segundos ocioso após os quais um worker iniciado pela interface se encerra (0 = nunca).
+JOB_WORKER_IDLE_EXIT = int(os.getenv("JOB_WORKER_IDLE_EXIT", "300"))
+
+# Intervalo (s) do sinal de vida e da verificação de cancelamento durante um job
+HEARTBEAT_INTERVAL = 10.0
+CANCEL_CHECK_INTERVAL = 2.0
+
+# Lotes Dropbox contínuos: espera máxima (s) de cada longpoll (mínimo da API: 30) e pausa após erros de rede
+DROPBOX_LONGPOLL_TIMEOUT = 30
+DROPBOX_RETRY_DELAY = 10.0
+
+
+def resolve_job_secrets(job: dict) -> dict:
+    """
+    Credenciais do job ({nome: valor}, ver job_queue.SECRET_PARAMS), obtidas na execução: as guardadas pelo
+    dono do job (auth.save_user_credentials) ou, na falta delas, a variável de ambiente correspondente.
+    A chave do Gemini só é usada se o job foi enviado com o Gemini ativo (params["use_gemini"]).
+    """
+    import auth
+    stored = auth.get_user_credentials(job["owner"])
+    secrets = {name: stored.get(name) or os.getenv(env_var) or None
+               for name, env_var in job_queue.SECRET_PARAMS.items()}
+    if not job["params"].get("use_gemini"):
+        secrets["gemini_key"] = None
+    return secrets
+
+
+class JobContext:
+    """
+    Estado de um job em execução: parâmetros, credenciais (mantidas só em memória), mensagens no idioma
+    do job e verificação de cancelamento.
+    """
+
+    def __init__(self, job: dict):
+        self.job = job
+        self.job_id = job["id"]
+        self.params = job["params"]
+        self.secrets = resolve_job_secrets(job)
+        self.lang = self.params.get("lang", "pt")
+        self.options = ConversionOptions.from_dict({**self.params, **self.secrets})
+        self._last_cancel_check = 0.0
+        self._cancelled = False
+
+    def t(self, key: str, *args) -> str:
+        return translate(key, self.lang, *args)
+
+    def should_stop(self) -> bool:
+        now = time.monotonic()
+        if not self._cancelled and now - self._last_cancel_check >= CANCEL_CHECK_INTERVAL:
+            self._last_cancel_check = now
+            self._cancelled = job_queue.is_cancel_requested(self.job_id)
+        return self._cancelled
+
+    def lane(self, file_name: str) -> str:
+        return conversion_lane(file_name, self.options)
+
+    def _event_collector(self, file_name: str) -> tuple:
+        """(on_event, erros): registra os eventos da conversão no log e acumula as mensagens de erro."""
+        errors = []
+
+        def on_event(level, key, *args):
+            message = self.t(key, *args)
+            print(f"Job {self.job_id} | {file_name} | {message}")
+            if level == EVENT_ERROR:
+                errors.append(message)
+
+        return on_event, errors
+
+    def convert(self, input_path: str, output_path: str, executor=None) -> tuple:
+        """
+        Converte um arquivo com as opções do job (no pool de processos `executor` da fila, se informado).
+        Retorna (sucesso, mensagem de erro ou None).
+        """
+        on_event, errors = self._event_collector(os.path.basename(input_path))
+        success = convert_file(input_path, output_path, self.options, on_event=on_event, executor=executor)
+        return success, ("; ".join(errors) if errors else None)
+
+    def convert_bytes(self, data: bytes, file_name: str, output_path: str, spool_dir: str, executor=None) -> tuple:
+        """Como convert(), para um arquivo já em memória (ver engine.convert_bytes)."""
+        on_event, errors = self._event_collector(file_name)
+        success = convert_bytes(data, file_name, output_path, spool_dir, self.options, on_event=on_event,
+                                executor=executor)
+        return success, ("; ".join(errors) if errors else None)
+
+
+def run_local_batch_job(ctx: JobContext):
+    """
+    Lote de pasta local: converte os arquivos suportados, salvando NomeOriginalMD.md na mesma pasta.
+    O manifesto da pasta (batch_manifest) define o que mudou desde a última execução.
+    """
+    root_dir = Path(ctx.params["directory"]).resolve()
+    if not root_dir.is_dir():
+        raise FileNotFoundError(f"Diretório inválido: {root_dir}")
+
+    files = scan_directory(root_dir, SUPPORTED_EXTENSIONS)
+    job_queue.add_job_files(ctx.job_id, [str(path) for path in files])
+    manifest = BatchManifest(root_dir)
+
+    # Fontes apagadas desde a última execução: remove as saídas (se não foram editadas) e o registro
+    for source, output in manifest.remove_deleted(files):
+        print(f"Job {ctx.job_id} | {source} apagado; saída removida: {output}")
+
+    # LÓGICA INCREMENTAL: apenas arquivos novos ou alterados (arquivos já concluídos em uma execução anterior
+    # do mesmo job também ficam de fora)
+    existing, missing = [], []
+    for path_str in job_queue.pending_job_files(ctx.job_id):
+        (existing if Path(path_str).exists() else missing).append(Path(path_str))
+    for path in missing:
+        job_queue.set_file_status(ctx.job_id, str(path), FILE_ERROR, error="Arquivo não encontrado.")
+    pending, skipped = manifest.plan(existing, batch_output_path, overwrite=bool(ctx.params.get("overwrite")))
+    for path in skipped:
+        job_queue.set_file_status(ctx.job_id, str(path), FILE_SKIPPED, output=str(batch_output_path(path)))
+    manifest.save()
+
+    cpu_workers, io_workers = resolve_batch_workers()
+    ctx.options.ocr_workers = ocr_workers_per_file(cpu_workers)
+    signature = engine_signature(ctx.options)
+    fingerprints = {}
+
+    def convert(path: Path, executor) -> bool:
+        job_queue.set_file_status(ctx.job_id, str(path), FILE_RUNNING)
+        # Lido antes da conversão: se o arquivo mudar durante o processamento, a próxima execução o refaz
+        fingerprints[path] = fingerprint_file(path)
+        output_path = batch_output_path(path)
+        success, error = ctx.convert(str(path), str(output_path), executor=executor)
+        job_queue.set_file_status(ctx.job_id, str(path), FILE_DONE if success else FILE_ERROR,
+                                  output=str(output_path) if success else None, error=error)
+        return success
+
+    def on_result(result: dict, done: int, total: int):
+        path = result["item"]
+        if result["success"] and path in fingerprints:
+            manifest.record(path, fingerprints.pop(path), batch_output_path(path), engine=signature)
+
+    try:
+        results = run_batch(pending, convert, lane=lambda path: ctx.lane(path.name), cpu_workers=cpu_workers,
+                            io_workers=io_workers, on_result=on_result, should_stop=ctx.should_stop)
+    finally:
+        manifest.save()
+    _record_exceptions(ctx, results, key=str)
+
+def dropbox_output_path(source_path: str) -> str:
+    """Caminho do Markdown de uma origem no Dropbox: NomeOriginalMD.md na mesma pasta."""
+    source = Path(source_path)
+    output_path = f"{source.parent.as_posix()}/{source.stem}MD.md"
+    return output_path[1:] if output_path.startswith("//") else output_path
+
+def is_dropbox_source_current(entry, output_entry, state: Optional[dict], engine: str, overwrite: bool) -> bool:
+    """
+    Decide se uma origem do Dropbox pode ser pulada.
+
+    Args:
+        entry: FileMetadata da origem; output_entry: FileMetadata do MD.md na listagem (ou None).
+        state: Registro de dropbox_sync_state da última conversão da origem (ou None).
+        engine: Assinatura do pipeline atual (batch_manifest.engine_signature).
+        overwrite: Com Sobrescrever, só é pulada a origem inalterada cujo MD.md é exatamente o gerado pelo
+            mesmo pipeline; sem ele, basta o conteúdo não ter mudado (MD.md editado à mão é preservado).
+    """
+    if output_entry is None:
+        return False
+    if state is None:
+        # MD.md anterior ao estado de sincronização: mantém o comportamento incremental de antes
+        return not overwrite
+    if state["content_hash"] != (entry.content_hash or ""):
+        return False
+    if overwrite:
+        return state["output_rev"] == output_entry.rev and state["engine"] == engine
+    return True
+
+def run_dropbox_batch_job(ctx: JobContext):
+    """
+    Lote Dropbox: Download -> Convert -> Upload em estágios concorrentes (dropbox_pipeline), com o Markdown
+    salvo ao lado do original no Dropbox. O estado de sincronização (dropbox_sync_state) limita o trabalho a origens novas ou alteradas, e a
+    listagem é atualizada pelo cursor salvo da pasta. Com params["continuous"], o job não termina: aguarda
+    novas mudanças (longpoll) e converte os novos uploads até ser cancelado.
+    """
+    from dropbox_handler import DROPBOX_STREAM_MAX_MB, BatchUploader, DropboxHandler
+
+    if not ctx.secrets["dropbox_token"]:
+        raise ConnectionError(ctx.t("dbx_token_missing_error"))
+    dbx = DropboxHandler(ctx.secrets["dropbox_token"], lang=ctx.lang)
+    # O cliente é compartilhado por token: os contadores do job são a diferença desde o início
+    stats_at_start = dbx.stats
+    status, msg = dbx.check_connection()
+    if not status:
+        raise ConnectionError(msg)
+
+    folder = ctx.params["folder"]
+    overwrite = bool(ctx.params.get("overwrite"))
+    engine = engine_signature(ctx.options)
+    dropbox_sync_state.init_sync_db()
+
+    # Listagem da pasta (origens e MD.md existentes) como índice em memória, com caminhos sem caixa.
+    # Só a primeira execução lista a pasta inteira; as seguintes aplicam as mudanças desde o cursor salvo.
+    files_by_path = {}
+
+    def sync_listing() -> str:
+        listing = dropbox_sync_state.sync_folder_listing(dbx, folder)
+        if listing is None:
+            raise ConnectionError(dbx.last_error)
+        files_by_path.clear()
+        files_by_path.update(listing[0])
+        return listing[1]
+
+    def plan(entries: list, record_skips: bool) -> list:
+        """LÓGICA INCREMENTAL (DROPBOX): content_hash da listagem x estado da última conversão."""
+        sync_state = dropbox_sync_state.get_sources(dbx.account_id, folder)
+        pending = []
+        for entry in entries:
+            output_path = dropbox_output_path(entry.path_display)
+            output_entry = files_by_path.get(output_path.lower())
+            state = sync_state.get(entry.path_lower)
+            if is_dropbox_source_current(entry, output_entry, state, engine, overwrite):
+                if state is None:
+                    dropbox_sync_state.record_source(dbx.account_id, entry, output_path, output_entry.rev, engine=None)
+                if record_skips:
+                    job_queue.set_file_status(ctx.job_id, entry.path_display, FILE_SKIPPED, output=output_path)
+            else:
+                pending.append(entry)
+        return pending
+
+    def source_entries() -> list:
+        return sorted((entry for entry in files_by_path.values()
+                       if Path(entry.name).suffix.lower() in SUPPORTED_EXTENSIONS and entry.name not in INTERNAL_FILE_NAMES),
+                      key=lambda entry: entry.path_lower)
+
+    cursor = sync_listing()
+    entries = source_entries()
+    job_queue.add_job_files(ctx.job_id, [entry.path_display for entry in entries])
+    pending_paths = set(job_queue.pending_job_files(ctx.job_id))
+    pending = plan([entry for entry in entries if entry.path_display in pending_paths], record_skips=True)
+
+    cpu_workers, io_workers = resolve_batch_workers()
+    ctx.options.ocr_workers = ocr_workers_per_file(cpu_workers)
+    job_temp_dir = Path("temp_dropbox") / f"job_{ctx.job_id}"
+
+    def copy_identical(entry, output_path: str):
+        """MD.md de um conteúdo idêntico já convertido em outra pasta, copiado no próprio Dropbox (ou None)."""
+        if not entry.content_hash or output_path.lower() in files_by_path:
+            return None
+        for previous in dropbox_sync_state.find_converted(dbx.account_id, entry.content_hash, engine):
+            if previous["path_lower"] == entry.path_lower:
+                continue
+            # Só reaproveita o MD.md se ele ainda for o gerado (não editado nem apagado)
+            current = dbx.get_metadata(previous["output_path"])
+            if current is not None and current.rev == previous["output_rev"]:
+                return dbx.copy_file(previous["output_path"], output_path)
+        return None
+
+    # Estágios do pipeline (dropbox_pipeline): falhas são exceções com a mensagem mostrada no job
+    def download(entry, work_dir: Path):
+        job_queue.set_file_status(ctx.job_id, entry.path_display, FILE_RUNNING)
+        output_path = dropbox_output_path(entry.path_display)
+        copied = copy_identical(entry, output_path)
+        if copied is not None:
+            print(f"Job {ctx.job_id} | {entry.path_display}: conteúdo idêntico já convertido, Markdown copiado.")
+            dropbox_sync_state.record_source(dbx.account_id, entry, output_path, copied.rev, engine=engine)
+            return PIPELINE_DONE
+        # Arquivos pequenos vão da rede para o conversor em memória
+        if entry.size <= DROPBOX_STREAM_MAX_MB * 1024 * 1024:
+            data = dbx.download_bytes(entry.path_display)
+            if data is None:
+                raise RuntimeError(ctx.t("dbx_download_error", entry.name))
+            return data
+        # Uma subpasta por arquivo: nomes iguais em pastas diferentes não colidem em paralelo
+        local_input = work_dir / entry.name
+        if not dbx.download_file(entry.path_display, str(local_input)):
+            raise RuntimeError(ctx.t("dbx_download_error", entry.name))
+        return local_input
+
+    def convert(entry, local_input, work_dir: Path, executor) -> Path:
+        local_output = work_dir / f"{Path(entry.name).stem}MD.md"
+        if isinstance(local_input, bytes):
+            success, error = ctx.convert_bytes(local_input, entry.name, str(local_output), str(work_dir / "spool"),
+                                               executor=executor)
+        else:
+            success, error = ctx.convert(str(local_input), str(local_output), executor=executor)
+        if not success:
+            raise RuntimeError(error or ctx.t("dbx_convert_error", entry.name))
+        return local_output
+
+    # Os Markdown são enviados a sessões de upload no estágio de upload e confirmados em grupo pelo
+    # BatchUploader; o estado de cada arquivo enviado é registrado quando o seu commit termina.
+    uploaders = []
+
+    def on_committed(result: dict):
+        entry = result["item"]
+        if result["metadata"] is None:
+            job_queue.set_file_status(ctx.job_id, entry.path_display, FILE_ERROR,
+                                      error=result["error"] or ctx.t("dbx_upload_error", entry.name))
+            return
+        dropbox_sync_state.record_source(dbx.account_id, entry, result["path"], result["metadata"].rev, engine=engine)
+        job_queue.set_file_status(ctx.job_id, entry.path_display, FILE_DONE, output=result["path"])
+
+    def upload(entry, local_output: Path):
+        uploaders[-1].add(str(local_output), dropbox_output_path(entry.path_display), item=entry)
+
+    def on_result(result: dict, done: int, total: int):
+        entry = result["item"]
+        if result["success"] and result["uploaded"]:
+            return
+        job_queue.set_file_status(ctx.job_id, entry.path_display, FILE_DONE if result["success"] else FILE_ERROR,
+                                  output=dropbox_output_path(entry.path_display) if result["success"] else None,
+                                  error=result["error"])
+
+    def run_pass(entries: list):
+        uploaders.append(BatchUploader(dbx, on_result=on_committed))
+        try:
+            run_pipeline(entries, download, convert, upload, temp_dir=job_temp_dir, size=lambda entry: entry.size,
+                         lane=lambda entry: ctx.lane(entry.name), label=lambda entry: entry.path_display,
+                         cpu_workers=cpu_workers, io_workers=io_workers, on_result=on_result, should_stop=ctx.should_stop)
+        finally:
+            uploaders.pop().close()
+
+    try:
+        run_pass(pending)
+
+        # Modo contínuo: novos uploads são convertidos segundos depois, sem varrer a pasta de novo
+        overwrite = False
+        while ctx.params.get("continuous") and not ctx.should_stop():
+            changes = dbx.wait_for_changes(cursor, timeout=DROPBOX_LONGPOLL_TIMEOUT)
+            if changes is None:
+                _wait_unless_stopped(ctx, DROPBOX_RETRY_DELAY)
+                continue
+            has_changes, backoff = changes
+            if has_changes:
+                cursor = sync_listing()
+                pending = plan(source_entries(), record_skips=False)
+                if pending:
+                    job_queue.requeue_job_files(ctx.job_id, [entry.path_display for entry in pending])
+                    run_pass(pending)
+            if backoff:
+                _wait_unless_stopped(ctx, backoff)
+    finally:
+        print(f"Job {ctx.job_id} | Dropbox: {({k: v - stats_at_start[k] for k, v in dbx.stats.items()})}")
+
+def _wait_unless_stopped(ctx: JobContext, seconds: float):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline and not ctx.should_stop():
+        time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+
+def _record_exceptions(ctx: JobContext, results: list, key):
+    """Arquivos cujo convert() levantou exceção ficam como erro, com a mensagem da exceção."""
+    for result in results:
+        if result["error"]:
+            job_queue.set_file_status(ctx.job_id, key(result["item"]), FILE_ERROR, error=result["error"])
+
+
+JOB_RUNNERS = {
+    JOB_LOCAL_BATCH: run_local_batch_job,
+    JOB_DROPBOX_BATCH: run_dropbox_batch_job,
+}
+
+def process_job(job: dict, worker_id: str):
+    """Executa um job reservado e registra o estado final. Falhas ficam restritas ao job."""
+    ctx = JobContext(job)
+    print(f"Worker {worker_id}: iniciando job {ctx.job_id} ({job['kind']}: {job['source']}).")
+
+    stop_heartbeat = threading.Event()
+
+    def heartbeat_loop():
+        while not stop_heartbeat.wait(HEARTBEAT_INTERVAL):
+            job_queue.heartbeat_job(ctx.job_id)
+            job_queue.heartbeat_worker(worker_id)
+
+    heartbeat_thread = threading.Thread(target=heartbeat_loop, daemon=True)
+    heartbeat_thread.start()
+    try:
+        runner = JOB_RUNNERS.get(job["kind"])
+        if runner is None:
+            raise ValueError(f"Tipo de job desconhecido: {job['kind']}")
+        runner(ctx)
+        if ctx.should_stop() or job_queue.is_cancel_requested(ctx.job_id):
+            job_queue.finish_job(ctx.job_id, JOB_CANCELLED)
+        else:
+            job_queue.finish_job(ctx.job_id, JOB_COMPLETED)
+    except Exception as e:
+        print(f"Worker {worker_id}: job {ctx.job_id} falhou: {e}")
+        job_queue.finish_job(ctx.job_id, JOB_FAILED, message=str(e))
+    finally:
+        stop_heartbeat.set()
+        heartbeat_thread.join()
+    print(f"Worker {worker_id}: job {ctx.job_id} encerrado.")
+
+def run_worker(poll_interval: float = 2.0, idle_exit: float = 0, once: bool = False):
+    """
+    Consome a fila até ser interrompido. Com once=True, processa os jobs disponíveis e sai;
+    com idle_exit > 0, sai após esse tempo sem jobs.
+    """
+    job_queue.init_jobs_db()
+    worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    job_queue.heartbeat_worker(worker_id)
+    print(f"Worker {worker_id} aguardando jobs em {job_queue.JOBS_DB_PATH}...")
+    idle_since = time.monotonic()
+    try:
+        while True:
+            job = job_queue.claim_next_job(worker_id)
+            if job is not None:
+                process_job(job, worker_id)
+                idle_since = time.monotonic()
+                continue
+            if once or (idle_exit > 0 and time.monotonic() - idle_since >= idle_exit):
+                break
+            job_queue.heartbeat_worker(worker_id)
+            time.sleep(poll_interval)
+    finally:
+        job_queue.unregister_worker(worker_id)
+        print(f"Worker {worker_id} encerrado.")
+
+
+_last_spawn = 0.0
+_spawn_lock = threading.Lock()
+
+def ensure_worker_running():
+    """
+    Inicia um worker em segundo plano se houver jobs pendentes e menos workers ativos que o necessário
+    (até JOB_MAX_WORKERS). Fora do executável, o worker é um processo independente do Streamlit.
+    """
+    global _last_spawn
+    with _spawn_lock:
+        wanted = min(JOB_MAX_WORKERS, job_queue.active_job_count())
+        # Um worker recém-iniciado ainda pode não ter registrado sinal de vida
+        if job_queue.active_worker_count() >= wanted or time.monotonic() - _last_spawn < 15:
+            return
+        _last_spawn = time.monotonic()
+
+        if getattr(sys, 'frozen', False):
+            # No executável PyInstaller não há interpretador para um processo separado: thread no próprio app
+            threading.Thread(target=run_worker, kwargs={"idle_exit": JOB_WORKER_IDLE_EXIT}, daemon=True).start()
+            return
+
+        # Mesmo diretório e bancos do app: caminhos relativos (bancos, temporários, pastas dos lotes) são
+        # resolvidos a partir de onde o Streamlit foi iniciado
+        import auth
+        env = dict(os.environ, USERS_DB_PATH=os.path.abspath(auth.DB_PATH),
+                   CREDENTIALS_KEY_PATH=os.path.abspath(auth.CREDENTIALS_KEY_PATH),
+                   JOBS_DB_PATH=os.path.abspath(job_queue.JOBS_DB_PATH),
+                   DROPBOX_SYNC_DB_PATH=os.path.abspath(dropbox_sync_state.DROPBOX_SYNC_DB_PATH))
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--idle-exit", str(JOB_WORKER_IDLE_EXIT)],
+            cwd=os.getcwd(), env=env,
+            start_new_session=True, # sobrevive ao reinício do servidor Streamlit
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker da fila de jobs de conversão.")
+    parser.add_argument("--once", action="store_true", help="Processa os jobs pendentes e sai.")
+    parser.add_argument("--poll", type=float, default=2.0, help="Intervalo (s) entre consultas à fila.")
+    parser.add_argument("--idle-exit", type=float, default=0, help="Sai após N segundos sem jobs (0 = nunca).")
+    args = parser.parse_args()
+    run_worker(poll_interval=args.poll, idle_exit=args.idle_exit, once=args.once)
+
+if __name__ == "__main__":
+    main()
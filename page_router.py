@@ -0,0 +1,154 @@
+# page_router.py
+
+import os
+from typing import Dict, Iterable, Optional
+import pytesseract
+from pdf_detector import get_pdf_text_layer
+from gcv_ocr import ocr_tesseract_pages_scored, ocr_gemini_pages, get_pdf_page_count, OCR_CONFIDENCE_THRESHOLD
+
+
+def format_page_markdown(page_num: int, content: str) -> str:
+    """Bloco Markdown padrão de uma página ('# PÁGINA N'), o mesmo usado pelo OCR."""
+    return f"\n\n# PÁGINA {page_num}\n\n{content.strip()}"
+
+def new_ocr_report() -> dict:
+    """Relatório do roteamento/OCR de um PDF (contagens e páginas por etapa)."""
+    return {
+        "text_pages": 0,             # páginas extraídas da camada de texto
+        "ocr_pages": 0,              # páginas enviadas ao OCR
+        "tesseract_pages": 0,        # páginas reconhecidas pelo Tesseract
+        "low_confidence_pages": [],  # páginas do Tesseract abaixo do limiar de confiança
+        "escalated_pages": [],       # páginas enviadas ao Gemini
+        "gemini_pages": [],          # páginas extraídas com sucesso pelo Gemini
+        "failed_pages": [],          # páginas sem nenhum conteúdo extraído
+    }
+
+def ocr_page_blocks(pdf_path: str, page_numbers: Iterable[int], gemini_key: Optional[str] = None,
+                    force_gemini: bool = False, confidence_threshold: Optional[float] = None,
+                    report: Optional[dict] = None, ocr_workers: Optional[int] = None) -> Dict[int, str]:
+    """
+    Roda OCR apenas nas páginas informadas e retorna {numero_da_pagina: bloco_markdown}.
+
+    Tesseract primeiro, pontuando cada página pela confiança média das palavras. Com chave Gemini,
+    só as páginas abaixo de `confidence_threshold` são reenviadas ao Gemini e substituídas no resultado;
+    se o Tesseract falhar, todas as páginas vão ao Gemini. Com force_gemini todas as páginas vão direto
+    ao Gemini e o Tesseract roda só nas que o Gemini não extrair (o arquivo fica limitado pela API).
+    Páginas em que o Gemini falha mantêm o texto do Tesseract, quando houver.
+    `ocr_workers` limita os processos de Tesseract (ver resolve_ocr_workers).
+    """
+    if confidence_threshold is None:
+        confidence_threshold = OCR_CONFIDENCE_THRESHOLD
+    if report is None:
+        report = new_ocr_report()
+
+    pages = sorted(set(page_numbers))
+    report["ocr_pages"] += len(pages)
+    gemini_first = bool(gemini_key) and force_gemini
+    blocks = {}
+    low_confidence = []
+
+    # TENTATIVA 1: OCR LOCAL (Tesseract), exceto com Forçar Gemini
+    if not gemini_first:
+        blocks, low_confidence = _tesseract_page_blocks(pdf_path, pages, confidence_threshold, report, ocr_workers)
+
+    # TENTATIVA 2: OCR EM NUVEM (Gemini), apenas nas páginas necessárias
+    if gemini_first or not blocks:
+        escalate = pages
+    else:
+        escalate = low_confidence
+
+    gemini_pages, failures = {}, {}
+    if gemini_key and escalate:
+        report["escalated_pages"].extend(escalate)
+        try:
+            gemini_pages, failures = ocr_gemini_pages(pdf_path, gemini_key, page_numbers=escalate)
+        except Exception as e:
+            print(f"Erro ao configurar SDK Gemini: {e}")
+        for page_num, markdown_content in gemini_pages.items():
+            blocks[page_num] = format_page_markdown(page_num, markdown_content)
+        report["gemini_pages"].extend(gemini_pages)
+
+    # Com Forçar Gemini, o Tesseract cobre as páginas que o Gemini não extraiu
+    missing = [page_num for page_num in escalate if page_num not in gemini_pages] if gemini_first else []
+    if missing:
+        fallback, _ = _tesseract_page_blocks(pdf_path, missing, confidence_threshold, report, ocr_workers)
+        blocks.update(fallback)
+
+    for page_num, placeholder in failures.items():
+        blocks.setdefault(page_num, placeholder)
+
+    return blocks
+
+def _tesseract_page_blocks(pdf_path: str, pages: Iterable[int], confidence_threshold: float, report: dict,
+                           ocr_workers: Optional[int]) -> tuple:
+    """Tesseract nas páginas informadas: ({numero_da_pagina: bloco_markdown}, páginas abaixo do limiar)."""
+    blocks = {}
+    low_confidence = []
+    try:
+        for page_num, (text, confidence) in ocr_tesseract_pages_scored(pdf_path, page_numbers=pages, workers=ocr_workers).items():
+            if text.strip():
+                blocks[page_num] = format_page_markdown(page_num, text)
+            else:
+                print(f"Alerta: Tesseract não encontrou texto na página {page_num}.")
+                blocks[page_num] = f"\n\n# PÁGINA {page_num} (VAZIA)\n\n"
+            if confidence < confidence_threshold:
+                print(f"Alerta: confiança do Tesseract na página {page_num} é {confidence:.0f} (limiar {confidence_threshold:.0f}).")
+                low_confidence.append(page_num)
+        report["tesseract_pages"] += len(blocks)
+        report["low_confidence_pages"].extend(low_confidence)
+    except pytesseract.TesseractNotFoundError:
+        print("Erro: Tesseract não encontrado. Verifique a instalação e o PATH.")
+    except Exception as e:
+        print(f"Erro durante o OCR local com Tesseract: {e}")
+    return blocks, low_confidence
+
+def extract_pdf_hybrid(pdf_path: str, output_md: str, gemini_key: Optional[str] = None,
+                       force_gemini: bool = False, text_layer: Optional[Dict[int, Optional[str]]] = None,
+                       confidence_threshold: Optional[float] = None, ocr_workers: Optional[int] = None) -> Optional[dict]:
+    """
+    Converte um PDF página a página: usa a camada de texto (PyMuPDF) nas páginas que a possuem
+    e envia ao OCR (Tesseract, com escalonamento seletivo ao Gemini) apenas as páginas só com imagem,
+    gerando um único Markdown. Serve tanto para PDFs mistos quanto para PDFs totalmente escaneados.
+
+    Args:
+        text_layer: Resultado de get_pdf_text_layer, se já calculado (evita reler o PDF).
+        confidence_threshold: Limiar de confiança do Tesseract para reenviar a página ao Gemini.
+        ocr_workers: Processos de Tesseract para este PDF (None = OCR_WORKERS / núcleos).
+
+    Returns:
+        Relatório (ver new_ocr_report) se algum conteúdo foi extraído e salvo, None caso contrário.
+    """
+    pdf_filename = os.path.basename(pdf_path)
+    if text_layer is None:
+        text_layer = get_pdf_text_layer(pdf_path)
+    if not text_layer:
+        # PyMuPDF não conseguiu ler o arquivo: tenta OCR em todas as páginas via Poppler
+        text_layer = {page_num: None for page_num in range(1, get_pdf_page_count(pdf_path) + 1)}
+    if not text_layer:
+        print(f"Falha: não foi possível ler as páginas de {pdf_filename}.")
+        return None
+
+    report = new_ocr_report()
+    blocks = {page_num: format_page_markdown(page_num, text)
+              for page_num, text in text_layer.items() if text is not None}
+    report["text_pages"] = len(blocks)
+    ocr_pages = [page_num for page_num, text in text_layer.items() if text is None]
+
+    print(f"Roteamento por página de {pdf_filename}: {len(blocks)} com texto, {len(ocr_pages)} para OCR.")
+    if ocr_pages:
+        blocks.update(ocr_page_blocks(pdf_path, ocr_pages, gemini_key, force_gemini,
+                                      confidence_threshold=confidence_threshold, report=report,
+                                      ocr_workers=ocr_workers))
+
+    report["failed_pages"] = [page_num for page_num in ocr_pages if page_num not in blocks]
+    if report["failed_pages"] and len(report["failed_pages"]) == len(ocr_pages) and not report["text_pages"]:
+        print(f"Falha total: Nenhuma página foi processada com sucesso para {pdf_filename}.")
+        return None
+
+    for page_num in report["failed_pages"]:
+        blocks[page_num] = f"\n\n# ERRO DE EXTRAÇÃO NA PÁGINA {page_num}\n\n"
+
+    with open(output_md, 'w', encoding='utf-8-sig') as f:
+        f.write("\n".join(blocks[page_num] for page_num in sorted(blocks)))
+    print(f"Extração por página concluída ({len(report['failed_pages'])} páginas sem OCR): {output_md}")
+    return report
@@ -2,12 +2,245 @@
 
 import fitz # PyMuPDF
 from markitdown import MarkItDown
+import io
 import os
+import math
+import random
+from typing import Dict, Iterable, List, Optional
 from docx import Document # python-docx
 
+# Classificação das páginas por sinais baratos (recursos da página), sem extrair o texto
+PAGE_DIGITAL = "digital"   # página com texto nativo
+PAGE_SCANNED = "scanned"   # página só com imagem: precisa de OCR
+PAGE_BLANK = "blank"       # página sem fontes nem imagens
+
+# Fração da página coberta por imagens a partir da qual uma página com fontes é verificada pelo texto
+# (pode ser um escaneado com poucas palavras ou uma camada de OCR invisível).
+IMAGE_COVERAGE_THRESHOLD = 0.5
+
+# Detecção por amostragem: máximo e mínimo de páginas amostradas e o z do intervalo de confiança (95%).
+PDF_DETECT_MAX_SAMPLES = int(os.getenv("PDF_DETECT_MAX_SAMPLES", "64"))
+PDF_DETECT_MIN_SAMPLES = 8
+PDF_DETECT_Z = 1.96
+
+# Veredito da detecção para o documento inteiro (ver PdfDocument.layout)
+PDF_DIGITAL = "digital"     # todas as páginas são digitais: MarkItDown
+PDF_SCANNED = "scanned"     # todas as páginas são escaneadas: OCR em tudo
+PDF_MIXED = "mixed"         # há dos dois tipos: classificação completa, página a página
+
+class PdfDocument:
+    """
+    PDF aberto uma única vez (PyMuPDF) e compartilhado entre detecção e extração.
+    O texto de cada página é extraído sob demanda e mantido em cache, de modo que o texto
+    lido na detecção é o mesmo gravado na extração, sem reprocessar o arquivo.
+    """
+
+    def __init__(self, pdf_path: str, min_text_chars: int = 30, stream: Optional[bytes] = None):
+        self.pdf_path = pdf_path
+        self.min_text_chars = min_text_chars
+        # Com stream, o PDF é aberto da memória (pdf_path serve apenas de nome nos logs)
+        self.doc = fitz.open(stream=stream, filetype="pdf") if stream is not None else fitz.open(pdf_path)
+        self._text_cache = {}
+        self._has_images_cache = {}
+        self._kind_cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.doc.close()
+
+    @property
+    def page_count(self) -> int:
+        return self.doc.page_count
+
+    def page_text(self, page_num: int) -> str:
+        """Texto da página (1-based) em ordem de leitura, extraído uma única vez."""
+        if page_num not in self._text_cache:
+            # 'sort=True' ordena os blocos em ordem de leitura, já pronto para a extração
+            self._text_cache[page_num] = self.doc[page_num - 1].get_text("text", sort=True)
+        return self._text_cache[page_num]
+
+    def page_has_images(self, page_num: int) -> bool:
+        if page_num not in self._has_images_cache:
+            self._has_images_cache[page_num] = bool(self.doc[page_num - 1].get_images())
+        return self._has_images_cache[page_num]
+
+    def page_needs_ocr(self, page_num: int) -> bool:
+        """Página escaneada: pouco texto nativo e ao menos uma imagem."""
+        if len(self.page_text(page_num).strip()) >= self.min_text_chars:
+            return False
+        # Página sem imagens (em branco ou só com pouco texto): nada a ganhar com OCR
+        return self.page_has_images(page_num)
+
+    def _image_coverage(self, page) -> float:
+        """Fração da área da página coberta por imagens (retângulos sobrepostos contam em dobro, limitado a 1)."""
+        page_area = abs(page.rect) or 1.0
+        covered = 0.0
+        for image in page.get_images():
+            for rect in page.get_image_rects(image[0]):
+                covered += abs(rect & page.rect)
+        return min(covered / page_area, 1.0)
+
+    def page_kind(self, page_num: int) -> str:
+        """
+        Classifica a página (1-based) como PAGE_DIGITAL, PAGE_SCANNED ou PAGE_BLANK.
+
+        Usa primeiro os recursos da página (fontes e imagens), que não exigem extrair o texto.
+        Só quando há fontes e imagens cobrindo boa parte da página o texto é lido para decidir.
+        """
+        if page_num in self._kind_cache:
+            return self._kind_cache[page_num]
+
+        page = self.doc[page_num - 1]
+        has_fonts = bool(page.get_fonts())
+        has_images = self.page_has_images(page_num)
+
+        if not has_fonts:
+            # Sem fontes não há texto nativo possível
+            kind = PAGE_SCANNED if has_images else PAGE_BLANK
+        elif not has_images or self._image_coverage(page) < IMAGE_COVERAGE_THRESHOLD:
+            kind = PAGE_DIGITAL
+        else:
+            kind = PAGE_SCANNED if self.page_needs_ocr(page_num) else PAGE_DIGITAL
+
+        self._kind_cache[page_num] = kind
+        return kind
+
+    def classify_pages(self, page_numbers: Optional[Iterable[int]] = None) -> Dict[int, str]:
+        """{numero_da_pagina: classificação} (ver page_kind) das páginas informadas, ou de todas."""
+        if page_numbers is None:
+            page_numbers = range(1, self.page_count + 1)
+        return {page_num: self.page_kind(page_num) for page_num in page_numbers}
+
+    def detect_is_digital(self, threshold: float = 0.7, max_samples: int = PDF_DETECT_MAX_SAMPLES,
+                          min_samples: int = PDF_DETECT_MIN_SAMPLES) -> bool:
+        """
+        Decide se o PDF é predominantemente digital sem classificar todas as páginas.
+
+        As páginas são amostradas de forma estratificada (uma por faixa do documento, em ordem
+        espalhada) e a amostragem para assim que o intervalo de confiança de Wilson da proporção
+        de páginas digitais fica inteiramente acima ou abaixo de `threshold`.
+        """
+        total_pages = self.page_count
+        if total_pages == 0:
+            return False
+
+        digital = 0
+        sampled = 0
+        for page_num in stratified_sample(total_pages, max_samples, seed=total_pages):
+            sampled += 1
+            if self.page_kind(page_num) == PAGE_DIGITAL:
+                digital += 1
+            if sampled >= min(min_samples, total_pages):
+                low, high = wilson_interval(digital, sampled, PDF_DETECT_Z)
+                if low >= threshold or high < threshold:
+                    break
+        return digital / sampled >= threshold
+
+    def sample_layout(self, max_samples: int = PDF_DETECT_MAX_SAMPLES) -> Optional[str]:
+        """
+        Veredito PDF_DIGITAL, PDF_SCANNED ou PDF_MIXED a partir de uma amostra estratificada das páginas
+        (páginas em branco não contam). Para na primeira página que contradiz as anteriores, então
+        documentos mistos custam poucas páginas; com até `max_samples` páginas o veredito é exato.
+        None se o PDF não tiver páginas.
+        """
+        total_pages = self.page_count
+        if total_pages == 0:
+            return None
+        return self._layout_of(stratified_sample(total_pages, max_samples, seed=total_pages))
+
+    def layout(self, max_samples: int = PDF_DETECT_MAX_SAMPLES) -> Optional[str]:
+        """
+        Veredito do documento inteiro: a amostra (sample_layout) só decide sozinha quando é mista. Um
+        veredito uniforme de uma amostra parcial é confirmado pelos sinais baratos (page_kind) em todas as
+        páginas, pois blocos escaneados entre as páginas amostradas seriam perdidos pelo MarkItDown.
+        """
+        verdict = self.sample_layout(max_samples)
+        if verdict is None or verdict == PDF_MIXED or self.page_count <= max_samples:
+            return verdict
+        return self._layout_of(range(1, self.page_count + 1), expected=verdict)
+
+    def _layout_of(self, page_numbers: Iterable[int], expected: Optional[str] = None) -> str:
+        """Veredito das páginas informadas; PDF_MIXED na primeira página que contradiz `expected` ou as anteriores."""
+        kinds = {PAGE_SCANNED if expected == PDF_SCANNED else PAGE_DIGITAL} if expected else set()
+        for page_num in page_numbers:
+            kind = self.page_kind(page_num)
+            if kind != PAGE_BLANK:
+                kinds.add(kind)
+            if len(kinds) > 1:
+                return PDF_MIXED
+        return PDF_SCANNED if kinds == {PAGE_SCANNED} else PDF_DIGITAL
+
+    def text_layer(self) -> Dict[int, Optional[str]]:
+        """
+        {numero_da_pagina (1-based): texto} para páginas digitais (ou sem imagens) e
+        {numero_da_pagina: None} para páginas escaneadas, que precisam de OCR.
+        Páginas escaneadas ou em branco pelos sinais baratos não têm o texto extraído.
+        """
+        layer = {}
+        for page_num, kind in self.classify_pages().items():
+            if kind == PAGE_SCANNED:
+                layer[page_num] = None
+            elif kind == PAGE_BLANK:
+                layer[page_num] = ""
+            else:
+                # Confirma pelo texto: fontes declaradas nem sempre significam texto na página
+                layer[page_num] = None if self.page_needs_ocr(page_num) else self.page_text(page_num)
+        return layer
+
+
+def wilson_interval(successes: int, trials: int, z: float = PDF_DETECT_Z) -> tuple:
+    """Intervalo de confiança de Wilson (inferior, superior) para a proporção successes/trials."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+def stratified_sample(total_pages: int, max_samples: int, seed: int = 0) -> List[int]:
+    """
+    Páginas (1-based) amostradas de forma estratificada: o documento é dividido em até `max_samples`
+    faixas e uma página aleatória é sorteada em cada uma. As faixas são visitadas em ordem espalhada
+    (sequência de van der Corput), de modo que qualquer prefixo da amostra cobre o documento todo.
+    """
+    strata = max(1, min(total_pages, max_samples))
+    rng = random.Random(seed)
+    picks = []
+    for index in range(strata):
+        start = index * total_pages // strata
+        end = (index + 1) * total_pages // strata
+        picks.append(rng.randrange(start, end) + 1)
+
+    def van_der_corput(n: int) -> float:
+        value, denominator = 0.0, 1.0
+        while n:
+            denominator *= 2
+            n, remainder = divmod(n, 2)
+            value += remainder / denominator
+        return value
+
+    order = sorted(range(strata), key=lambda index: (van_der_corput(index), index))
+    return [picks[index] for index in order]
+
+
+def open_pdf_document(pdf_path: str, min_text_chars: int = 30, stream: Optional[bytes] = None) -> Optional[PdfDocument]:
+    """Abre o PDF (do disco ou de `stream`) para detecção/extração compartilhadas, ou retorna None se não puder ser lido."""
+    try:
+        return PdfDocument(pdf_path, min_text_chars=min_text_chars, stream=stream)
+    except Exception as e:
+        print(f"Erro na detecção do PDF {pdf_path}: {e}")
+        return None
+
 def is_digital_pdf(pdf_path: str, min_text_chars: int = 30, threshold: float = 0.7) -> bool:
     """
     Verifica se um PDF é predominantemente digital (texto extraível) ou escaneado (imagem).
+    Amostra as páginas e para assim que a decisão é estatisticamente clara (ver PdfDocument.detect_is_digital).
 
     Args:
         pdf_path: Caminho completo para o arquivo PDF.
@@ -17,25 +250,81 @@ def is_digital_pdf(pdf_path: str, min_text_chars: int = 30, threshold: float = 0
     Returns:
         True se for digital, False se for escaneado (imagem).
     """
+    document = open_pdf_document(pdf_path, min_text_chars=min_text_chars)
+    if document is None:
+        return False
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
-        if total_pages == 0:
-            return False
+        with document:
+            return document.detect_is_digital(threshold=threshold)
+
+    except Exception as e:
+        print(f"Erro na detecção do PDF {pdf_path}: {e}")
+        return False
+
+def detect_pdf_layout(pdf_path: str, min_text_chars: int = 30, stream: Optional[bytes] = None,
+                      document: Optional[PdfDocument] = None) -> tuple:
+    """
+    Detecção em duas etapas: amostra as páginas e confirma um veredito uniforme pelos sinais baratos de
+    todas elas (PdfDocument.layout); o texto das páginas só é extraído quando o veredito é misto.
+
+    Args:
+        pdf_path: Caminho completo para o arquivo PDF (com stream, apenas o nome usado nos logs).
+        min_text_chars: Mínimo de caracteres para uma página ser considerada "com texto".
+        stream: Conteúdo do PDF já em memória (ex.: download em streaming), sem leitura do disco.
+        document: PdfDocument já aberto (ver open_pdf_document), reaproveitado na extração por quem
+            chamou; não é fechado aqui.
+
+    Returns:
+        (veredito, camada de texto):
+        - (PDF_DIGITAL, None): extração estruturada pelo MarkItDown, sem ler o texto das páginas;
+        - (PDF_SCANNED, {pagina: None}): OCR em todas as páginas (as em branco ficam com "");
+        - (PDF_MIXED, PdfDocument.text_layer()): texto nativo onde existe, OCR no resto;
+        - (None, {}) se o PDF não puder ser lido ou não tiver páginas.
+    """
+    if document is not None:
+        return _document_layout(document)
+    document = open_pdf_document(pdf_path, min_text_chars=min_text_chars, stream=stream)
+    if document is None:
+        return None, {}
+    with document:
+        return _document_layout(document)
+
+def _document_layout(document: PdfDocument) -> tuple:
+    try:
+        verdict = document.layout()
+        if verdict == PDF_DIGITAL:
+            return verdict, None
+        if verdict == PDF_SCANNED:
+            return verdict, {page_num: "" if document._kind_cache.get(page_num) == PAGE_BLANK else None
+                             for page_num in range(1, document.page_count + 1)}
+        if verdict == PDF_MIXED:
+            return verdict, document.text_layer()
+        return None, {}
+    except Exception as e:
+        print(f"Erro na detecção do PDF {document.pdf_path}: {e}")
+        return None, {}
 
-        pages_with_text = 0
-        for page in doc:
-            # Extrai texto simples
-            text = page.get_text()
-            if len(text.strip()) >= min_text_chars:
-                pages_with_text += 1
+def get_pdf_text_layer(pdf_path: str, min_text_chars: int = 30, stream: Optional[bytes] = None) -> Dict[int, Optional[str]]:
+    """
+    Classifica cada página do PDF pela camada de texto (PyMuPDF).
 
-        ratio = pages_with_text / total_pages
-        return ratio >= threshold
+    Args:
+        pdf_path: Caminho completo para o arquivo PDF (com stream, apenas o nome usado nos logs).
+        min_text_chars: Mínimo de caracteres para uma página ser considerada "com texto".
+        stream: Conteúdo do PDF já em memória (ex.: download em streaming), sem leitura do disco.
 
+    Returns:
+        Ver PdfDocument.text_layer. Dicionário vazio se o PDF não puder ser lido.
+    """
+    document = open_pdf_document(pdf_path, min_text_chars=min_text_chars, stream=stream)
+    if document is None:
+        return {}
+    try:
+        with document:
+            return document.text_layer()
     except Exception as e:
         print(f"Erro na detecção do PDF {pdf_path}: {e}")
-        return False
+        return {}
 
 def preprocess_docx_with_pagination(docx_path: str) -> str:
     """
@@ -74,13 +363,16 @@ def preprocess_docx_with_pagination(docx_path: str) -> str:
         print(f"Aviso: Falha ao processar paginação do DOCX ({e}). Usando arquivo original.")
         return docx_path
 
-def extract_structured_markitdown(file_path: str, output_md: str):
+def extract_structured_markitdown(file_path: str, output_md: str, stream: Optional[bytes] = None,
+                                  document: Optional[PdfDocument] = None):
     """
     Extrai o texto de qualquer arquivo suportado (PDF digital, DOCX, XLSX, etc.) 
     usando MarkItDown para preservar a estrutura.
     Em caso de falha no PDF, tenta um fallback simples com PyMuPDF.
+    Com stream, o conteúdo vem da memória (file_path serve de nome e extensão).
+    Com document (PdfDocument aberto na detecção), o fallback lê as páginas dele, sem reabrir o arquivo.
     """
-    if not os.path.exists(file_path):
+    if stream is None and not os.path.exists(file_path):
         print(f"Erro: Arquivo não encontrado em {file_path}")
         return
 
@@ -88,7 +380,7 @@ def extract_structured_markitdown(file_path: str, output_md: str):
     is_temp_docx = False
 
     # --- Pré-processamento para DOCX (Paginação) ---
-    if file_path.lower().endswith('.docx'):
+    if stream is None and file_path.lower().endswith('.docx'):
         print("Pré-processando DOCX para inserir marcadores de página...")
         processing_path = preprocess_docx_with_pagination(file_path)
         if processing_path != file_path:
@@ -99,7 +391,10 @@ def extract_structured_markitdown(file_path: str, output_md: str):
         md_converter = MarkItDown()
         print(f"Iniciando conversão estruturada de {os.path.basename(file_path)} para Markdown (MarkItDown)...")
         
-        result = md_converter.convert(processing_path)
+        if stream is not None:
+            result = md_converter.convert_stream(io.BytesIO(stream), file_extension=os.path.splitext(file_path)[1].lower())
+        else:
+            result = md_converter.convert(processing_path)
         markdown_content = result.text_content
         
         # REMOVIDO: A verificação de tabelas estava forçando fallback em documentos de texto puro.
@@ -118,12 +413,18 @@ def extract_structured_markitdown(file_path: str, output_md: str):
         if file_path.lower().endswith('.pdf'):
             print("Tentando fallback com PyMuPDF (layout) para PDF...")
             try:
-                doc = fitz.open(file_path)
-                with open(output_md, 'w', encoding='utf-8-sig') as f:
-                    for i, page in enumerate(doc):
-                        # Usamos 'text' com o parâmetro 'layout' para tentar preservar o espaçamento
-                        text = page.get_text("text", sort=True) 
-                        f.write(f"\n\n## Página {i+1}\n\n{text.strip()}\n")
+                own_document = document is None
+                if own_document:
+                    document = PdfDocument(file_path, stream=stream)
+                try:
+                    with open(output_md, 'w', encoding='utf-8-sig') as f:
+                        for page_num in range(1, document.page_count + 1):
+                            # Texto em ordem de leitura ('sort=True'), já em cache se lido na detecção
+                            text = document.page_text(page_num)
+                            f.write(f"\n\n## Página {page_num}\n\n{text.strip()}\n")
+                finally:
+                    if own_document:
+                        document.close()
                 print(f"Extração digital (Fallback PyMuPDF com layout) concluída: {output_md}")
             except Exception as e_f:
                 print(f"Falha total na extração digital de PDF: {e_f}")
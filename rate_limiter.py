@@ -0,0 +1,103 @@
+# rate_limiter.py
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+
+class RateLimiter:
+    """
+    Orçamento compartilhado de requisições e tokens por minuto (janela deslizante de 60s).
+    Seguro para uso entre threads: cada chamada a acquire() bloqueia até haver orçamento.
+    Limites iguais a 0 significam "sem limite".
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        # Cada reserva é uma lista mutável [timestamp, tokens] para permitir o ajuste posterior
+        self._reservations = deque()
+        self._tokens_in_window = 0
+
+    def _purge(self, now: float):
+        while self._reservations and now - self._reservations[0][0] >= self.WINDOW_SECONDS:
+            _, tokens = self._reservations.popleft()
+            self._tokens_in_window -= tokens
+
+    def acquire(self, tokens: int = 0) -> list:
+        """
+        Reserva uma requisição (e `tokens` estimados) na janela atual, aguardando se necessário.
+        Retorna a reserva, que pode ser corrigida com settle() quando o consumo real for conhecido.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._purge(now)
+
+                rpm_ok = self.requests_per_minute <= 0 or len(self._reservations) < self.requests_per_minute
+                # Uma requisição maior que o orçamento inteiro passa sozinha com a janela vazia
+                tpm_ok = (self.tokens_per_minute <= 0
+                          or self._tokens_in_window + tokens <= self.tokens_per_minute
+                          or not self._reservations)
+
+                if rpm_ok and tpm_ok:
+                    reservation = [now, tokens]
+                    self._reservations.append(reservation)
+                    self._tokens_in_window += tokens
+                    return reservation
+
+                wait = self.WINDOW_SECONDS - (now - self._reservations[0][0])
+
+            time.sleep(max(wait, 0.05))
+
+    def settle(self, reservation: list, actual_tokens: Optional[int]):
+        """Substitui os tokens estimados de uma reserva pelo consumo real informado pela API."""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            if any(r is reservation for r in self._reservations):
+                self._tokens_in_window += actual_tokens - reservation[1]
+            reservation[1] = actual_tokens
+
+
+def backoff_delay(attempt: int, base_delay: float = 2.0, max_delay: float = 60.0) -> float:
+    """Atraso exponencial com jitter completo para a tentativa `attempt` (0-based)."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def is_retryable_api_error(error: Exception) -> bool:
+    """
+    Indica se um erro de API é transitório: 429 (limite de taxa), 5xx, timeouts e falhas de conexão.
+    As exceções do google.api_core expõem o status HTTP no atributo `code`.
+    """
+    code = getattr(error, 'code', None)
+    if code in (408, 429, 500, 502, 503, 504):
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return False
+
+
+def call_with_retries(func: Callable, max_retries: int = 5, base_delay: float = 2.0,
+                      max_delay: float = 60.0, is_retryable: Callable[[Exception], bool] = is_retryable_api_error,
+                      label: str = ""):
+    """
+    Executa func() repetindo erros transitórios com backoff exponencial e jitter.
+    Erros não transitórios, ou a última falha após max_retries, são propagados ao chamador.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            print(f"Aviso: erro transitório{' em ' + label if label else ''} ({e}). Nova tentativa em {delay:.1f}s...")
+            time.sleep(delay)
+            attempt += 1
@@ -77,4 +77,4 @@ class GeminiClient:
             return response.text.strip()
 
         except Exception as e:
-            raise RuntimeError(f"Error generating completion with Gemini: {str(e)}")
+            raise RuntimeError(f"Error generating completion with Gemini: {str(e)}") from e
@@ -0,0 +1,120 @@
+# tests/test_batch_manifest.py
+
+import os
+
+from batch_engine import BATCH_MANIFEST_NAME, batch_output_path, scan_directory
+from batch_manifest import BatchManifest, fingerprint_file, fingerprint_files, hash_output
+
+
+def write(path, text="a,b\n1,2\n"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def convert(manifest, source):
+    """Simula uma conversão concluída: grava a saída e registra no manifesto."""
+    output = write(batch_output_path(source), f"# {source.name}\n")
+    manifest.record(source, fingerprint_file(source), output, engine="sig")
+    return output
+
+
+def test_new_and_converted_files(tmp_path):
+    a, b = write(tmp_path / "a.csv"), write(tmp_path / "b.csv")
+    manifest = BatchManifest(tmp_path)
+    assert manifest.plan([a, b], batch_output_path) == ([a, b], [])
+
+    convert(manifest, a)
+    assert manifest.plan([a, b], batch_output_path) == ([b], [a])
+    assert manifest.plan([a, b], batch_output_path, overwrite=True) == ([a, b], [])
+
+
+def test_touched_file_is_skipped_by_hash_and_changed_file_converted(tmp_path):
+    a, b = write(tmp_path / "a.csv"), write(tmp_path / "b.csv")
+    manifest = BatchManifest(tmp_path)
+    convert(manifest, a)
+    convert(manifest, b)
+
+    os.utime(a, ns=(1, 1))
+    write(b, "a,b\n3,4\n")
+    assert manifest.stale_files([a, b], batch_output_path) == [a, b]
+    assert manifest.plan([a, b], batch_output_path) == ([b], [a])
+    # O registro do arquivo só tocado foi atualizado: a próxima execução nem lê o arquivo
+    assert manifest.stale_files([a], batch_output_path) == []
+
+
+def test_plan_with_precomputed_fingerprints_reads_nothing(tmp_path):
+    a, b = write(tmp_path / "a.csv"), write(tmp_path / "b.csv")
+    manifest = BatchManifest(tmp_path)
+    convert(manifest, a)
+    os.utime(a, ns=(1, 1))
+    write(batch_output_path(b), "legado")
+
+    stale = manifest.stale_files([a, b], batch_output_path)
+    assert stale == [a, b]
+    fingerprints = fingerprint_files(stale)
+    output_hashes = {batch_output_path(path): hash_output(batch_output_path(path)) for path in stale}
+    to_convert, skipped = manifest.plan([a, b], batch_output_path, fingerprints=fingerprints,
+                                        output_hashes=output_hashes)
+    assert (to_convert, skipped) == ([], [a, b])
+    # Saída de um lote anterior ao manifesto: adotada, com o hash informado
+    assert manifest.entries["b.csv"]["output_hash"] == output_hashes[batch_output_path(b)]
+
+    # Arquivo que precisaria ser lido e não está nos fingerprints: convertido
+    os.utime(a, ns=(2, 2))
+    assert manifest.plan([a], batch_output_path, fingerprints={}, output_hashes={}) == ([a], [])
+
+
+def test_save_and_reload(tmp_path):
+    a = write(tmp_path / "sub" / "a.csv")
+    manifest = BatchManifest(tmp_path)
+    convert(manifest, a)
+    manifest.save()
+
+    reloaded = BatchManifest(tmp_path)
+    assert reloaded.entries == manifest.entries
+    assert reloaded.entries["sub/a.csv"]["output"] == "sub/aMD.md"
+    assert scan_directory(tmp_path, {".csv"}) == [a]
+    assert (tmp_path / BATCH_MANIFEST_NAME).exists()
+
+
+def test_corrupt_manifest_adopts_existing_outputs(tmp_path):
+    a = write(tmp_path / "a.csv")
+    write(batch_output_path(a), "# a\n")
+    (tmp_path / BATCH_MANIFEST_NAME).write_text("{não é json", encoding="utf-8")
+    manifest = BatchManifest(tmp_path)
+    assert manifest.entries == {}
+    assert manifest.plan([a], batch_output_path) == ([], [a])
+
+
+def test_remove_deleted_keeps_edited_outputs(tmp_path):
+    a, b, c = write(tmp_path / "a.csv"), write(tmp_path / "b.csv"), write(tmp_path / "c.csv")
+    manifest = BatchManifest(tmp_path)
+    out_a, out_b = convert(manifest, a), convert(manifest, b)
+    convert(manifest, c)
+    write(out_b, "editado à mão")
+    a.unlink()
+    b.unlink()
+
+    removed = manifest.remove_deleted([c])
+    assert removed == [(tmp_path / "a.csv", out_a)]
+    assert not out_a.exists() and out_b.exists()
+    assert sorted(manifest.entries) == ["c.csv"]
+
+
+def test_pop_deleted_under_only_checks_that_path(tmp_path):
+    files = [write(tmp_path / name) for name in ("sub/a.csv", "sub/b.csv", "sub2/c.csv", "d.csv")]
+    manifest = BatchManifest(tmp_path)
+    for path in files:
+        convert(manifest, path)
+    for path in files:
+        path.unlink()
+
+    # Pasta apagada: só as origens dentro dela (sub2/ não casa com o prefixo sub/)
+    deleted = manifest.pop_deleted([], under=tmp_path / "sub")
+    assert sorted(key for key, _ in deleted) == ["sub/a.csv", "sub/b.csv"]
+    assert [key for key, _ in manifest.pop_deleted([], under=tmp_path / "d.csv")] == ["d.csv"]
+    assert sorted(manifest.entries) == ["sub2/c.csv"]
+    # Arquivo ainda existente não é removido
+    write(tmp_path / "sub2" / "c.csv")
+    assert manifest.pop_deleted([], under=tmp_path / "sub2") == []
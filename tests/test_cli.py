@@ -0,0 +1,29 @@
+# tests/test_cli.py
+
+from pathlib import Path
+
+from cli import expand_inputs, resolve_output_path
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("x", encoding="utf-8")
+    return path
+
+
+def test_expand_inputs_dirs_globs_and_files_without_duplicates(tmp_path):
+    a = touch(tmp_path / "lote" / "a.pdf")
+    b = touch(tmp_path / "lote" / "sub" / "b.docx")
+    touch(tmp_path / "lote" / "ignorado.txt")
+    c = touch(tmp_path / "solto" / "c.csv")
+    notes = touch(tmp_path / "solto" / "notas.txt")
+
+    expanded = expand_inputs([str(tmp_path / "lote"), str(tmp_path / "solto" / "*"), str(notes), str(a)])
+
+    assert expanded == [(a, tmp_path / "lote"), (b, tmp_path / "lote"), (c, c.parent), (notes, notes.parent)]
+
+
+def test_output_path_keeps_relative_structure(tmp_path):
+    source = tmp_path / "lote" / "sub" / "b.docx"
+    assert resolve_output_path(source, tmp_path / "lote") == tmp_path / "lote" / "sub" / "bMD.md"
+    assert resolve_output_path(source, tmp_path / "lote", "saida") == Path("saida") / "sub" / "bMD.md"
@@ -0,0 +1,52 @@
+# tests/test_dropbox_browser.py
+
+from types import SimpleNamespace
+
+from dropbox_browser import DropboxBrowser
+
+
+class FakeHandler:
+    """fetch_subfolders com respostas programadas (listas ou exceções), na ordem das chamadas."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def fetch_subfolders(self, folder_path):
+        self.calls.append(folder_path)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_browser(*responses):
+    browser = DropboxBrowser("token-de-teste", prefetch_workers=0)
+    browser.handler = FakeHandler(*responses)
+    return browser
+
+
+def test_failed_listing_is_reported_and_not_cached():
+    folder = SimpleNamespace(name="a", path_display="/a")
+    browser = make_browser(ConnectionError("rede fora"), [folder])
+
+    assert browser.list_subfolders("/") == []
+    assert "rede fora" in browser.last_error
+
+    assert browser.list_subfolders("/") == [folder]
+    assert browser.last_error is None
+    assert browser.list_subfolders("/") == [folder]
+    assert browser.handler.calls == ["/", "/"]
+
+
+def test_failed_prefetch_is_retried_in_the_foreground():
+    child = SimpleNamespace(name="b", path_display="/a/b")
+    browser = DropboxBrowser("token-de-teste", prefetch_workers=1)
+    browser.handler = FakeHandler([SimpleNamespace(name="a", path_display="/a")], ConnectionError("falhou"), [child], [])
+    try:
+        browser.list_subfolders("/")
+        assert browser.list_subfolders("/a") == [child]
+        assert browser.last_error is None
+        assert browser.handler.calls[:3] == ["/", "/a", "/a"]
+    finally:
+        browser.close()
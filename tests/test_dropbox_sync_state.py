@@ -0,0 +1,50 @@
+# tests/test_dropbox_sync_state.py
+
+from datetime import datetime
+
+import dropbox
+import pytest
+
+import dropbox_sync_state
+
+
+def file_entry(path):
+    return dropbox.files.FileMetadata(
+        name=path.rsplit("/", 1)[-1], id=f"id:{path}", rev="0123456789", size=1, path_lower=path,
+        path_display=path, content_hash="0" * 64, server_modified=datetime(2026, 1, 1),
+        client_modified=datetime(2026, 1, 1))
+
+
+class FakeHandler:
+    """list_folder_changes com listagens programadas: (entradas, novo_cursor) por chamada."""
+
+    account_id = "dbid:teste"
+
+    def __init__(self, *listings):
+        self.listings = list(listings)
+
+    def list_folder_changes(self, folder_path, cursor=None):
+        entries, new_cursor = self.listings.pop(0)
+        return entries, new_cursor, False
+
+
+@pytest.fixture(autouse=True)
+def sync_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(dropbox_sync_state, "DROPBOX_SYNC_DB_PATH", str(tmp_path / "dropbox_sync.db"))
+    dropbox_sync_state.init_sync_db()
+
+
+def test_deleted_folder_removes_its_files_and_pending_changes(capsys):
+    dbx = FakeHandler(
+        ([file_entry("/lote/a.pdf"), file_entry("/lote/sub/b.pdf"), file_entry("/lote/sub2/c.pdf")], "c1"),
+        ([file_entry("/lote/sub/d.pdf"), file_entry("/lote/sub/e/f.pdf"), file_entry("/lote/sub2/g.pdf"),
+          dropbox.files.DeletedMetadata(name="sub", path_lower="/lote/sub", path_display="/lote/sub")], "c2"),
+    )
+    files, cursor = dropbox_sync_state.sync_folder_listing(dbx, "/lote")
+    assert cursor == "c1" and len(files) == 3
+
+    files, cursor = dropbox_sync_state.sync_folder_listing(dbx, "/Lote/")
+    assert cursor == "c2"
+    assert sorted(files) == ["/lote/a.pdf", "/lote/sub2/c.pdf", "/lote/sub2/g.pdf"]
+    # Só /lote/sub2/g.pdf continua como novo: os arquivos dentro da pasta apagada não contam
+    assert "1 arquivos novos/alterados e 1 remoções" in capsys.readouterr().out
@@ -0,0 +1,28 @@
+# tests/test_engine.py
+
+from conversion_cache import make_cache_key
+from engine import ConversionOptions
+
+
+def test_cache_settings_ignore_credentials_and_worker_count():
+    base = ConversionOptions(gemini_key="chave-a").cache_settings()
+    assert ConversionOptions(gemini_key="chave-b", ocr_workers=8).cache_settings() == base
+    assert "chave-a" not in str(base)
+    assert make_cache_key("abc", base) != make_cache_key("abc", ConversionOptions().cache_settings())
+
+
+def test_cache_settings_follow_the_options_that_change_the_output():
+    without_key = ConversionOptions(force_gemini=True, confidence_threshold=50).cache_settings()
+    # Sem chave, Forçar Gemini e o limiar de escalonamento não alteram a saída
+    assert without_key == ConversionOptions().cache_settings()
+    assert without_key["gemini_model"] is None and without_key["force_gemini"] is False
+
+    with_key = ConversionOptions(gemini_key="k").cache_settings()
+    assert with_key != without_key
+    assert ConversionOptions(gemini_key="k", force_gemini=True).cache_settings() != with_key
+    assert ConversionOptions(gemini_key="k", confidence_threshold=50).cache_settings() != with_key
+
+
+def test_options_round_trip_through_dict():
+    options = ConversionOptions(gemini_key="k", force_gemini=True, confidence_threshold=55, ocr_workers=2)
+    assert ConversionOptions.from_dict(options.to_dict()).to_dict() == options.to_dict()
@@ -0,0 +1,44 @@
+# tests/test_gcv_ocr.py
+
+import fitz
+import pytest
+
+import gcv_ocr
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    pixmap.clear_with(200)
+    doc = fitz.open()
+    for _ in range(3):
+        page = doc.new_page(width=300, height=400)
+        page.insert_image(page.rect, pixmap=pixmap)
+    path = tmp_path / "scan.pdf"
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_page_worker_reuses_the_document_opened_by_the_initializer(scanned_pdf, monkeypatch):
+    opened = []
+    real_open = fitz.open
+    monkeypatch.setattr(fitz, "open", lambda *args, **kwargs: opened.append(args) or real_open(*args, **kwargs))
+    monkeypatch.setattr(gcv_ocr, "get_page_cache", lambda: None)
+    monkeypatch.setattr(gcv_ocr, "tesseract_image_to_scored_text", lambda img, lang: (f"{img.size}", 90.0))
+    monkeypatch.setattr(gcv_ocr, "_worker_pdf", None)
+
+    gcv_ocr._init_tesseract_worker(scanned_pdf)
+    results = [gcv_ocr._tesseract_page_worker(scanned_pdf, page_num, 72, "por") for page_num in (1, 2, 3, 4)]
+
+    assert len(opened) == 1
+    assert [page_num for page_num, text, _ in results if text] == [1, 2, 3]
+    assert results[-1] == (4, "", 0.0)
+
+
+def test_ocr_workers_are_bounded_by_memory(monkeypatch):
+    monkeypatch.setattr(gcv_ocr, "OCR_MAX_MEMORY_MB", 1000)
+    per_page = gcv_ocr.estimate_page_memory_mb(300)
+    assert gcv_ocr.resolve_ocr_workers(64, dpi=300) == 1000 // per_page
+    monkeypatch.setattr(gcv_ocr, "OCR_MAX_MEMORY_MB", 0)
+    assert gcv_ocr.resolve_ocr_workers(64, dpi=300) == 64
@@ -0,0 +1,91 @@
+# tests/test_page_router.py
+
+import pytest
+
+import page_router
+from page_router import extract_pdf_hybrid, new_ocr_report, ocr_page_blocks
+
+
+class FakeOcr:
+    """Tesseract e Gemini simulados: registram as páginas pedidas e respondem com textos/confianças fixos."""
+
+    def __init__(self, confidences, gemini_fails=(), tesseract_error=None):
+        self.confidences = confidences
+        self.gemini_fails = set(gemini_fails)
+        self.tesseract_error = tesseract_error
+        self.tesseract_calls, self.gemini_calls = [], []
+
+    def tesseract(self, pdf_path, page_numbers=None, workers=None):
+        self.tesseract_calls.append(list(page_numbers))
+        if self.tesseract_error:
+            raise self.tesseract_error
+        return {page_num: (f"tesseract {page_num}", self.confidences[page_num]) for page_num in page_numbers}
+
+    def gemini(self, pdf_path, api_key, page_numbers=None):
+        self.gemini_calls.append(list(page_numbers))
+        pages = {page_num: f"gemini {page_num}" for page_num in page_numbers if page_num not in self.gemini_fails}
+        failures = {page_num: f"# PÁGINA {page_num} (FALHA)" for page_num in page_numbers if page_num in self.gemini_fails}
+        return pages, failures
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    def install(*args, **kwargs):
+        fake = FakeOcr(*args, **kwargs)
+        monkeypatch.setattr(page_router, "ocr_tesseract_pages_scored", fake.tesseract)
+        monkeypatch.setattr(page_router, "ocr_gemini_pages", fake.gemini)
+        return fake
+    return install
+
+
+def test_without_gemini_key_low_confidence_pages_keep_tesseract_text(fake_ocr):
+    fake = fake_ocr({1: 95, 2: 40})
+    report = new_ocr_report()
+    blocks = ocr_page_blocks("x.pdf", [2, 1], confidence_threshold=70, report=report)
+
+    assert "tesseract 2" in blocks[2]
+    assert fake.gemini_calls == []
+    assert report["low_confidence_pages"] == [2] and report["escalated_pages"] == []
+
+
+def test_only_low_confidence_pages_are_escalated(fake_ocr):
+    fake = fake_ocr({1: 95, 2: 40, 3: 10}, gemini_fails=[3])
+    report = new_ocr_report()
+    blocks = ocr_page_blocks("x.pdf", [1, 2, 3], gemini_key="k", confidence_threshold=70, report=report)
+
+    assert fake.gemini_calls == [[2, 3]]
+    assert "tesseract 1" in blocks[1] and "gemini 2" in blocks[2]
+    # Falha do Gemini mantém o texto do Tesseract
+    assert "tesseract 3" in blocks[3]
+    assert report["gemini_pages"] == [2] and report["tesseract_pages"] == 3
+
+
+def test_tesseract_failure_sends_every_page_to_gemini(fake_ocr):
+    fake = fake_ocr({}, tesseract_error=RuntimeError("sem tesseract"))
+    blocks = ocr_page_blocks("x.pdf", [1, 2], gemini_key="k")
+
+    assert fake.gemini_calls == [[1, 2]]
+    assert "gemini 1" in blocks[1] and "gemini 2" in blocks[2]
+
+
+def test_force_gemini_runs_tesseract_only_on_missing_pages(fake_ocr):
+    fake = fake_ocr({1: 95, 2: 95, 3: 95}, gemini_fails=[2])
+    blocks = ocr_page_blocks("x.pdf", [1, 2, 3], gemini_key="k", force_gemini=True)
+
+    assert fake.gemini_calls == [[1, 2, 3]]
+    assert fake.tesseract_calls == [[2]]
+    assert "gemini 1" in blocks[1] and "tesseract 2" in blocks[2] and "gemini 3" in blocks[3]
+
+
+def test_hybrid_extraction_sends_only_image_pages_to_ocr(fake_ocr, tmp_path):
+    fake = fake_ocr({2: 95, 4: 95})
+    output_md = tmp_path / "out.md"
+    report = extract_pdf_hybrid("x.pdf", str(output_md),
+                                text_layer={1: "texto 1", 2: None, 3: "texto 3", 4: None})
+
+    assert fake.tesseract_calls == [[2, 4]]
+    assert report["text_pages"] == 2 and report["ocr_pages"] == 2 and report["failed_pages"] == []
+    content = output_md.read_text(encoding="utf-8-sig")
+    positions = [content.index(f"# PÁGINA {page_num}") for page_num in (1, 2, 3, 4)]
+    assert positions == sorted(positions)
+    assert "texto 3" in content and "tesseract 4" in content
@@ -0,0 +1,84 @@
+# tests/test_pdf_detector.py
+
+import fitz
+import pytest
+
+from pdf_detector import (PDF_DIGITAL, PDF_MIXED, PDF_SCANNED, PAGE_BLANK, PAGE_DIGITAL, PAGE_SCANNED,
+                          PdfDocument, detect_pdf_layout, stratified_sample, wilson_interval)
+
+
+def build_pdf(kinds) -> bytes:
+    """PDF em memória com uma página por item de `kinds` (PAGE_DIGITAL, PAGE_SCANNED ou PAGE_BLANK)."""
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    pixmap.clear_with(200)
+    doc = fitz.open()
+    for index, kind in enumerate(kinds, start=1):
+        page = doc.new_page(width=300, height=400)
+        if kind == PAGE_DIGITAL:
+            page.insert_text((30, 60), f"Pagina {index} com texto nativo suficiente para a deteccao.")
+        elif kind == PAGE_SCANNED:
+            page.insert_image(page.rect, pixmap=pixmap)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_page_kind_uses_fonts_and_images():
+    with PdfDocument("t.pdf", stream=build_pdf([PAGE_DIGITAL, PAGE_SCANNED, PAGE_BLANK])) as document:
+        assert document.classify_pages() == {1: PAGE_DIGITAL, 2: PAGE_SCANNED, 3: PAGE_BLANK}
+
+
+@pytest.mark.parametrize("kinds, verdict", [
+    ([PAGE_DIGITAL] * 5, PDF_DIGITAL),
+    ([PAGE_SCANNED] * 5, PDF_SCANNED),
+    ([PAGE_DIGITAL, PAGE_BLANK, PAGE_SCANNED], PDF_MIXED),
+    ([PAGE_SCANNED, PAGE_BLANK, PAGE_SCANNED], PDF_SCANNED),
+])
+def test_small_documents_are_classified_exactly(kinds, verdict):
+    assert detect_pdf_layout("t.pdf", stream=build_pdf(kinds))[0] == verdict
+
+
+def test_scanned_document_keeps_blank_pages_out_of_ocr():
+    verdict, text_layer = detect_pdf_layout("t.pdf", stream=build_pdf([PAGE_SCANNED, PAGE_BLANK, PAGE_SCANNED]))
+    assert verdict == PDF_SCANNED
+    assert text_layer == {1: None, 2: "", 3: None}
+
+
+@pytest.mark.parametrize("start", range(1, 298, 7))
+def test_scanned_block_between_samples_is_not_lost(start):
+    # Bloco escaneado em um PDF digital maior que a amostra: o veredito precisa ser misto, com OCR no bloco
+    total_pages, block = 300, range(start, start + 3)
+    kinds = [PAGE_SCANNED if page_num in block else PAGE_DIGITAL for page_num in range(1, total_pages + 1)]
+    verdict, text_layer = detect_pdf_layout("t.pdf", stream=build_pdf(kinds))
+    assert verdict == PDF_MIXED
+    assert [page_num for page_num, text in text_layer.items() if text is None] == list(block)
+
+
+def test_large_uniform_document_stays_digital():
+    assert detect_pdf_layout("t.pdf", stream=build_pdf([PAGE_DIGITAL] * 150)) == (PDF_DIGITAL, None)
+
+
+def test_unreadable_pdf():
+    assert detect_pdf_layout("t.pdf", stream=b"not a pdf") == (None, {})
+
+
+def test_stratified_sample_covers_every_stratum_once():
+    sample = stratified_sample(300, 64, seed=300)
+    assert len(sample) == len(set(sample)) == 64
+    for index in range(64):
+        start, end = index * 300 // 64, (index + 1) * 300 // 64
+        assert sum(start < page_num <= end for page_num in sample) == 1
+    # Prefixos curtos já cobrem o início e o fim do documento
+    assert min(sample[:4]) <= 75 and max(sample[:4]) > 225
+
+
+def test_stratified_sample_small_document_is_exhaustive():
+    assert sorted(stratified_sample(10, 64)) == list(range(1, 11))
+
+
+def test_wilson_interval():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(8, 8)
+    assert 0.6 < low < 0.7 and high == pytest.approx(1.0)
+    low, high = wilson_interval(5, 10)
+    assert low < 0.5 < high and low == pytest.approx(1 - high)
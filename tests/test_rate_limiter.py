@@ -0,0 +1,74 @@
+# tests/test_rate_limiter.py
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, call_with_retries
+
+
+class FakeClock:
+    """time.monotonic/time.sleep simulados: sleep apenas avança o relógio."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_requests_per_minute_waits_for_the_window(clock):
+    limiter = RateLimiter(requests_per_minute=2)
+    limiter.acquire()
+    clock.now += 10
+    limiter.acquire()
+    assert clock.sleeps == []
+
+    limiter.acquire()
+    # A terceira requisição espera a primeira sair da janela de 60s
+    assert clock.now == pytest.approx(1060.0)
+
+
+def test_tokens_per_minute_uses_settled_consumption(clock):
+    limiter = RateLimiter(tokens_per_minute=1000)
+    reservation = limiter.acquire(tokens=900)
+    limiter.settle(reservation, 100)
+    limiter.acquire(tokens=800)
+    assert clock.sleeps == []
+
+    # Uma requisição maior que o orçamento inteiro passa sozinha quando a janela esvazia
+    limiter.acquire(tokens=5000)
+    assert clock.now == pytest.approx(1060.0)
+
+
+def test_call_with_retries_only_retries_transient_errors(clock):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert call_with_retries(flaky, max_retries=5) == "ok"
+    assert len(attempts) == 3 and len(clock.sleeps) == 2
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("permanente")
+
+    with pytest.raises(ValueError):
+        call_with_retries(broken, max_retries=5)
+    assert len(attempts) == 4
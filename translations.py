@@ -0,0 +1,433 @@
+# translations.py
+
+# Textos da interface e das mensagens do pipeline (pt/en). Compartilhado pela interface Streamlit
+# e pelos processos sem interface (worker de jobs), que não importam o Streamlit.
+TRANSLATIONS = {
+    "pt": {
+        "page_title": "Processador de Documentos para Markdown",
+        "login_subtitle": "Sistema Seguro de Processamento de Documentos",
+        "username": "Usuário",
+        "username_placeholder": "Digite seu usuário...",
+        "password": "Senha",
+        "password_placeholder": "Digite sua senha...",
+        "enter": "Entrar",
+        "login_success": "Login efetuado com sucesso! Redirecionando...",
+        "login_error": "Usuário ou senha inválidos. Tente novamente.",
+        "forced_change_pwd_title": "🔒 Alteração de Senha Obrigatória",
+        "forced_change_pwd_subtitle": "Este é o seu primeiro acesso ou sua senha foi resetada. Por questões de segurança, você deve escolher uma senha forte.",
+        "new_pwd": "Nova Senha",
+        "new_pwd_placeholder": "Digite uma nova senha...",
+        "confirm_pwd": "Confirme a Nova Senha",
+        "confirm_pwd_placeholder": "Repita a nova senha...",
+        "change_pwd_btn": "Alterar Senha e Entrar",
+        "pwd_blank_error": "A nova senha não pode estar em branco.",
+        "pwd_min_len_error": "A senha deve ter pelo menos 6 caracteres por segurança.",
+        "pwd_default_error": "A nova senha não pode ser a senha padrão '123456'. Defina uma senha mais segura.",
+        "pwd_mismatch_error": "As senhas digitadas não coincidem. Tente novamente.",
+        "pwd_change_success": "Senha alterada com sucesso! Acessando o sistema...",
+        "system_error_login": "Erro interno do sistema. Por favor, tente fazer login novamente.",
+        "connected_user": "👤 Usuário Conectado",
+        "role_admin": "🟢 Administrador",
+        "role_user": "🔵 Usuário Padrão",
+        "label_name": "Nome",
+        "label_profile": "Perfil",
+        "security_alert": "⚠️ **ALERTA DE SEGURANÇA:**\nA senha do usuário 'admin' ainda é a senha padrão provisória ('admin123'). Por favor, altere-a imediatamente na aba de Gestão de Usuários!",
+        "navigation": "Navegação",
+        "nav_process_docs": "📄 Processar Documentos",
+        "nav_user_mgmt": "👥 Gestão de Usuários",
+        "logout_btn": "🚪 Sair do Sistema",
+        "logout_success": "Logout efetuado!",
+        "user_mgmt_title": "👥 Gestão de Usuários",
+        "tab_registered_users": "📋 Usuários Cadastrados",
+        "tab_create_user": "➕ Criar Novo Usuário",
+        "status_badge_admin": "🟢 Admin",
+        "status_badge_user": "🔵 Usuário",
+        "status_badge_pwd_pending": " &nbsp;&nbsp;&nbsp; ⚠️ *Alteração de senha pendente*",
+        "created_at": "Criado em",
+        "updated_at": "Atualizado em",
+        "edit_user_help": "Editar Usuário",
+        "reset_pwd_help": "Redefinir Senha",
+        "delete_user_help": "Excluir Usuário",
+        "edit_user_section_title": "##### Editar Usuário",
+        "new_username_label": "Novo nome de usuário",
+        "admin_checkbox_label": "Administrador?",
+        "confirm_edit_btn": "Confirmar Edição",
+        "reset_pwd_section_title": "##### Redefinir Senha",
+        "reset_pwd_confirm_btn": "Confirmar Nova Senha",
+        "delete_user_warning": "Tem certeza que deseja excluir o usuário `{}`? Esta ação não pode ser desfeita.",
+        "delete_user_yes": "Sim, Excluir",
+        "create_user_info": "ℹ️ Novos usuários são criados automaticamente com a senha provisória **123456** e serão obrigados a alterá-la no primeiro acesso por questões de segurança.",
+        "new_username_placeholder": "Ex: joao.silva",
+        "admin_privileges_checkbox": "Conceder privilégios de Administrador?",
+        "create_user_btn": "Cadastrar Usuário",
+        "process_docs_title": "📄 Processador de Documentos para Markdown",
+        "input_data_subheader": "1. Entrada de Dados",
+        "tab_local_file": "📂 Arquivo Local",
+        "tab_batch_folder": "📦 Pasta (Lote)",
+        "tab_dropbox": "☁️ Dropbox",
+        "tab_youtube": "📺 YouTube",
+        "local_tab_headless_info": "ℹ️ Faça o upload de um arquivo para converter e gerar a versão Markdown para download.",
+        "local_tab_headless_uploader": "Selecione um arquivo para converter:",
+        "local_tab_info": "ℹ️ Selecione um arquivo para salvar a versão Markdown na **mesma pasta original**.",
+        "local_tab_select_btn": "📂 Selecionar Arquivo",
+        "local_tab_no_selection": "Nenhum arquivo selecionado.",
+        "all_supported": "Todos os Suportados",
+        "pdf_docs": "Documentos PDF",
+        "all_files": "Todos os Arquivos",
+        "batch_tab_headless_warning": "⚠️ **Aviso:** O processamento de pastas locais (Lote) está desativado em modo servidor (VPS/Docker) pois requer acesso ao sistema de arquivos do servidor. Para processar múltiplos arquivos em lote na nuvem, utilize a aba **Dropbox**, que oferece navegação de pastas e processamento incremental seguro.",
+        "batch_tab_info": "ℹ️ Selecione uma **PASTA** para converter TODOS os arquivos contidos nela (Recursivo).",
+        "batch_tab_select_btn": "📂 Selecionar Pasta",
+        "batch_tab_no_selection": "Nenhuma pasta selecionada.",
+        "semantic_index_title": "📚 Índice Semântico (RLM)",
+        "generate_index_local_btn": "🧠 Gerar Índice PDF desta Pasta",
+        "gemini_key_required_error": "⚠️ É necessário configurar a Chave API Gemini para usar o RLM.",
+        "index_running_spinner": "🧠 Analisando arquivos e gerando índice com RLM... (Isso pode demorar)",
+        "index_success": "✅ Índice Gerado com Sucesso! {} arquivo(s) indexado(s). Verifique os arquivos '_INDEX_CONTENT*.pdf' na pasta.",
+        "index_no_md_warning": "⚠️ Nenhum arquivo Markdown (.md) foi encontrado para indexar nesta pasta. Apenas arquivos convertidos para Markdown (.md) podem ser indexados. Converta seus arquivos primeiro nas abas correspondente!",
+        "dropbox_info": "ℹ️ Navegue pelas pastas e clique em 'Selecionar Esta Pasta' para converter.",
+        "dropbox_token_expander": "🔑 Configurar Token do Dropbox (Clique para expandir)",
+        "dropbox_token_instructions": "**Como obter um novo token:**\n1. Acesse [dropbox.com/developers/apps](https://www.dropbox.com/developers/apps).\n2. Clique no seu App (`carroll_rag` ou similar).\n3. Vá na aba **Settings**.\n4. Role até a seção **OAuth 2**.\n5. Clique no botão **Generate** (abaixo de *Generated access token*).\n6. Copie o código e cole abaixo.",
+        "dropbox_token_placeholder": "Cole seu Dropbox Access Token aqui:",
+        "dropbox_token_updated": "Token atualizado na sessão! (Reinicie o app se quiser salvar no .env permanentemente)",
+        "dropbox_token_missing": "⚠️ Token do Dropbox não encontrado. Por favor, insira acima.",
+        "dropbox_token_invalid": "O token atual parece inválido ou expirado. Use a área 'Configurar Token' acima para corrigir.",
+        "dropbox_current_folder": "Pasta Atual",
+        "dropbox_up_level": "⬆️ Subir Nível",
+        "dropbox_refresh_btn": "🔄 Atualizar",
+        "dropbox_raiz": "Raiz (/)",
+        "dropbox_select_folder_btn": "✅ Selecionar Esta Pasta para Conversão",
+        "dropbox_selected_msg": "Pasta selecionada",
+        "dropbox_subfolders_caption": "Subpastas (clique para entrar):",
+        "dropbox_no_subfolders": "*(Nenhuma subpasta encontrada)*",
+        "dropbox_ready_msg": "🎯 **Pronto para processar:** {}",
+        "generate_index_dbx_btn": "🧠 Gerar Índice PDF (Dropbox)",
+        "dbx_index_running_spinner": "🧠 Preparando arquivos do Dropbox para indexação...",
+        "dbx_no_md_found": "Nenhum arquivo Markdown encontrado para indexar.",
+        "dbx_downloaded_for_analysis": "Baixados {} arquivos para análise.",
+        "dbx_rlm_processing_spinner": "🧠 RLM processando e gerando PDF...",
+        "dbx_index_no_md_warning": "⚠️ Nenhum arquivo Markdown (.md) foi encontrado para indexar nesta pasta. Apenas arquivos convertidos para Markdown (.md) podem ser indexados. Converta seus arquivos do Dropbox primeiro na aba acima!",
+        "dbx_no_index_generated": "Nenhum índice gerado. (Verifique logs/arquivos MD)",
+        "dbx_sending_toast": "Enviando",
+        "dbx_index_success": "✅ {} Índices Semânticos gerados e enviados para o Dropbox com sucesso!",
+        "youtube_info": "ℹ️ Transcrição salva na pasta `markdown_output`.",
+        "youtube_url_placeholder": "Cole uma URL do YouTube:",
+        "ia_config_subheader": "2. Configuração de IA (Opcional)",
+        "use_gemini_checkbox": "Usar Google Gemini AI? (Recomendado para PDFs escaneados ruins ou imagens complexas)",
+        "gemini_key_placeholder": "Cole sua Chave API Gemini:",
+        "gemini_key_valid": "✅ Chave Gemini validada!",
+        "gemini_force_checkbox": "Forçar uso do Gemini mesmo se Tesseract funcionar?",
+        "gemini_force_help": "Ignora OCR local e usa nuvem para tudo (custo/tempo maior).",
+        "gemini_confidence_slider": "Confiança mínima do Tesseract por página",
+        "gemini_confidence_help": "Páginas com confiança média abaixo deste valor (0-100) são reenviadas ao Gemini; as demais mantêm o OCR local.",
+        "gemini_key_invalid": "❌ Chave inválida.",
+        "gemini_key_warning": "⚠️ Insira a chave para ativar o modo IA.",
+        "overwrite_checkbox": "Sobrescrever arquivos Markdown existentes?",
+        "overwrite_help": "Se desmarcado, o sistema pulará arquivos que já possuem a versão _MD.md na pasta.",
+        "ready_to_process_info": "📁 **Pronto para Processar:** {}",
+        "start_processing_btn": "🚀 Iniciar Processamento",
+        "processing_youtube": "Processando YouTube",
+        "extracting_youtube": "Extraindo transcrição do YouTube...",
+        "youtube_transcription_success": "✅ Transcrição concluída!",
+        "youtube_transcription_error": "❌ Falha ao obter transcrição. Verifique se o vídeo tem legendas.",
+        "youtube_url_invalid": "❌ URL do YouTube inválida.",
+        "mode_hybrid_upload": "Modo de Processamento: Híbrido (Upload Web + Nuvem Gemini)",
+        "mode_local_upload": "Modo de Processamento: 100% Local (Upload Web + MarkItDown/Tesseract)",
+        "processing_upload": "Processando Upload Web...",
+        "upload_success": "✅ Upload processado com sucesso!",
+        "mode_hybrid_local": "Modo de Processamento: Híbrido (Local + Nuvem Gemini)",
+        "mode_local_local": "Modo de Processamento: 100% Local (MarkItDown/Tesseract)",
+        "processing_local": "Processando Arquivo Local...",
+        "mode_hybrid_batch": "Modo Batch: Híbrido (Local + Nuvem Gemini)",
+        "mode_local_batch": "Modo Batch: 100% Local",
+        "mode_hybrid_dropbox": "Modo Dropbox: Híbrido (Download -> Process -> Upload)",
+        "mode_local_dropbox": "Modo Dropbox: 100% Local (Download -> Process -> Upload)",
+        "processing_done_subheader": "✅ Processamento Concluído",
+        "preview_title": "### Pré-visualização do Conteúdo (Markdown)",
+        "extracted_content_label": "Conteúdo Extraído",
+        "download_md_btn": "⬇️ Baixar Arquivo Markdown",
+        "clean_old_outputs_btn": "🗑️ Limpar Arquivos de Saída Antigos",
+        "clean_success": "Pasta de saída limpa com sucesso!",
+        "clean_empty_info": "Nenhum arquivo para limpar na pasta de saída.",
+        "saved_locally_caption": "Arquivo salvo localmente no servidor em: {}",
+        "scanning_files": "🔍 Varrendo arquivos...",
+        "no_supported_files_found": "Nenhum arquivo suportado encontrado nesta pasta.",
+        "found_incompatible_files": "📂 Encontrados {} arquivos incompatíveis para conversão.",
+        "stop_batch_btn": "🛑 Parar Processamento em Lote",
+        "stop_dbx_btn": "🛑 Parar Dropbox Batch",
+        "batch_stopped_by_user": "Processamento interrompido pelo usuário.",
+        "batch_skipping_existing": "⏩ Pulando (Já existe): {}",
+        "batch_processing_file": "Processando [{}/{}]: {}...",
+        "batch_completed_msg": "✅ Concluído! Processados: {}. Pulados: {}. Erros: {}.",
+        "batch_parallel_caption": "Conversão paralela: até {} arquivos de CPU (Tesseract/MarkItDown) e {} de E/S (Gemini) ao mesmo tempo.",
+        "dbx_token_missing_error": "Token do Dropbox não encontrado.",
+        "dbx_scanning_files": "☁️ Varrendo arquivos no Dropbox...",
+        "dbx_no_supported_files": "Nenhum arquivo suportado encontrado em '{}'.",
+        "dbx_found_files": "☁️ Encontrados {} arquivos no Dropbox.",
+        "dbx_stopping": "Interrompido.",
+        "dbx_skipping_existing": "⏩ Pulando (Já existe): {}",
+        "dbx_download_processing": "Baixando e Processando [{}/{}]: {}...",
+        "dbx_uploading": "⬆️ Fazendo Upload",
+        "dbx_upload_error": "Erro no upload de {}",
+        "dbx_convert_error": "Erro na conversão de {}",
+        "dbx_batch_completed_msg": "✅ Dropbox Batch Concluído! Sucessos: {}. Pulados: {}. Erros: {}.",
+        "dbx_download_error": "Erro no download de {}",
+        "dbx_connected_as": "Conectado como: {}",
+        "dbx_auth_error": "Erro de Autenticação: Token expirado ou inválido.",
+        "dbx_connection_error": "Erro de Conexão: {}",
+        "dbx_list_error": "Erro ao listar arquivos do Dropbox: {}",
+        "dbx_continuous_checkbox": "Monitorar a pasta continuamente",
+        "dbx_continuous_help": "O job não termina: após o lote, aguarda novos uploads na pasta e os converte em segundos. Use 'Cancelar' na Fila de Processamento para encerrar.",
+        "job_submitted": "📥 Job #{} enviado para a fila. O processamento continua em segundo plano, mesmo se você fechar a página.",
+        "jobs_subheader": "📋 Fila de Processamento",
+        "jobs_empty": "Nenhum job enviado ainda.",
+        "job_kind_local_batch": "📁 Lote Local",
+        "job_kind_dropbox_batch": "☁️ Dropbox",
+        "job_status_queued": "⏳ Na fila",
+        "job_status_running": "⚙️ Em execução",
+        "job_status_completed": "✅ Concluído",
+        "job_status_failed": "❌ Falhou",
+        "job_status_cancelled": "🛑 Cancelado",
+        "job_counts_caption": "Processados: {}. Pulados: {}. Erros: {}. Total: {}.",
+        "job_cancel_btn": "🛑 Cancelar",
+        "job_cancel_requested": "Cancelamento solicitado. Os arquivos em andamento serão concluídos.",
+        "job_failed_files_expander": "Arquivos com erro ({})",
+        "pdf_digital_detected": "✅ PDF digital detectado. Usando MarkItDown/Fallback para extração estruturada (Local).",
+        "pdf_scanned_detected": "⚠️ PDF escaneado detectado. Tentando OCR local (Tesseract) primeiro.",
+        "pdf_hybrid_detected": "🔀 PDF misto detectado: {} páginas com texto nativo, {} páginas escaneadas enviadas ao OCR.",
+        "pdf_hybrid_success": "✅ Extração híbrida (texto nativo + OCR por página) concluída.",
+        "cache_hit": "⚡ Conversão idêntica encontrada no cache. Markdown reaproveitado sem reprocessar.",
+        "cache_stats_caption": "Cache de conversões: {} acertos / {} falhas · {} arquivos · {:.1f} MB",
+        "gemini_escalated_pages": "🔁 {} páginas com confiança do Tesseract abaixo de {:.0f} reenviadas ao Gemini.",
+        "low_confidence_pages_warning": "⚠️ {} páginas com baixa confiança no OCR local. Informe uma chave Gemini para reprocessá-las.",
+        "tesseract_success": "✅ OCR Local (Tesseract) concluído. Verifique a qualidade.",
+        "initiating_gemini_ocr": "Iniciando OCR e estruturação via Gemini (custo/nuvem).",
+        "gemini_processing_success": "✅ Processamento Gemini concluído.",
+        "gemini_processing_failure": "❌ Processamento Gemini falhou (Bloqueio de Conteúdo ou Erro de API).",
+        "tesseract_failure": "❌ OCR Tesseract falhou.",
+        "trying_gemini_fallback": "Tentando OCR e estruturação via Gemini (custo/nuvem) as fallback.",
+        "pdf_processing_failure": "❌ Não foi possível processar o PDF. Chave Gemini não fornecida para fallback.",
+        "markitdown_extraction": "✅ Arquivo {} detectado. Extração estruturada via MarkItDown.",
+        "unsupported_format": "❌ Formato de arquivo '{}' não suportado.",
+        "file_not_found": "❌ Arquivo não encontrado no caminho especificado.",
+        "saving_local_mode": "💾 Modo Local: Salvando saída na mesma pasta: {}",
+        "saving_upload_mode": "💾 Processando upload temporário e salvando resultado em: {}",
+        "saving_upload_mode_simple": "📂 Modo Upload: Salvando saída em {}"
+    },
+    "en": {
+        "page_title": "Document Processor to Markdown",
+        "login_subtitle": "Secure Document Processing System",
+        "username": "Username",
+        "username_placeholder": "Enter your username...",
+        "password": "Password",
+        "password_placeholder": "Enter your password...",
+        "enter": "Sign In",
+        "login_success": "Login successful! Redirecting...",
+        "login_error": "Invalid username or password. Please try again.",
+        "forced_change_pwd_title": "🔒 Mandatory Password Change",
+        "forced_change_pwd_subtitle": "This is your first access or your password has been reset. For security reasons, you must choose a strong password.",
+        "new_pwd": "New Password",
+        "new_pwd_placeholder": "Enter a new password...",
+        "confirm_pwd": "Confirm New Password",
+        "confirm_pwd_placeholder": "Repeat new password...",
+        "change_pwd_btn": "Change Password and Sign In",
+        "pwd_blank_error": "New password cannot be blank.",
+        "pwd_min_len_error": "Password must be at least 6 characters long for security.",
+        "pwd_default_error": "New password cannot be the default password '123456'. Set a more secure password.",
+        "pwd_mismatch_error": "The passwords entered do not match. Please try again.",
+        "pwd_change_success": "Password changed successfully! Accessing system...",
+        "system_error_login": "Internal system error. Please try logging in again.",
+        "connected_user": "👤 Connected User",
+        "role_admin": "🟢 Administrator",
+        "role_user": "🔵 Standard User",
+        "label_name": "Name",
+        "label_profile": "Profile",
+        "security_alert": "⚠️ **SECURITY ALERT:**\nThe password for the 'admin' user is still the temporary default password ('admin123'). Please change it immediately in the User Management tab!",
+        "navigation": "Navigation",
+        "nav_process_docs": "📄 Process Documents",
+        "nav_user_mgmt": "👥 User Management",
+        "logout_btn": "🚪 Sign Out",
+        "logout_success": "Logged out successfully!",
+        "user_mgmt_title": "👥 User Management",
+        "tab_registered_users": "📋 Registered Users",
+        "tab_create_user": "➕ Create New User",
+        "status_badge_admin": "🟢 Admin",
+        "status_badge_user": "🔵 User",
+        "status_badge_pwd_pending": " &nbsp;&nbsp;&nbsp; ⚠️ *Password change pending*",
+        "created_at": "Created at",
+        "updated_at": "Updated at",
+        "edit_user_help": "Edit User",
+        "reset_pwd_help": "Reset Password",
+        "delete_user_help": "Delete User",
+        "edit_user_section_title": "##### Edit User",
+        "new_username_label": "New username",
+        "admin_checkbox_label": "Administrator?",
+        "confirm_edit_btn": "Confirm Edit",
+        "reset_pwd_section_title": "##### Reset Password",
+        "reset_pwd_confirm_btn": "Confirm New Password",
+        "delete_user_warning": "Are you sure you want to delete user `{}`? This action cannot be undone.",
+        "delete_user_yes": "Yes, Delete",
+        "create_user_info": "ℹ️ New users are automatically created with the temporary password **123456** and will be forced to change it on their first access for security reasons.",
+        "new_username_placeholder": "E.g., john.doe",
+        "admin_privileges_checkbox": "Grant Administrator privileges?",
+        "create_user_btn": "Register User",
+        "process_docs_title": "📄 Document Processor to Markdown",
+        "input_data_subheader": "1. Data Input",
+        "tab_local_file": "📂 Local File",
+        "tab_batch_folder": "📦 Folder (Batch)",
+        "tab_dropbox": "☁️ Dropbox",
+        "tab_youtube": "📺 YouTube",
+        "local_tab_headless_info": "ℹ️ Upload a file to convert and generate the Markdown version for download.",
+        "local_tab_headless_uploader": "Select a file to convert:",
+        "local_tab_info": "ℹ️ Select a file to save the Markdown version in the **same original folder**.",
+        "local_tab_select_btn": "📂 Select File",
+        "local_tab_no_selection": "No file selected.",
+        "all_supported": "All Supported",
+        "pdf_docs": "PDF Documents",
+        "all_files": "All Files",
+        "batch_tab_headless_warning": "⚠️ **Warning:** Local folder processing (Batch) is disabled in server mode (VPS/Docker) as it requires access to the server's file system. To process multiple files in batch on the cloud, use the **Dropbox** tab, which offers safe folder navigation and incremental processing.",
+        "batch_tab_info": "ℹ️ Select a **FOLDER** to convert ALL files contained within it (Recursive).",
+        "batch_tab_select_btn": "📂 Select Folder",
+        "batch_tab_no_selection": "No folder selected.",
+        "semantic_index_title": "📚 Semantic Index (RLM)",
+        "generate_index_local_btn": "🧠 Generate PDF Index of this Folder",
+        "gemini_key_required_error": "⚠️ Configuring the Gemini API Key is required to use RLM.",
+        "index_running_spinner": "🧠 Analyzing files and generating index with RLM... (This may take a while)",
+        "index_success": "✅ Index Generated Successfully! {} file(s) indexed. Check the '_INDEX_CONTENT*.pdf' files in the folder.",
+        "index_no_md_warning": "⚠️ No Markdown (.md) files were found to index in this folder. Only files converted to Markdown (.md) can be indexed. Convert your files first in the corresponding tabs!",
+        "dropbox_info": "ℹ️ Navigate through folders and click 'Select This Folder' to convert.",
+        "dropbox_token_expander": "🔑 Configure Dropbox Token (Click to expand)",
+        "dropbox_token_instructions": "**How to obtain a new token:**\n1. Access [dropbox.com/developers/apps](https://www.dropbox.com/developers/apps).\n2. Click on your App (`carroll_rag` or similar).\n3. Go to the **Settings** tab.\n4. Scroll down to the **OAuth 2** section.\n5. Click on the **Generate** button (under *Generated access token*).\n6. Copy the code and paste it below.",
+        "dropbox_token_placeholder": "Paste your Dropbox Access Token here:",
+        "dropbox_token_updated": "Token updated in session! (Restart app to save in .env permanently)",
+        "dropbox_token_missing": "⚠️ Dropbox Token not found. Please insert it above.",
+        "dropbox_token_invalid": "The current token seems invalid or expired. Use the 'Configure Token' area above to fix it.",
+        "dropbox_current_folder": "Current Folder",
+        "dropbox_up_level": "⬆️ Go Up One Level",
+        "dropbox_refresh_btn": "🔄 Refresh",
+        "dropbox_raiz": "Root (/)",
+        "dropbox_select_folder_btn": "✅ Select This Folder for Conversion",
+        "dropbox_selected_msg": "Folder selected",
+        "dropbox_subfolders_caption": "Subfolders (click to enter):",
+        "dropbox_no_subfolders": "*(No subfolders found)*",
+        "dropbox_ready_msg": "🎯 **Ready to process:** {}",
+        "generate_index_dbx_btn": "🧠 Generate PDF Index (Dropbox)",
+        "dbx_index_running_spinner": "🧠 Preparing Dropbox files for indexing...",
+        "dbx_no_md_found": "No Markdown files found to index.",
+        "dbx_downloaded_for_analysis": "Downloaded {} files for analysis.",
+        "dbx_rlm_processing_spinner": "🧠 RLM processing and generating PDF...",
+        "dbx_index_no_md_warning": "⚠️ No Markdown (.md) files were found to index in this folder. Only files converted to Markdown (.md) can be indexed. Convert your Dropbox files first in the tab above!",
+        "dbx_no_index_generated": "No index generated. (Check logs/MD files)",
+        "dbx_sending_toast": "Uploading",
+        "dbx_index_success": "✅ {} Semantic Indexes successfully generated and uploaded to Dropbox!",
+        "youtube_info": "ℹ️ Transcript saved in folder `markdown_output`.",
+        "youtube_url_placeholder": "Paste a YouTube URL:",
+        "ia_config_subheader": "2. AI Configuration (Optional)",
+        "use_gemini_checkbox": "Use Google Gemini AI? (Recommended for poor quality scanned PDFs or complex images)",
+        "gemini_key_placeholder": "Paste your Gemini API Key:",
+        "gemini_key_valid": "✅ Gemini Key validated!",
+        "gemini_force_checkbox": "Force Gemini usage even if Tesseract works?",
+        "gemini_force_help": "Bypasses local OCR and uses the cloud for everything (higher cost/time).",
+        "gemini_confidence_slider": "Minimum Tesseract confidence per page",
+        "gemini_confidence_help": "Pages with average confidence below this value (0-100) are re-sent to Gemini; the others keep the local OCR.",
+        "gemini_key_invalid": "❌ Invalid Key.",
+        "gemini_key_warning": "⚠️ Insert the key to enable AI mode.",
+        "overwrite_checkbox": "Overwrite existing Markdown files?",
+        "overwrite_help": "If unchecked, the system will skip files that already have an _MD.md version in the folder.",
+        "ready_to_process_info": "📁 **Ready to Process:** {}",
+        "start_processing_btn": "🚀 Start Processing",
+        "processing_youtube": "Processing YouTube",
+        "extracting_youtube": "Extracting YouTube transcript...",
+        "youtube_transcription_success": "✅ Transcription completed!",
+        "youtube_transcription_error": "❌ Failed to obtain transcription. Verify if the video has subtitles.",
+        "youtube_url_invalid": "❌ Invalid YouTube URL.",
+        "mode_hybrid_upload": "Processing Mode: Hybrid (Web Upload + Gemini Cloud)",
+        "mode_local_upload": "Processing Mode: 100% Local (Web Upload + MarkItDown/Tesseract)",
+        "processing_upload": "Processing Web Upload...",
+        "upload_success": "✅ Upload processed successfully!",
+        "mode_hybrid_local": "Processing Mode: Hybrid (Local + Gemini Cloud)",
+        "mode_local_local": "Processing Mode: 100% Local (MarkItDown/Tesseract)",
+        "processing_local": "Processing Local File...",
+        "mode_hybrid_batch": "Batch Mode: Hybrid (Local + Gemini Cloud)",
+        "mode_local_batch": "Batch Mode: 100% Local",
+        "mode_hybrid_dropbox": "Dropbox Mode: Hybrid (Download -> Process -> Upload)",
+        "mode_local_dropbox": "Dropbox Mode: 100% Local (Download -> Process -> Upload)",
+        "processing_done_subheader": "✅ Processing Completed",
+        "preview_title": "### Content Preview (Markdown)",
+        "extracted_content_label": "Extracted Content",
+        "download_md_btn": "⬇️ Download Markdown File",
+        "clean_old_outputs_btn": "🗑️ Clean Old Output Files",
+        "clean_success": "Output folder successfully cleaned!",
+        "clean_empty_info": "No files to clean in the output folder.",
+        "saved_locally_caption": "File saved locally on the server at: {}",
+        "scanning_files": "🔍 Scanning files...",
+        "no_supported_files_found": "No supported files found in this folder.",
+        "found_incompatible_files": "📂 Found {} incompatible files for conversion.",
+        "stop_batch_btn": "🛑 Stop Batch Processing",
+        "stop_dbx_btn": "🛑 Stop Dropbox Batch",
+        "batch_stopped_by_user": "Processing stopped by user.",
+        "batch_skipping_existing": "⏩ Skipping (Already exists): {}",
+        "batch_processing_file": "Processing [{}/{}]: {}...",
+        "batch_completed_msg": "✅ Completed! Processed: {}. Skipped: {}. Errors: {}.",
+        "batch_parallel_caption": "Parallel conversion: up to {} CPU files (Tesseract/MarkItDown) and {} I/O files (Gemini) at a time.",
+        "dbx_token_missing_error": "Dropbox Token not found.",
+        "dbx_scanning_files": "☁️ Scanning files on Dropbox...",
+        "dbx_no_supported_files": "No supported files found in '{}'.",
+        "dbx_found_files": "☁️ Found {} files on Dropbox.",
+        "dbx_stopping": "Stopped.",
+        "dbx_skipping_existing": "⏩ Skipping (Already exists): {}",
+        "dbx_download_processing": "Downloading and Processing [{}/{}]: {}...",
+        "dbx_uploading": "⬆️ Uploading",
+        "dbx_upload_error": "Upload error for {}",
+        "dbx_convert_error": "Conversion error for {}",
+        "dbx_batch_completed_msg": "✅ Dropbox Batch Completed! Successes: {}. Skipped: {}. Errors: {}.",
+        "dbx_download_error": "Download error for {}",
+        "dbx_connected_as": "Connected as: {}",
+        "dbx_auth_error": "Authentication Error: Expired or invalid token.",
+        "dbx_connection_error": "Connection Error: {}",
+        "dbx_list_error": "Error listing Dropbox files: {}",
+        "dbx_continuous_checkbox": "Keep watching the folder",
+        "dbx_continuous_help": "The job does not finish: after the batch it waits for new uploads in the folder and converts them within seconds. Use 'Cancel' in the Processing Queue to stop it.",
+        "job_submitted": "📥 Job #{} added to the queue. Processing continues in the background, even if you close the page.",
+        "jobs_subheader": "📋 Processing Queue",
+        "jobs_empty": "No jobs submitted yet.",
+        "job_kind_local_batch": "📁 Local Batch",
+        "job_kind_dropbox_batch": "☁️ Dropbox",
+        "job_status_queued": "⏳ Queued",
+        "job_status_running": "⚙️ Running",
+        "job_status_completed": "✅ Completed",
+        "job_status_failed": "❌ Failed",
+        "job_status_cancelled": "🛑 Cancelled",
+        "job_counts_caption": "Processed: {}. Skipped: {}. Errors: {}. Total: {}.",
+        "job_cancel_btn": "🛑 Cancel",
+        "job_cancel_requested": "Cancellation requested. Files in progress will finish.",
+        "job_failed_files_expander": "Files with errors ({})",
+        "pdf_digital_detected": "✅ Digital PDF detected. Using MarkItDown/Fallback for structured extraction (Local).",
+        "pdf_scanned_detected": "⚠️ Scanned PDF detected. Attempting local OCR (Tesseract) first.",
+        "pdf_hybrid_detected": "🔀 Mixed PDF detected: {} pages with native text, {} scanned pages sent to OCR.",
+        "pdf_hybrid_success": "✅ Hybrid extraction (native text + per-page OCR) completed.",
+        "cache_hit": "⚡ Identical conversion found in cache. Markdown reused without reprocessing.",
+        "cache_stats_caption": "Conversion cache: {} hits / {} misses · {} files · {:.1f} MB",
+        "gemini_escalated_pages": "🔁 {} pages with Tesseract confidence below {:.0f} re-sent to Gemini.",
+        "low_confidence_pages_warning": "⚠️ {} pages with low local OCR confidence. Provide a Gemini key to reprocess them.",
+        "tesseract_success": "✅ Local OCR (Tesseract) completed. Verify the quality.",
+        "initiating_gemini_ocr": "Initiating OCR and structuring via Gemini (cost/cloud).",
+        "gemini_processing_success": "✅ Gemini processing completed.",
+        "gemini_processing_failure": "❌ Gemini processing failed (Content Blocked or API Error).",
+        "tesseract_failure": "❌ Tesseract OCR failed.",
+        "trying_gemini_fallback": "Attempting OCR and structuring via Gemini (cost/cloud) as fallback.",
+        "pdf_processing_failure": "❌ Could not process PDF. Gemini key not provided for fallback.",
+        "markitdown_extraction": "✅ File {} detected. Structured extraction via MarkItDown.",
+        "unsupported_format": "❌ Unsupported file format '{}'.",
+        "file_not_found": "❌ File not found at the specified path.",
+        "saving_local_mode": "💾 Local Mode: Saving output in the same folder: {}",
+        "saving_upload_mode": "💾 Processing temporary upload and saving result in: {}",
+        "saving_upload_mode_simple": "📂 Upload Mode: Saving output in {}"
+    }
+}
+
+def translate(key: str, lang: str = 'pt', *args) -> str:
+    """Texto traduzido da chave no idioma informado (a própria chave, se não existir), formatado com args."""
+    text = TRANSLATIONS.get(lang, TRANSLATIONS['pt']).get(key, key)
+    if args:
+        return text.format(*args)
+    return text